@@ -0,0 +1,154 @@
+import hashlib
+
+from graph_engine import IncrementalGraph
+
+POD_TEMPLATE_HASH = 'pod-template-hash'
+GROUP_BY_MODES = ('labels', 'owner')
+
+
+def controller_owner(pod):
+    """파드의 controller ownerReference 를 따라 올라간 소유자 (kind, name). 없으면 None.
+
+    ReplicaSet 은 pod-template-hash 라벨로 이름을 잘라 Deployment 로 올라갑니다 (ReplicaSet 객체를 조회하지 않음).
+    """
+    metadata = pod['metadata']
+    for owner in metadata.get('ownerReferences') or []:
+        if not owner.get('controller'):
+            continue
+        kind, name = owner.get('kind'), owner.get('name')
+        template_hash = (metadata.get('labels') or {}).get(POD_TEMPLATE_HASH)
+        if kind == 'ReplicaSet' and template_hash and name.endswith(f"-{template_hash}"):
+            return 'Deployment', name[:-len(template_hash) - 1]
+        return kind, name
+    return None
+
+
+def class_key(pod, group_by='labels'):
+    """파드가 속하는 그룹 키 (namespace, owner, labels).
+
+    labels: 네임스페이스와 라벨 집합이 같은 파드끼리 묶습니다.
+    owner: 같은 소유자(Deployment, StatefulSet 등)의 파드끼리 묶습니다. 롤아웃 중에도 한 그룹이 되도록
+    pod-template-hash 라벨은 무시하며, 나머지 라벨이 다른 파드는 따로 묶어 셀렉터 결과가 그룹 안에서 같도록 합니다.
+    """
+    metadata = pod['metadata']
+    labels = metadata.get('labels') or {}
+    owner = None
+    if group_by == 'owner':
+        owner = controller_owner(pod) or ('Pod', metadata['name'])
+        labels = {key: value for key, value in labels.items() if key != POD_TEMPLATE_HASH}
+    return metadata['namespace'], owner, tuple(sorted(labels.items()))
+
+
+def class_name(key):
+    """그룹 키에서 항상 같은 이름을 만듭니다 (노드 id 의 이름 부분)."""
+    _, owner, labels = key
+    digest = hashlib.sha1(repr((owner, labels)).encode()).hexdigest()[:8]
+    return f"{_class_base(key)}-{digest}"
+
+
+def _class_base(key):
+    _, owner, labels = key
+    if owner:
+        return owner[1]
+    labels = dict(labels)
+    return labels.get('app') or labels.get('app.kubernetes.io/name') or 'pods'
+
+
+class PodGroupGraph(IncrementalGraph):
+    """같은 그룹(class_key)의 파드를 레플리카 수를 가진 노드 하나로 묶는 그래프 엔진.
+
+    셀렉터 평가와 엣지 생성은 파드마다가 아니라 그룹마다 한 번 일어나며 (그룹의 라벨로 평가),
+    파드 추가/삭제는 그룹 구성원 수만 바꿉니다.
+    """
+
+    def __init__(self, resource_type='podgroup', group_by='labels'):
+        if group_by not in GROUP_BY_MODES:
+            raise ValueError(f"group_by must be one of {GROUP_BY_MODES}")
+        self.group_by = group_by
+        super().__init__(resource_type)
+
+    def _reset(self):
+        super()._reset()
+        self._pod_class = {}  # pod key -> class key
+        self._members = {}  # class key -> pod key 집합
+        self._class_ids = {}  # node id -> class key
+
+    def load(self, policies, resources):
+        with self._lock:
+            self._reset()
+            for pod in resources.get('items', []):
+                self.upsert_pod(pod)
+            for policy in policies.get('items', []):
+                self.upsert_policy(policy)
+
+    def apply(self, kind, event_type, obj):
+        if kind == self.resource_kind:
+            if event_type == 'DELETED':
+                return self.delete_pod(obj)
+            return self.upsert_pod(obj)
+        return super().apply(kind, event_type, obj)
+
+    def upsert_pod(self, pod):
+        metadata = pod['metadata']
+        pod_key = f"{metadata['namespace']}/{metadata['name']}"
+        key = class_key(pod, self.group_by)
+        with self._lock:
+            old = self._pod_class.get(pod_key)
+            if old == key:
+                return False
+            if old is not None:
+                self._leave(pod_key, old)
+            self._pod_class[pod_key] = key
+            members = self._members.setdefault(key, set())
+            members.add(pod_key)
+            if len(members) == 1:
+                namespace = key[0]
+                name = class_name(key)
+                self._class_ids[f"{namespace}/{name}"] = key
+                self.upsert_resource({'metadata': {'namespace': namespace, 'name': name, 'labels': dict(key[2])}})
+            return True
+
+    def delete_pod(self, pod):
+        metadata = pod['metadata']
+        pod_key = f"{metadata['namespace']}/{metadata['name']}"
+        with self._lock:
+            key = self._pod_class.pop(pod_key, None)
+            if key is None:
+                return False
+            self._leave(pod_key, key)
+            return True
+
+    def _leave(self, pod_key, key):
+        members = self._members[key]
+        members.discard(pod_key)
+        if not members:
+            del self._members[key]
+            namespace = key[0]
+            name = class_name(key)
+            del self._class_ids[f"{namespace}/{name}"]
+            self.delete_resource({'metadata': {'namespace': namespace, 'name': name}})
+
+    def members(self, group_id):
+        """그룹 노드 id 에 속한 파드 키 목록. 없는 그룹이면 None."""
+        with self._lock:
+            key = self._class_ids.get(group_id)
+            if key is None:
+                return None
+            return sorted(self._members[key])
+
+    def graph(self):
+        """그룹 노드에는 구성원 수(count), 라벨(labels), 소유자(owner)를 붙이고 라벨에 수를 표시합니다."""
+        with self._lock:
+            graph = super().graph()
+            for node in graph['nodes']:
+                data = node['data']
+                key = self._class_ids.get(data['id']) if data['group'] == self.resource_type else None
+                if key is None:
+                    continue
+                count = len(self._members[key])
+                data['label'] = f"{_class_base(key)}.{key[0]} ({count})"
+                data['count'] = count
+                data['labels'] = dict(key[2])
+                if key[1]:
+                    data['owner'] = f"{key[1][0]}/{key[1][1]}"
+            return graph
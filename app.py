@@ -1,85 +1,152 @@
-from flask import Flask, render_template, jsonify, request
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, g, render_template, jsonify, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import subprocess
 import json
-from threading import Thread, Lock
+import os
+from threading import Thread, Event, Lock, local
 import time
 import hashlib
+from urllib.parse import quote
+from label_index import LabelIndex, matches_selector
+from informer import API_PATHS, Informer, KubectlWatchSource, ObjectStore, object_key
+from graph_engine import RESOURCE_KINDS, IncrementalGraph, format_edge, format_node
+from graph_versions import VersionedGraph, with_edge_ids
+from layout import GraphLayout, with_positions
+from aggregation import PodGroupGraph
+from reachability import ReachabilityCache, ReachabilityIndex
+from fetcher import KubectlFetcher, SubprocessRunner
+from snapshot_source import SnapshotSource
+from graph_cache import CacheEntry, GraphBuildError, GraphCache
+from graph_encoding import EncodedGraph, encode_chunks, graph_etag, iter_graph_json, negotiate_encoding
+from graph_filter import SelectorParseError, filter_by_labels, filter_patch, merge_subgraphs, paginate, parse_label_selector
+from subscriptions import VIEW_IDLE_SECONDS, ViewSubscriptions
+from simulation import SimulationError, parse_request as parse_simulation
+from history import CHECKPOINT_EVERY, RETENTION_SECONDS, HistoryLog, parse_timestamp
+from clusters import FETCH_WORKERS, MAX_CONTEXTS, POLL_SECONDS, ContextPool, FetchScheduler, UnknownContext
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry, format_stats, profile_call
+
+class PacketJson:
+    """Socket.IO 패킷 인코딩에 쓰는 json 모듈.
+
+    스레드마다 마지막으로 인코딩한 패킷 JSON 의 바이트 수를 기억해, 전송 크기 지표가 payload 를 다시 직렬화하지 않게 합니다.
+    Socket.IO 는 방의 모든 클라이언트에게 한 번 인코딩한 패킷을 보냅니다.
+    """
+
+    def __init__(self):
+        self._local = local()
+
+    def dumps(self, obj, **kwargs):
+        text = json.dumps(obj, **kwargs)
+        self._local.size = len(text) if text.isascii() else len(text.encode())
+        return text
+
+    def loads(self, text, **kwargs):
+        return json.loads(text, **kwargs)
+
+    def take_size(self):
+        """이 스레드에서 마지막으로 인코딩한 패킷 JSON 의 바이트 수를 반환하고 지웁니다."""
+        size = getattr(self._local, 'size', 0)
+        self._local.size = 0
+        return size
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your_secret_key'
-socketio = SocketIO(app, async_mode='threading')  # 'threading'으로 설정
+packet_json = PacketJson()
+socketio = SocketIO(app, async_mode='threading', json=packet_json)  # 'threading'으로 설정
 
-# 데이터 캐싱을 위한 변수
-cached_graph_data = {
-    'deployment': None,
-    'pod': None
-}
-cache_lock = Lock()
+# /metrics 로 내보내는 지표 (Prometheus 텍스트 형식)
+metrics = Registry('netpol_visualizer_')
+fetch_duration = metrics.histogram('fetch_duration_seconds', "Time to list one resource kind", ['kind'])
+objects_fetched = metrics.counter('objects_fetched_total', "Objects returned by list calls", ['kind'])
+error_count = metrics.counter('errors_total', "Errors by where they happened (fetch, watch, monitor)", ['source'])
+graph_build_duration = metrics.histogram('graph_build_duration_seconds',
+                                         "Time per graph build stage (graph, diff, layout)", ['resource_type', 'stage'])
+graph_nodes = metrics.gauge('graph_nodes', "Nodes in the latest graph version", ['context', 'resource_type'])
+graph_edges = metrics.gauge('graph_edges', "Edges in the latest graph version", ['context', 'resource_type'])
+graph_cache_lookups = metrics.counter('graph_cache_lookups_total', "Graph cache lookups by result (hit, stale, miss)",
+                                      ['resource_type', 'result'])
+graph_changes = metrics.counter('graph_change_checks_total', "Change detection results (changed, unchanged)",
+                                ['resource_type', 'result'])
+emit_duration = metrics.histogram('socketio_emit_duration_seconds', "Time to emit one Socket.IO update", ['event'])
+emitted_bytes = metrics.counter('socketio_emitted_bytes_total', "JSON bytes of emitted Socket.IO packets", ['event'])
+object_changes = metrics.counter('object_changes_total', "Graph-relevant object changes from list/watch", ['kind', 'event'])
+ignored_updates = metrics.gauge('object_updates_ignored', "Updates since start that changed no graph field", ['kind'])
+connected_clients = metrics.gauge('socketio_connected_clients', "Connected Socket.IO clients")
+view_subscribers = metrics.gauge('view_subscribers', "Socket.IO clients subscribed to each view", ['context', 'resource_type'])
+views_evicted = metrics.counter('views_evicted_total', "Idle views whose engine and caches were dropped", ['context', 'resource_type'])
+contexts_loaded = metrics.gauge('contexts_loaded', "Kube contexts whose stores and graphs are in memory")
+context_objects = metrics.gauge('context_objects', "Objects held in each loaded context's stores", ['context'])
+contexts_evicted = metrics.counter('contexts_evicted_total', "Contexts dropped by the idle/LRU memory limits", ['context'])
+context_polls = metrics.counter('context_polls_total', "Scheduled list polls per context by result (ok, error)",
+                                ['context', 'result'])
+history_bytes = metrics.gauge('history_bytes', "Bytes of checkpoints and change logs on disk", ['context'])
+request_duration = metrics.histogram('http_request_duration_seconds', "HTTP request handling time", ['endpoint', 'status'])
 
-def get_network_policies():
-    try:
-        result = subprocess.run(
-            ["kubectl", "get", "networkpolicies", "--all-namespaces", "-o", "json"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        policies = json.loads(result.stdout)
-        return policies
-    except subprocess.CalledProcessError as e:
-        print(f"Error fetching network policies: {e.stderr}")
+# PROFILING_ENABLED=1 이면 /debug/profile 로 빌드 한 주기의 cProfile 결과를 받을 수 있음
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED') == '1'
+
+# 뷰별 그래프 캐시: 동시 요청은 하나의 빌드를 함께 기다림.
+# STALE_WHILE_REVALIDATE=1 이면 변경 중에도 마지막 그래프를 바로 응답하고 백그라운드에서 다시 만듦
+STALE_WHILE_REVALIDATE = os.environ.get('STALE_WHILE_REVALIDATE') == '1'
+
+# 구독자와 요청이 이 시간 동안 없던 뷰(와, 모든 뷰가 그런 컨텍스트)는 메모리에서 내려놓음
+VIEW_IDLE = float(os.environ.get('VIEW_IDLE_SECONDS', VIEW_IDLE_SECONDS))
+
+# kubectl 목록 조회 계층 (여러 kind 를 병렬로 가져오고 필요한 필드만 파싱)
+# SNAPSHOT_PATH 를 지정하면 kubectl 대신 저장된 매니페스트/덤프에서 읽음 (클러스터 접근 없이 분석)
+SNAPSHOT_PATH = os.environ.get('SNAPSHOT_PATH')
+# KUBECTL 로 kubectl 대신 실행할 명령을 지정할 수 있음 (래퍼 스크립트, 테스트용 가짜 kubectl)
+kubectl_runner = SubprocessRunner(os.environ.get('KUBECTL', 'kubectl'))
+
+# CLUSTER_CONTEXTS=ctx-a,ctx-b 로 여러 kube 컨텍스트를 한 서버에서 다룸. 첫 번째가 기본이고 요청마다 context= 로 고름.
+# 지정하지 않으면 kubectl 의 현재 컨텍스트 하나만 다루고 watch 로 변경을 받음
+CLUSTER_CONTEXTS = [] if SNAPSHOT_PATH else [name for name in os.environ.get('CLUSTER_CONTEXTS', '').split(',') if name]
+
+# HISTORY_DIR 를 지정하면 그래프에 영향을 준 객체 변경을 컨텍스트별 하위 디렉터리에 쌓아 두고 /history 로 과거 시점을 조회함
+# HISTORY_CHECKPOINT_EVERY: 전체 체크포인트 사이의 변경 수, HISTORY_RETENTION_SECONDS: 보존 기간,
+# HISTORY_MAX_BYTES: 컨텍스트별 디스크 사용량 한도 (0 이면 제한 없음)
+HISTORY_DIR = os.environ.get('HISTORY_DIR')
+
+def open_history(name):
+    if not HISTORY_DIR:
         return None
+    return HistoryLog(os.path.join(HISTORY_DIR, quote(name, safe='') if name else '_current'),
+                      checkpoint_every=int(os.environ.get('HISTORY_CHECKPOINT_EVERY', CHECKPOINT_EVERY)),
+                      retention_seconds=float(os.environ.get('HISTORY_RETENTION_SECONDS', RETENTION_SECONDS)),
+                      max_bytes=int(os.environ.get('HISTORY_MAX_BYTES', 0)) or None)
+
+def record_fetch(kind, seconds, count):
+    fetch_duration.observe(seconds, kind=kind)
+    objects_fetched.inc(count, kind=kind)
+
+def record_poll(name, error):
+    context_polls.inc(context=name or '', result='error' if error is not None else 'ok')
+    if error is not None:
+        error_count.inc(source='poll')
+
+# 여러 컨텍스트의 목록 조회는 FETCH_WORKERS 개의 작업 스레드를 함께 씀.
+# 메모리에 있는 컨텍스트마다 POLL_SECONDS 간격으로 다시 조회하고, 실패하면 간격을 늘림
+fetch_scheduler = FetchScheduler(workers=int(os.environ.get('FETCH_WORKERS', FETCH_WORKERS)),
+                                 interval=float(os.environ.get('POLL_SECONDS', POLL_SECONDS)),
+                                 on_result=record_poll)
+
+def create_fetcher(name):
+    if SNAPSHOT_PATH:
+        return SnapshotSource(SNAPSHOT_PATH)
+    return KubectlFetcher(kubectl_runner, ['--context', name] if name else [], on_timing=record_fetch,
+                          executor=fetch_scheduler.executor if CLUSTER_CONTEXTS else None)
+
+def fetch_list(kind):
+    return clusters.get().fetch_list(kind)
+
+def get_network_policies():
+    return fetch_list('networkpolicies')
 
 def get_pods():
-    try:
-        result = subprocess.run(
-            ["kubectl", "get", "pods", "--all-namespaces", "-o", "json"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        pods = json.loads(result.stdout)
-        return pods
-    except subprocess.CalledProcessError as e:
-        print(f"Error fetching pods: {e.stderr}")
-        return None
+    return fetch_list('pods')
 
 def get_deployments():
-    try:
-        result = subprocess.run(
-            ["kubectl", "get", "deployments", "--all-namespaces", "-o", "json"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        deployments = json.loads(result.stdout)
-        return deployments
-    except subprocess.CalledProcessError as e:
-        print(f"Error fetching deployments: {e.stderr}")
-        return None
-
-def get_namespaces():
-    try:
-        result = subprocess.run(
-            ["kubectl", "get", "namespaces", "-o", "json"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        namespaces = json.loads(result.stdout)
-        return [item['metadata']['name'] for item in namespaces['items']]
-    except subprocess.CalledProcessError as e:
-        print(f"Error fetching namespaces: {e.stderr}")
-        return []
-
-def matches_selector(labels, selector):
-    if not selector:
-        return False
-    for key, value in selector.get('matchLabels', {}).items():
-        if labels.get(key) != value:
-            return False
-    return True
+    return fetch_list('deployments')
 
 def map_policies_to_resources(policies, resources, resource_type='pod'):
     policy_map = {}
@@ -102,6 +169,7 @@ def map_policies_to_resources(policies, resources, resource_type='pod'):
         }
 
     # Resource 초기화 (Pod 또는 Deployment)
+    label_index = LabelIndex()
     for resource in resources['items']:
         resource_name = resource['metadata']['name']
         resource_namespace = resource['metadata']['namespace']
@@ -115,6 +183,7 @@ def map_policies_to_resources(policies, resources, resource_type='pod'):
             'status': resource.get('status', {}).get('phase', 'Unknown') if resource_type == 'pod' else 'Unknown',
             'policies': []  # 초기화
         }
+        label_index.add(resource_full_name, resource_namespace, resource_labels)
 
     # 정책을 Resource에 매핑하고 엣지 생성
     for policy_key, policy in policy_map.items():
@@ -143,20 +212,19 @@ def map_policies_to_resources(policies, resources, resource_type='pod'):
             # From 필드 처리
             for from_field in ingress_rule.get('from', []):
                 if 'namespaceSelector' in from_field or 'podSelector' in from_field:
-                    # 대상 리소스의 네임스페이스와 파드 셀렉터에 따라 타겟 리소스를 찾아 엣지 생성
-                    for resource_key, resource in resource_map.items():
-                        resource_namespace, resource_name = resource_key.split('/')
-                        if resource_namespace != policy['namespace']:
-                            continue
-                        if matches_selector(resource['labels'], from_field.get('podSelector', {})) and matches_selector({'name': resource_namespace}, from_field.get('namespaceSelector', {})):
-                            ports = ingress_rule.get('ports', [])
-                            edges.append({
-                                'source': policy_key,
-                                'target': resource_key,
-                                'type': 'ingress',
-                                'ports': ports
-                            })
-                            resource['policies'].append(policy_key)
+                    # 정책과 같은 네임스페이스만 대상이므로 네임스페이스 셀렉터는 한 번만 평가
+                    if not matches_selector({'name': policy['namespace']}, from_field.get('namespaceSelector', {})):
+                        continue
+                    # 라벨 색인으로 파드 셀렉터와 일치하는 리소스만 찾아 엣지 생성
+                    for resource_key in label_index.select(policy['namespace'], from_field.get('podSelector', {})):
+                        ports = ingress_rule.get('ports', [])
+                        edges.append({
+                            'source': policy_key,
+                            'target': resource_key,
+                            'type': 'ingress',
+                            'ports': ports
+                        })
+                        resource_map[resource_key]['policies'].append(policy_key)
         
         # Egress 규칙 처리
         for egress_rule in policy['egress']:
@@ -183,287 +251,841 @@ def map_policies_to_resources(policies, resources, resource_type='pod'):
             # To 필드 처리
             for to_field in egress_rule.get('to', []):
                 if 'namespaceSelector' in to_field or 'podSelector' in to_field:
-                    # 대상 리소스의 네임스페이스와 파드 셀렉터에 따라 타겟 리소스를 찾아 엣지 생성
-                    for resource_key, resource in resource_map.items():
-                        resource_namespace, resource_name = resource_key.split('/')
-                        if resource_namespace != policy['namespace']:
-                            continue
-                        if matches_selector(resource['labels'], to_field.get('podSelector', {})) and matches_selector({'name': resource_namespace}, to_field.get('namespaceSelector', {})):
-                            ports = egress_rule.get('ports', [])
-                            edges.append({
-                                'source': policy_key,
-                                'target': resource_key,
-                                'type': 'egress',
-                                'ports': ports
-                            })
-                            resource['policies'].append(policy_key)
+                    # 정책과 같은 네임스페이스만 대상이므로 네임스페이스 셀렉터는 한 번만 평가
+                    if not matches_selector({'name': policy['namespace']}, to_field.get('namespaceSelector', {})):
+                        continue
+                    # 라벨 색인으로 파드 셀렉터와 일치하는 리소스만 찾아 엣지 생성
+                    for resource_key in label_index.select(policy['namespace'], to_field.get('podSelector', {})):
+                        ports = egress_rule.get('ports', [])
+                        edges.append({
+                            'source': policy_key,
+                            'target': resource_key,
+                            'type': 'egress',
+                            'ports': ports
+                        })
+                        resource_map[resource_key]['policies'].append(policy_key)
     
     return policy_map, edges, resource_map
 
 
+def build_graph_data(policies, resources, resource_type):
+    """정책과 리소스 목록으로 Cytoscape 형식의 그래프 데이터(nodes, edges)를 만듭니다."""
+    policy_map, edges, resource_map = map_policies_to_resources(policies, resources, resource_type)
+    nodes = []
+
+    for policy_key, policy in policy_map.items():
+        nodes.append(format_node(policy_key, policy['label'], 'policy'))
+
+    for resource_key, resource in resource_map.items():
+        nodes.append(format_node(resource_key, resource['label'], resource['group']))
+
+    # 중복 제거
+    unique_nodes = {node['data']['id']: node for node in nodes}.values()
+    return {
+        'nodes': list(unique_nodes),
+        'edges': [format_edge(edge) for edge in edges]
+    }
+
 def get_hash(data):
     """JSON 데이터를 정렬된 키 순서로 직렬화한 후 SHA-256 해시를 생성합니다."""
     if data is None:
         return None
     return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
 
+# podgroup 뷰는 파드를 그룹으로 묶음: POD_GROUP_BY=labels (네임스페이스+라벨 집합, 기본값) 또는 owner (소유자)
+def create_engine(resource_type):
+    if resource_type == 'podgroup':
+        return PodGroupGraph('podgroup', group_by=os.environ.get('POD_GROUP_BY', 'labels'))
+    return IncrementalGraph(resource_type)
+
+# 도달 가능성 판정에 쓰이는 kind (이 중 하나라도 바뀌면 인덱스를 다시 만듦)
+REACHABILITY_KINDS = ('networkpolicies', 'pods', 'namespaces')
+
+# 어느 컨텍스트에서든 그래프가 바뀌면 깨어나는 모니터 이벤트 (어느 컨텍스트인지는 ClusterContext.changes_pending)
+changes_pending = Event()
+
+class ClusterContext:
+    """kube 컨텍스트 하나의 객체 저장소, 뷰별 증분 엔진, 그래프 버전, 배치, 캐시와 구독 상태.
+
+    name 이 None 이면 kubectl 의 현재 컨텍스트입니다. fetcher 는 fetch/fetch_all 을 제공하는 목록 조회 계층
+    (KubectlFetcher 또는 SnapshotSource) 입니다. history 가 있으면 (HistoryLog) 그래프에 영향을 준 변경을 기록합니다.
+    """
+
+    def __init__(self, name, fetcher, history=None):
+        self.name = name
+        self.fetcher = fetcher
+        self.history = history
+        self.history_synced = set()  # 전체 목록과 기록을 맞춘 kind
+        # 클러스터 객체 스냅샷 저장소 (informer, /data, 상세 정보 엔드포인트가 공유, namespace/name 으로 조회)
+        self.object_stores = {kind: ObjectStore(kind) for kind in API_PATHS}
+        self.changes_pending = Event()
+        # 뷰별 증분 그래프 엔진 (객체 변경 이벤트를 바로 반영)
+        # 뷰를 처음 구독하거나 요청할 때 만들고 (None = 아직 없음), 오래 쓰이지 않으면 내려놓음 (evict_idle_views)
+        self.graph_engines = dict.fromkeys(RESOURCE_KINDS)
+        self.engines_lock = Lock()
+        # 뷰별 그래프 버전 관리 (클라이언트에는 버전과 변경분만 전송)
+        self.graph_versions = {resource_type: VersionedGraph(resource_type) for resource_type in RESOURCE_KINDS}
+        # 뷰별 서버 측 레이아웃 (그래프 버전마다 한 번, 바뀐 노드 주변만 다시 계산)
+        self.graph_layouts = {resource_type: GraphLayout() for resource_type in RESOURCE_KINDS}
+        self.publish_locks = {resource_type: Lock() for resource_type in RESOURCE_KINDS}
+        # Socket.IO 클라이언트별 구독 뷰. 구독자가 있는 뷰만 계산해 해당 방에 보냄
+        self.view_subscriptions = ViewSubscriptions(idle_seconds=VIEW_IDLE, context=name)
+        self.graph_cache = GraphCache(self.build_graph_entry, stale_while_revalidate=STALE_WHILE_REVALIDATE,
+                                      on_lookup=lambda resource_type, result: graph_cache_lookups.inc(
+                                          resource_type=resource_type, result=result))
+        self.reachability_cache = ReachabilityCache(self.build_reachability_index)
+        self.informers = []
+        self.stop_event = Event()
+        self.last_used = time.monotonic()
+
+    @property
+    def label(self):
+        """지표 라벨과 로그에 쓰는 컨텍스트 이름 (현재 컨텍스트면 '')."""
+        return self.name or ''
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def in_use(self):
+        return bool(self.view_subscriptions.active_views())
+
+    def idle(self):
+        return not self.in_use() and time.monotonic() - self.last_used >= VIEW_IDLE
+
+    def object_count(self):
+        return sum(len(store) for store in self.object_stores.values())
+
+    def close(self):
+        """컨텍스트를 내려놓을 때 informer 를 멈추고 남은 변경 기록을 디스크에 씁니다."""
+        self.stop_event.set()
+        if self.history is not None:
+            self.history.flush()
+
+    def fetch_list(self, kind):
+        try:
+            return self.fetcher.fetch(kind)
+        except (subprocess.CalledProcessError, OSError, ValueError) as e:
+            print(f"Error fetching {kind}: {getattr(e, 'stderr', None) or e}")
+            error_count.inc(source='fetch')
+            return None
+
+    def namespaces(self):
+        store = self.get_store('namespaces')
+        if store is None:
+            return []
+        return sorted(item['metadata']['name'] for item in store.list()['items'])
+
+    def on_object_change(self, kind, event_type, obj):
+        object_changes.inc(kind=kind, event=event_type)
+        if self.history is not None:
+            self.record_history(kind, event_type, obj)
+        if kind in REACHABILITY_KINDS:
+            self.reachability_cache.invalidate()
+        changed = False
+        # 엔진 적재(get_engine)와 겹치지 않도록 잠금 안에서 반영 (적재 직전의 변경이 두 번 반영돼도 결과는 같음)
+        with self.engines_lock:
+            for resource_type, engine in self.graph_engines.items():
+                if engine is not None and engine.apply(kind, event_type, obj):
+                    self.graph_cache.invalidate(resource_type)
+                    changed = True
+        if changed:
+            self.changes_pending.set()
+            changes_pending.set()
+
+    def record_history(self, kind, event_type, obj):
+        # 저장소가 처음 채워진 뒤의 첫 변경에서, 꺼져 있는 동안 지워진 객체를 기록에서 지움
+        if kind not in self.history_synced and self.object_stores[kind].synced:
+            self.history_synced.add(kind)
+            self.history.reconcile(kind, (object_key(item) for item in self.object_stores[kind].list()['items']))
+        self.history.record(kind, event_type, obj)
+
+    def ensure_stores(self, kinds):
+        """kinds 의 저장소 목록을 반환합니다.
+
+        informer 나 주기적 조회가 아직 채우지 않은 저장소는 kubectl 로 한꺼번에(병렬로) 채우며, 하나라도 실패하면 None.
+        """
+        missing = [kind for kind in kinds if not self.object_stores[kind].synced]
+        failed = False
+        for kind, result in (self.fetcher.fetch_all(missing) if missing else {}).items():
+            if isinstance(result, Exception):
+                print(f"Error fetching {kind}: {getattr(result, 'stderr', None) or result}")
+                error_count.inc(source='fetch')
+                failed = True
+                continue
+            for event_type, obj in self.object_stores[kind].replace(result['items'], None):
+                self.on_object_change(kind, event_type, obj)
+        if failed:
+            return None
+        return [self.object_stores[kind] for kind in kinds]
+
+    def get_store(self, kind):
+        stores = self.ensure_stores([kind])
+        return stores[0] if stores else None
+
+    def poll(self):
+        """채워진 저장소를 모두 다시 조회해 바뀐 객체만 반영합니다 (FetchScheduler 작업). 실패한 kind 가 있으면 예외를 던집니다."""
+        errors = []
+        for kind, store in self.object_stores.items():
+            if not store.synced:
+                continue  # 아직 쓰이지 않은 kind 는 요청이 올 때 채움
+            try:
+                result = self.fetcher.fetch(kind)
+            except (subprocess.CalledProcessError, OSError, ValueError) as e:
+                errors.append(f"{kind}: {getattr(e, 'stderr', None) or e}")
+                continue
+            for event_type, obj in store.replace(result['items'], None):
+                self.on_object_change(kind, event_type, obj)
+        if errors:
+            raise RuntimeError('; '.join(errors))
+
+    def start_informers(self, source):
+        """kind 마다 list + watch 스레드를 시작합니다 (kubectl 의 현재 컨텍스트 하나만 다룰 때)."""
+        for kind, store in self.object_stores.items():
+            informer = Informer(kind, source, store, on_change=self.on_object_change,
+                                on_error=lambda kind, error: error_count.inc(source='watch'))
+            self.informers.append(informer)
+            Thread(target=informer.run, args=(self.stop_event,), daemon=True).start()
+
+    def synced(self):
+        """모든 informer 의 최초 list 가 끝났는지 (informer 가 없으면 항상 True)."""
+        return all(informer.has_synced for informer in self.informers)
+
+    def get_engine(self, resource_type):
+        """뷰의 증분 엔진을 반환합니다. 아직 없으면 저장소를 채우고 현재 객체로 만듭니다. 저장소를 채우지 못하면 None."""
+        engine = self.graph_engines[resource_type]
+        if engine is not None:
+            return engine
+        stores = self.ensure_stores(['networkpolicies', RESOURCE_KINDS[resource_type]])
+        if stores is None:
+            return None
+        with self.engines_lock:
+            engine = self.graph_engines[resource_type]
+            if engine is None:
+                engine = create_engine(resource_type)
+                engine.load(*(store.list() for store in stores))
+                self.graph_engines[resource_type] = engine
+            return engine
+
+    def evict_idle_views(self):
+        """구독자와 요청이 한동안 없던 뷰의 엔진, 캐시, 버전 기록, 배치를 내려놓습니다. 다음에 쓰일 때 다시 만듭니다."""
+        for resource_type in self.view_subscriptions.take_idle_views():
+            with self.engines_lock:
+                self.graph_engines[resource_type] = None
+            with self.publish_locks[resource_type]:
+                self.graph_versions[resource_type].clear()
+                self.graph_layouts[resource_type] = GraphLayout()
+                self.graph_cache.evict(resource_type)
+            views_evicted.inc(context=self.label, resource_type=resource_type)
+            print(f"Evicted idle {resource_type} view{f' of {self.name}' if self.name else ''}")
+
+    def publish_graph(self, resource_type, graph_data):
+        """새 그래프를 버전에 반영하고 캐시를 갱신한 뒤 변경분(patch)을 반환합니다. 변경이 없으면 None."""
+        with self.publish_locks[resource_type]:
+            with graph_build_duration.time(resource_type=resource_type, stage='diff'):
+                patch = self.graph_versions[resource_type].update(graph_data)
+                snapshot = self.graph_versions[resource_type].snapshot()
+            graph_changes.inc(resource_type=resource_type, result='changed' if patch else 'unchanged')
+            graph_nodes.set(len(snapshot['nodes']), context=self.label, resource_type=resource_type)
+            graph_edges.set(len(snapshot['edges']), context=self.label, resource_type=resource_type)
+            # 새 버전의 좌표를 계산하고, 좌표가 바뀐 노드는 patch 에 함께 실어 보냄
+            with graph_build_duration.time(resource_type=resource_type, stage='layout'):
+                moved = self.graph_layouts[resource_type].update(snapshot)
+            if patch:
+                patch['positions'] = moved
+            kinds = ('networkpolicies', RESOURCE_KINDS[resource_type])
+            self.graph_cache.put(resource_type, CacheEntry(
+                with_positions(snapshot, self.graph_layouts[resource_type].positions()),
+                resource_versions={kind: self.object_stores[kind].resource_version for kind in kinds}
+            ))
+            return patch
+
+    def current_graph(self, resource_type, engine):
+        with graph_build_duration.time(resource_type=resource_type, stage='graph'):
+            return engine.graph()
+
+    def build_graph_entry(self, resource_type):
+        """캐시 빌드 스레드에서 실행: 저장소를 채우고 (필요하면 kubectl) 증분 엔진의 그래프를 버전에 반영합니다."""
+        if self.ensure_stores(['networkpolicies', RESOURCE_KINDS[resource_type]]) is None:
+            raise GraphBuildError(f"Failed to retrieve network policies or {resource_type}s.")
+        engine = self.get_engine(resource_type)
+        if engine is None:
+            raise GraphBuildError(f"Failed to retrieve network policies or {resource_type}s.")
+        self.publish_graph(resource_type, self.current_graph(resource_type, engine))
+        return self.graph_cache.peek(resource_type)
+
+    def rebuild_view(self, resource_type):
+        """저장소의 현재 객체로 뷰 하나를 처음부터 다시 만듭니다 (엔진 적재, 버전 비교, 배치, gzip 인코딩).
+
+        서비스 중인 엔진과 캐시는 건드리지 않습니다. 프로파일링용.
+        """
+        engine = create_engine(resource_type)
+        stores = self.ensure_stores(['networkpolicies', engine.resource_kind])
+        if stores is None:
+            raise GraphBuildError(f"Failed to retrieve network policies or {resource_type}s.")
+        engine.load(*(store.list() for store in stores))
+        versioned = VersionedGraph(resource_type)
+        versioned.update(engine.graph())
+        snapshot = versioned.snapshot()
+        layout = GraphLayout()
+        layout.update(snapshot)
+        encoded = EncodedGraph(with_positions(snapshot, layout.positions())).get('gzip')
+        return {'nodes': len(snapshot['nodes']), 'edges': len(snapshot['edges']), 'gzip_bytes': sum(len(chunk) for chunk in encoded)}
+
+    def build_reachability_index(self):
+        stores = self.ensure_stores(REACHABILITY_KINDS)
+        if stores is None:
+            return None
+        return ReachabilityIndex(*(store.list()['items'] for store in stores))
+
+    def publish_changes(self):
+        """구독자가 있는 뷰의 현재 그래프를 버전에 반영하고 변경분을 구독 방마다 보냅니다 (monitor_changes 의 한 주기).
+
+        구독자가 없는 뷰는 계산하지 않습니다. 캐시는 이미 무효화되어 있으므로 /data 요청이 오면 그때 만듭니다.
+        """
+        self.changes_pending.clear()
+        for resource_type in self.view_subscriptions.active_views():
+            engine = self.graph_engines[resource_type]
+            if engine is None:
+                continue  # 첫 구독 때 시작한 빌드가 엔진을 만듦
+            patch = self.publish_graph(resource_type, self.current_graph(resource_type, engine))
+            # 클라이언트에는 변경분만 전송 (네임스페이스를 고른 방에는 그 네임스페이스 부분만)
+            if patch:
+                event = f'update_{resource_type}'
+                for room, namespaces in self.view_subscriptions.rooms(resource_type).items():
+                    payload = filter_patch(patch, namespaces) if namespaces else patch
+                    packet_json.take_size()
+                    with emit_duration.time(event=event):
+                        socketio.emit(event, payload, to=room)
+                    # emit 이 방 전체에 보내려고 한 번 인코딩한 패킷 JSON 의 크기
+                    emitted_bytes.inc(packet_json.take_size(), event=event)
+                # 네임스페이스 필터 요청이 합치기만 하도록 부분 그래프를 미리 계산
+                self.graph_cache.peek(resource_type).namespace_subgraphs()
+
+def create_cluster(name):
+    return ClusterContext(name, create_fetcher(name), open_history(name))
+
+def on_context_load(name, cluster):
+    if CLUSTER_CONTEXTS:
+        # 처음 채우는 것은 요청이 하므로 다음 조회부터 예약
+        fetch_scheduler.add(name, cluster.poll, delay=fetch_scheduler.interval)
+    contexts_loaded.set(len(clusters.loaded()))
+
+def on_context_evict(name, cluster):
+    fetch_scheduler.remove(name)
+    contexts_evicted.inc(context=cluster.label)
+    contexts_loaded.set(len(clusters.loaded()))
+    print(f"Evicted idle context {name}")
+
+# 메모리에 두는 컨텍스트 (처음 쓰일 때 만들고, 구독자 없이 쓰이지 않거나 한도를 넘으면 오래 전에 쓰인 것부터 내려놓음)
+# MAX_CONTEXTS: 동시에 둘 컨텍스트 수, MAX_CONTEXT_OBJECTS: 모든 컨텍스트 저장소의 객체 수 합 (0 이면 제한 없음)
+# 현재 컨텍스트 하나만 다룰 때는 informer 가 그 저장소를 채우므로 내려놓지 않음
+clusters = ContextPool(create_cluster, CLUSTER_CONTEXTS or [None],
+                       max_contexts=int(os.environ.get('MAX_CONTEXTS', MAX_CONTEXTS)),
+                       max_objects=int(os.environ.get('MAX_CONTEXT_OBJECTS', 0)) or None,
+                       pinned=() if CLUSTER_CONTEXTS else [None],
+                       on_load=on_context_load, on_evict=on_context_evict)
+
+def request_cluster():
+    """요청의 context 파라미터(없으면 기본 컨텍스트)에 해당하는 클러스터. 설정에 없으면 UnknownContext (404)."""
+    cluster = clusters.get(request.args.get('context') or None)
+    cluster.touch()
+    return cluster
+
+@app.errorhandler(UnknownContext)
+def unknown_context(e):
+    return jsonify({"error": f"Unknown context: {e.args[0]}"}), 404
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        request_duration.observe(time.perf_counter() - started, endpoint=request.endpoint or 'unknown',
+                                 status=response.status_code)
+    return response
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/data')
-def data():
-    global cached_graph_data
-    resource_type = request.args.get('resource_type', 'deployment')  # 기본값을 'deployment'로 설정
+@app.route('/contexts')
+def contexts():
+    """설정된 kube 컨텍스트와 기본 컨텍스트, 지금 메모리에 있는 컨텍스트 (현재 컨텍스트 하나만 다루면 빈 목록)."""
+    return jsonify({
+        'contexts': CLUSTER_CONTEXTS,
+        'default': clusters.default,
+        'loaded': [name for name, _ in clusters.loaded() if name is not None],
+    })
 
-    with cache_lock:
-        if cached_graph_data.get(resource_type):
-            return jsonify(cached_graph_data[resource_type])
+@app.route('/metrics')
+def metrics_endpoint():
+    loaded = clusters.loaded()
+    for kind in API_PATHS:
+        ignored_updates.set(sum(cluster.object_stores[kind].ignored_updates for _, cluster in loaded), kind=kind)
+    for _, cluster in loaded:
+        context_objects.set(cluster.object_count(), context=cluster.label)
+        if cluster.history is not None:
+            history_bytes.set(cluster.history.disk_bytes(), context=cluster.label)
+    contexts_loaded.set(len(loaded))
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
 
-    policies = get_network_policies()
-    if not policies:
-        return jsonify({"error": "Failed to retrieve network policies."}), 500
+@app.route('/debug/profile')
+def profile_build():
+    """뷰 하나를 처음부터 다시 만드는 한 주기를 cProfile 로 측정해 결과 표를 돌려줍니다 (PROFILING_ENABLED=1 일 때만)."""
+    if not PROFILING_ENABLED:
+        return jsonify({"error": "Profiling is disabled. Set PROFILING_ENABLED=1."}), 404
+    resource_type = request.args.get('resource_type', 'deployment')
+    if resource_type not in RESOURCE_KINDS:
+        return jsonify({"error": "Invalid resource type."}), 400
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in ('cumulative', 'tottime', 'calls'):
+        return jsonify({"error": "sort must be one of cumulative, tottime, calls."}), 400
+    try:
+        summary, stats = profile_call(request_cluster().rebuild_view, resource_type)
+    except GraphBuildError as e:
+        return jsonify({"error": str(e)}), 500
+    header = f"{resource_type}: {summary['nodes']} nodes, {summary['edges']} edges, {summary['gzip_bytes']} gzip bytes\n\n"
+    return Response(header + format_stats(stats, sort, request.args.get('limit', 40, type=int)), mimetype='text/plain')
 
-    if resource_type == 'deployment':
-        resources = get_deployments()
-    else:
-        resources = get_pods()
+@app.route('/data')
+def data():
+    resource_type = request.args.get('resource_type', 'deployment')  # 기본값을 'deployment'로 설정
+    if resource_type not in RESOURCE_KINDS:
+        return jsonify({"error": "Invalid resource type."}), 400
+    cluster = request_cluster()
+    cluster.view_subscriptions.touch(resource_type)
 
-    if not resources:
-        return jsonify({"error": f"Failed to retrieve {resource_type}s."}), 500
+    # 뒤처진 클라이언트: since 이후의 patch 가 남아 있으면 patch 만, 아니면 전체 스냅샷
+    since = request.args.get('since', type=int)
+    if since is not None:
+        patches = cluster.graph_versions[resource_type].patches_since(since)
+        if patches is not None:
+            return jsonify({'resource_type': resource_type, 'version': cluster.graph_versions[resource_type].version, 'patches': patches})
 
-    policy_map, edges, resource_map = map_policies_to_resources(policies, resources, resource_type)
+    try:
+        entry = cluster.graph_cache.get(resource_type)
+    except GraphBuildError as e:
+        return jsonify({"error": str(e)}), 500
 
-    # 그래프 데이터 준비
-    nodes = []
-    formatted_edges = []
+    if not any(request.args.get(param) for param in ('namespaces', 'labelSelector', 'limit')):
+        return cached_graph_response(cluster, resource_type, entry)
+    return filtered_graph_response(cluster, resource_type, entry)
 
-    # 노드 추가
-    for resource_key, resource in resource_map.items():
-        nodes.append({
-            'data': {'id': resource_key, 'label': resource['label'], 'group': resource['group']}
-        })
-
-    # 엣지 추가
-    for edge in edges:
-        # 포트 정보를 문자열로 변환
-        ports = edge['ports']
-        if ports:
-            ports_str = ', '.join([f"{p.get('protocol', 'TCP')}/{p.get('port', 'N/A')}" for p in ports])
-        else:
-            ports_str = 'All Ports'
-
-        formatted_edges.append({
-            'data': {
-                'source': edge['source'],
-                'target': edge['target'],
-                'type': edge['type'],
-                'label': f"{edge['type'].capitalize()} ({ports_str})"
-            }
-        })
+def cached_graph_response(cluster, resource_type, entry):
+    """전체 그래프 응답. 버전별로 한 번 인코딩/압축해 둔 bytes 를 보내고, ETag 가 같으면 304 를 돌려줍니다."""
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    # 컨텍스트마다 버전이 따로 올라가므로 ETag 에 컨텍스트를 넣음
+    etag = graph_etag(f"{cluster.name}/{resource_type}" if cluster.name else resource_type, entry.version, encoding)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        chunks = entry.encoded(encoding)
+        response = Response(chunks, mimetype='application/json')
+        response.content_length = sum(len(chunk) for chunk in chunks)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    # 브라우저가 매번 ETag 로 재검증하도록 함
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
-    # 중복 제거
-    unique_nodes = {node['data']['id']: node for node in nodes}.values()
-    unique_edges = formatted_edges  # 필요 시 중복 제거 로직 추가
+def streamed_json_response(payload):
+    """요청마다 달라지는 그래프 응답을 캐시하지 않고 조금씩 직렬화/압축하며 보냅니다."""
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    response = Response(encode_chunks(iter_graph_json(payload), encoding), mimetype='application/json')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
-    graph_data = {
-        'nodes': list(unique_nodes),
-        'edges': unique_edges
-    }
+def filtered_graph_response(cluster, resource_type, entry):
+    """namespaces, labelSelector, limit/cursor 로 필요한 부분 그래프만 응답합니다."""
+    graph = entry.graph
+    namespaces = [namespace for namespace in request.args.get('namespaces', '').split(',') if namespace]
+    if namespaces:
+        # 미리 나눠 둔 네임스페이스별 부분 그래프를 합치기만 함
+        graph = merge_subgraphs(entry.namespace_subgraphs(), namespaces)
 
-    # 캐싱
-    with cache_lock:
-        cached_graph_data[resource_type] = graph_data
+    label_selector = request.args.get('labelSelector')
+    if label_selector:
+        try:
+            selector = parse_label_selector(label_selector)
+        except SelectorParseError as e:
+            return jsonify({"error": str(e)}), 400
+        engine = cluster.get_engine(resource_type)
+        if engine is None:
+            return jsonify({"error": f"Failed to retrieve {resource_type}s."}), 500
+        graph = filter_by_labels(graph, selector, engine.resource_labels)
 
-    return jsonify(graph_data)
+    response = {'resource_type': resource_type, 'version': entry.version, 'nodes': graph['nodes'], 'edges': graph['edges']}
+    limit = request.args.get('limit', type=int)
+    if limit:
+        offset = 0
+        cursor = request.args.get('cursor')
+        if cursor:
+            cursor_version, _, cursor_offset = cursor.partition(':')
+            if cursor_version != str(entry.version) or not cursor_offset.isdigit():
+                return jsonify({"error": "Graph changed while paging; restart from the first page.", "version": entry.version}), 409
+            offset = int(cursor_offset)
+        page, next_offset = paginate(graph, offset, limit)
+        response.update(page)
+        response['total_nodes'] = len(graph['nodes'])
+        response['next_cursor'] = f"{entry.version}:{next_offset}" if next_offset is not None else None
+    return streamed_json_response(response)
 
 @app.route('/namespaces')
 def namespaces():
-    namespaces = get_namespaces()
+    namespaces = request_cluster().namespaces()
     return jsonify({"namespaces": namespaces})
 
+def policy_response(policy):
+    return jsonify({
+        'name': policy['metadata']['name'],
+        'namespace': policy['metadata']['namespace'],
+        'ingress': policy['spec'].get('ingress', []),
+        'egress': policy['spec'].get('egress', [])
+    })
+
 # 새로운 엔드포인트: Policy 상세 정보
+@app.route('/policy/<namespace>/<policy_name>')
+def namespaced_policy_details(namespace, policy_name):
+    store = request_cluster().get_store('networkpolicies')
+    if store is None:
+        return jsonify({"error": "Failed to retrieve network policies."}), 500
+
+    policy = store.get(f"{namespace}/{policy_name}")
+    if policy is None:
+        return jsonify({"error": "Policy not found."}), 404
+    return policy_response(policy)
+
 @app.route('/policy/<policy_name>')
 def policy_details(policy_name):
-    policies = get_network_policies()
-    if not policies:
+    namespace = request.args.get('namespace')
+    if namespace:
+        return namespaced_policy_details(namespace, policy_name)
+
+    store = request_cluster().get_store('networkpolicies')
+    if store is None:
         return jsonify({"error": "Failed to retrieve network policies."}), 500
 
-    for policy in policies['items']:
-        if policy['metadata']['name'] == policy_name:
-            return jsonify({
-                'name': policy['metadata']['name'],
-                'namespace': policy['metadata']['namespace'],
-                'ingress': policy['spec'].get('ingress', []),
-                'egress': policy['spec'].get('egress', [])
-            })
-    return jsonify({"error": "Policy not found."}), 404
+    # 네임스페이스 없이 이름만 주어지면 같은 이름의 정책이 여러 네임스페이스에 있을 수 있음
+    matches = [policy for policy in store.list()['items'] if policy['metadata']['name'] == policy_name]
+    if not matches:
+        return jsonify({"error": "Policy not found."}), 404
+    if len(matches) > 1:
+        return jsonify({
+            "error": "Policy name is ambiguous; specify a namespace.",
+            "namespaces": sorted(policy['metadata']['namespace'] for policy in matches)
+        }), 409
+    return policy_response(matches[0])
 
 # 새로운 엔드포인트: Resource 상세 정보 (Pod 또는 Deployment)
 @app.route('/resource/<resource_type>/<path:resource_name>')
 def resource_details(resource_type, resource_name):
-    if resource_type == 'deployment':
-        resources = get_deployments()
-    elif resource_type == 'pod':
-        resources = get_pods()
-    else:
+    if resource_type not in RESOURCE_KINDS:
         return jsonify({"error": "Invalid resource type."}), 400
 
-    if not resources:
+    store = request_cluster().get_store(RESOURCE_KINDS[resource_type])
+    if store is None:
         return jsonify({"error": f"Failed to retrieve {resource_type}s."}), 500
 
-    for resource in resources['items']:
-        full_resource_name = f"{resource['metadata']['namespace']}/{resource['metadata']['name']}"
-        if full_resource_name == resource_name:
-            if resource_type == 'deployment':
-                return jsonify({
-                    'name': resource['metadata']['name'],
-                    'namespace': resource['metadata']['namespace'],
-                    'labels': resource['metadata'].get('labels', {}),
-                    'status': resource['status'].get('availableReplicas', 'Unknown')
-                })
-            elif resource_type == 'pod':
-                return jsonify({
-                    'name': resource['metadata']['name'],
-                    'namespace': resource['metadata']['namespace'],
-                    'labels': resource['metadata'].get('labels', {}),
-                    'status': resource['status'].get('phase', 'Unknown')
-                })
-    return jsonify({"error": f"{resource_type.capitalize()} not found."}), 404
+    resource = store.get(resource_name)
+    if resource is None:
+        return jsonify({"error": f"{resource_type.capitalize()} not found."}), 404
 
-def monitor_changes():
-    global cached_graph_data
-    previous_policies = get_network_policies()
-    previous_pods = get_pods()
-    previous_deployments = get_deployments()
+    status = resource.get('status', {})
+    return jsonify({
+        'name': resource['metadata']['name'],
+        'namespace': resource['metadata']['namespace'],
+        'labels': resource['metadata'].get('labels', {}),
+        'status': status.get('availableReplicas', 'Unknown') if resource_type == 'deployment' else status.get('phase', 'Unknown')
+    })
 
-    previous_policies_hash = get_hash(previous_policies) if previous_policies else None
-    previous_pods_hash = get_hash(previous_pods) if previous_pods else None
-    previous_deployments_hash = get_hash(previous_deployments) if previous_deployments else None
+# 그룹 노드 펼치기: 그룹에 속한 파드 노드와, 그룹의 엣지를 파드마다 복제한 엣지를 반환
+@app.route('/group/<namespace>/<group_name>')
+def group_members(namespace, group_name):
+    group_id = f"{namespace}/{group_name}"
+    cluster = request_cluster()
+    cluster.view_subscriptions.touch('podgroup')
+    try:
+        entry = cluster.graph_cache.get('podgroup')
+    except GraphBuildError as e:
+        return jsonify({"error": str(e)}), 500
+    engine = cluster.get_engine('podgroup')
+    if engine is None:
+        return jsonify({"error": "Failed to retrieve pods."}), 500
+    members = engine.members(group_id)
+    if members is None:
+        return jsonify({"error": "Group not found."}), 404
 
-    while True:
-        try:
-            time.sleep(60)  # 1분마다 체크
-            current_policies = get_network_policies()
-            current_pods = get_pods()
-            current_deployments = get_deployments()
-
-            current_policies_hash = get_hash(current_policies) if current_policies else None
-            current_pods_hash = get_hash(current_pods) if current_pods else None
-            current_deployments_hash = get_hash(current_deployments) if current_deployments else None
-
-            policies_changed = current_policies_hash != previous_policies_hash
-            pods_changed = current_pods_hash != previous_pods_hash
-            deployments_changed = current_deployments_hash != previous_deployments_hash
-
-            if policies_changed or pods_changed or deployments_changed:
-                print(f"Updating deployment and pod data at {time.strftime('%Y-%m-%d %H:%M:%S')}")
-
-                # Deployment 데이터 업데이트
-                policy_map_deployment, edges_deployment, deployment_map = map_policies_to_resources(current_policies, current_deployments, 'deployment')
-                nodes_deployment = []
-                formatted_edges_deployment = []
-
-                for policy_key, policy in policy_map_deployment.items():
-                    nodes_deployment.append({
-                        'data': {'id': policy_key, 'label': policy['label'], 'group': 'policy'}
-                    })
-
-                for deployment_key, deployment in deployment_map.items():
-                    nodes_deployment.append({
-                        'data': {'id': deployment_key, 'label': deployment['label'], 'group': 'deployment'}
-                    })
-
-                for edge in edges_deployment:
-                    ports = edge['ports']
-                    if ports:
-                        ports_str = ', '.join([f"{p.get('protocol', 'TCP')}/{p.get('port', 'N/A')}" for p in ports])
-                    else:
-                        ports_str = 'All Ports'
-
-                    formatted_edges_deployment.append({
-                        'data': {
-                            'source': edge['source'],
-                            'target': edge['target'],
-                            'type': edge['type'],
-                            'label': f"{edge['type'].capitalize()} ({ports_str})"
-                        }
-                    })
-
-                unique_nodes_deployment = {node['data']['id']: node for node in nodes_deployment}.values()
-                unique_edges_deployment = formatted_edges_deployment  # 필요 시 중복 제거 로직 추가
-
-                graph_data_deployment = {
-                    'nodes': list(unique_nodes_deployment),
-                    'edges': unique_edges_deployment
-                }
+    nodes = []
+    for member in members:
+        member_namespace, member_name = member.split('/', 1)
+        nodes.append(format_node(member, f"{member_name}.{member_namespace}", 'pod'))
+    edges = []
+    for edge in entry.graph['edges']:
+        data = edge['data']
+        if group_id not in (data['source'], data['target']):
+            continue
+        for member in members:
+            edges.append({'data': dict(data,
+                                       source=member if data['source'] == group_id else data['source'],
+                                       target=member if data['target'] == group_id else data['target'])})
+    return jsonify({'group': group_id, 'count': len(members), 'nodes': nodes, 'edges': with_edge_ids(edges)})
 
-                # Pod 데이터 업데이트
-                policy_map_pod, edges_pod, pod_map = map_policies_to_resources(current_policies, current_pods, 'pod')
-                nodes_pod = []
-                formatted_edges_pod = []
-
-                for policy_key, policy in policy_map_pod.items():
-                    nodes_pod.append({
-                        'data': {'id': policy_key, 'label': policy['label'], 'group': 'policy'}
-                    })
-
-                for pod_key, pod in pod_map.items():
-                    nodes_pod.append({
-                        'data': {'id': pod_key, 'label': pod['label'], 'group': 'pod'}
-                    })
-
-                for edge in edges_pod:
-                    ports = edge['ports']
-                    if ports:
-                        ports_str = ', '.join([f"{p.get('protocol', 'TCP')}/{p.get('port', 'N/A')}" for p in ports])
-                    else:
-                        ports_str = 'All Ports'
-
-                    formatted_edges_pod.append({
-                        'data': {
-                            'source': edge['source'],
-                            'target': edge['target'],
-                            'type': edge['type'],
-                            'label': f"{edge['type'].capitalize()} ({ports_str})"
-                        }
-                    })
-
-                unique_nodes_pod = {node['data']['id']: node for node in nodes_pod}.values()
-                unique_edges_pod = formatted_edges_pod  # 필요 시 중복 제거 로직 추가
-
-                graph_data_pod = {
-                    'nodes': list(unique_nodes_pod),
-                    'edges': unique_edges_pod
-                }
+# 파드 간 도달 가능성 질의: from+to 는 허용 여부, to 만 있으면 접근 가능한 출발지, from 만 있으면 목적지 목록
+@app.route('/reachability')
+def reachability():
+    source = request.args.get('from')
+    target = request.args.get('to')
+    if not source and not target:
+        return jsonify({"error": "Specify 'from' and/or 'to' as namespace/pod."}), 400
+    port = request.args.get('port') or None
+    if port is not None and port.isdigit():
+        port = int(port)
+        if not 0 < port <= 65535:
+            return jsonify({"error": "Invalid port."}), 400
+    # 포트 없이 protocol 만 주면 그 프로토콜의 포트를 하나라도 허용하는 규칙만 봄
+    protocol = request.args.get('protocol', '').upper() or None
 
-                # 클라이언트에 업데이트 전송
-                socketio.emit('update_deployment', graph_data_deployment)
-                socketio.emit('update_pod', graph_data_pod)
+    index = request_cluster().reachability_cache.get()
+    if index is None:
+        return jsonify({"error": "Failed to retrieve network policies, pods or namespaces."}), 500
+    missing = [pod for pod in (source, target) if pod and pod not in index]
+    if missing:
+        return jsonify({"error": f"Pod not found: {', '.join(missing)}"}), 404
 
-                # 캐시 업데이트
-                with cache_lock:
-                    cached_graph_data['deployment'] = graph_data_deployment
-                    cached_graph_data['pod'] = graph_data_pod
+    response = {'from': source, 'to': target, 'port': port,
+                'protocol': protocol or ('TCP' if port is not None else None)}
+    if source and target:
+        response.update(index.check(source, target, port, protocol))
+    elif target:
+        response['sources'] = index.sources(target, port, protocol)
+    else:
+        response['destinations'] = index.destinations(source, port, protocol)
+    return jsonify(response)
 
-                # 이전 데이터 업데이트
-                previous_policies = current_policies
-                previous_pods = current_pods
-                previous_deployments = current_deployments
+# 정책 변경 시뮬레이션: 후보 NetworkPolicy(추가/교체)와 지울 정책(delete=namespace/name,...)을 받아
+# 현재 그래프 대비 추가/삭제될 노드와 엣지, 새로 격리되거나 격리가 풀리는 리소스를 반환 (그래프는 바뀌지 않음)
+@app.route('/simulate', methods=['POST'])
+def simulate():
+    resource_type = request.args.get('resource_type', 'deployment')
+    if resource_type not in RESOURCE_KINDS:
+        return jsonify({"error": "Invalid resource type."}), 400
+    cluster = request_cluster()
+    deleted = [key for key in request.args.get('delete', '').split(',') if key]
+    try:
+        policies, deleted = parse_simulation(request.get_data(as_text=True), request.is_json, deleted)
+    except SimulationError as e:
+        return jsonify({"error": str(e)}), 400
+    cluster.view_subscriptions.touch(resource_type)
+    engine = cluster.get_engine(resource_type)
+    if engine is None:
+        return jsonify({"error": f"Failed to retrieve network policies or {resource_type}s."}), 500
+    try:
+        with graph_build_duration.time(resource_type=resource_type, stage='simulate'):
+            result = engine.simulate(policies, deleted)
+    except KeyError as e:
+        return jsonify({"error": f"Policy not found: {e.args[0]}"}), 404
+    result['resource_type'] = resource_type
+    return jsonify(result)
+
+def history_graph(resource_type, state):
+    """기록에서 다시 만든 객체 상태(kind -> key -> 객체)로 뷰 그래프를 만듭니다."""
+    engine = create_engine(resource_type)
+    engine.load(*({'items': list(state.get(kind, {}).values())} for kind in ('networkpolicies', engine.resource_kind)))
+    return engine.graph()
+
+def history_request():
+    """/history 요청 공통 검사: (클러스터, 뷰) 또는 오류 응답."""
+    resource_type = request.args.get('resource_type', 'deployment')
+    if resource_type not in RESOURCE_KINDS:
+        return None, (jsonify({"error": "Invalid resource type."}), 400)
+    cluster = request_cluster()
+    if cluster.history is None:
+        return None, (jsonify({"error": "History is not enabled (set HISTORY_DIR)."}), 404)
+    return (cluster, resource_type), None
+
+def history_time(param):
+    value = request.args.get(param)
+    if not value:
+        return None
+    return parse_timestamp(value)
+
+# 과거 시점의 그래프: at=<유닉스 시각 또는 ISO 8601> (없으면 지금). 가장 가까운 이전 체크포인트에서 변경을 다시 적용해 만듦
+@app.route('/history')
+def history():
+    view, error = history_request()
+    if error:
+        return error
+    cluster, resource_type = view
+    try:
+        at = history_time('at')
+    except ValueError:
+        return jsonify({"error": "Invalid time; use unix seconds or ISO 8601."}), 400
+    if at is None:
+        at = time.time()
+    state = cluster.history.state_at(at)
+    if state is None:
+        return jsonify({"error": "No history at that time.", 'oldest': cluster.history.oldest()}), 404
+    versioned = VersionedGraph(resource_type)
+    versioned.update(history_graph(resource_type, state))
+    snapshot = versioned.snapshot()
+    del snapshot['version']
+    snapshot['time'] = at
+    return streamed_json_response(snapshot)
 
-                previous_policies_hash = current_policies_hash
-                previous_pods_hash = current_pods_hash
-                previous_deployments_hash = current_deployments_hash
+# 두 시점 사이의 변경: from 시점 그래프에서 to 시점 그래프로의 patch 와 그 사이의 객체 변경 목록 (최대 HISTORY_CHANGES_LIMIT 개)
+HISTORY_CHANGES_LIMIT = 1000
 
+@app.route('/history/diff')
+def history_diff():
+    view, error = history_request()
+    if error:
+        return error
+    cluster, resource_type = view
+    try:
+        start = history_time('from')
+        end = history_time('to')
+    except ValueError:
+        return jsonify({"error": "Invalid time; use unix seconds or ISO 8601."}), 400
+    if end is None:
+        end = time.time()
+    if start is None:
+        return jsonify({"error": "Specify 'from'."}), 400
+    if start > end:
+        return jsonify({"error": "'from' must not be later than 'to'."}), 400
+    states = [cluster.history.state_at(start), cluster.history.state_at(end)]
+    if states[0] is None:
+        return jsonify({"error": "No history at that time.", 'oldest': cluster.history.oldest()}), 404
+    versioned = VersionedGraph(resource_type)
+    versioned.update(history_graph(resource_type, states[0]))
+    patch = versioned.update(history_graph(resource_type, states[1])) or {
+        'added': {'nodes': [], 'edges': []}, 'removed': {'nodes': [], 'edges': []}, 'changed': {'nodes': [], 'edges': []}}
+    changes = cluster.history.changes(start, end, limit=HISTORY_CHANGES_LIMIT + 1)
+    return jsonify({
+        'resource_type': resource_type, 'from': start, 'to': end,
+        'added': patch['added'], 'removed': patch['removed'], 'changed': patch['changed'],
+        'changes': changes[:HISTORY_CHANGES_LIMIT], 'truncated': len(changes) > HISTORY_CHANGES_LIMIT,
+    })
+
+UPDATE_DEBOUNCE_SECONDS = 1
+VIEW_EVICTION_CHECK_SECONDS = 30
+
+def publish_changes():
+    """그래프가 바뀐 컨텍스트마다 구독 중인 뷰의 변경분을 보냅니다 (monitor_changes 의 한 주기)."""
+    for name, cluster in clusters.loaded():
+        if not cluster.changes_pending.is_set():
+            continue
+        try:
+            cluster.publish_changes()
         except Exception as e:
-            print(f"Error in monitor_changes: {e}")
+            print(f"Error publishing {cluster.label or 'current context'} changes: {e}")
+            error_count.inc(source='monitor')
+
+def evict_idle():
+    """쓰이지 않는 뷰와, 한도를 넘었거나 쓰이지 않는 컨텍스트를 내려놓습니다."""
+    for _, cluster in clusters.loaded():
+        cluster.evict_idle_views()
+    clusters.enforce_limits()
+
+def flush_history():
+    for _, cluster in clusters.loaded():
+        if cluster.history is not None:
+            cluster.history.flush()
+
+def monitor_changes():
+    stop_event = Event()
+    if CLUSTER_CONTEXTS:
+        # 여러 컨텍스트: 메모리에 있는 컨텍스트를 작업 풀에서 주기적으로 다시 조회
+        Thread(target=fetch_scheduler.run, args=(stop_event,), daemon=True).start()
+    else:
+        clusters.get().start_informers(KubectlWatchSource(kubectl_runner))
+
+    while True:
+        # 변경이 없어도 주기적으로 깨어나 쓰이지 않는 뷰와 컨텍스트를 내려놓음
+        changes_pending.wait(VIEW_EVICTION_CHECK_SECONDS)
+        evict_idle()
+        flush_history()
+        if not changes_pending.is_set():
+            continue
+        # 짧은 시간 동안 들어오는 변경 이벤트를 한 번의 갱신으로 묶음
+        time.sleep(UPDATE_DEBOUNCE_SECONDS)
+        changes_pending.clear()
+        # 모든 informer 의 최초 list 가 끝나기 전에는 불완전한 그래프를 내보내지 않음
+        if not all(cluster.synced() for _, cluster in clusters.loaded()):
+            changes_pending.set()
+            continue
+        print(f"Updating graph data at {time.strftime('%Y-%m-%d %H:%M:%S')}")
+        publish_changes()
+
+# Socket.IO 클라이언트(sid) -> 구독 중인 컨텍스트 이름
+client_contexts = {}
 
 @socketio.on('connect')
 def handle_connect():
     print('Client connected')
+    connected_clients.inc()
+
+@socketio.on('disconnect')
+def handle_disconnect(reason=None):
+    connected_clients.dec()
+    unsubscribe_client(request.sid)
+
+def unsubscribe_client(sid):
+    """sid 의 구독을 이전 컨텍스트에서 지우고 그 방 이름을 반환합니다."""
+    if sid not in client_contexts:
+        return None
+    cluster = clusters.peek(client_contexts.pop(sid))
+    if cluster is None:
+        return None  # 이미 내려놓은 컨텍스트
+    room = cluster.view_subscriptions.unsubscribe(sid)
+    update_subscriber_gauges(cluster)
+    return room
+
+@socketio.on('subscribe')
+def handle_subscribe(message):
+    """클라이언트가 보는 뷰(context, resource_type, 선택한 네임스페이스)의 방에 넣습니다. 처음 구독된 뷰는 바로 빌드를 시작합니다."""
+    message = message if isinstance(message, dict) else {}
+    resource_type = message.get('resource_type')
+    namespaces = message.get('namespaces')
+    if resource_type not in RESOURCE_KINDS:
+        return {'error': "Invalid resource type."}
+    if namespaces is not None and not (isinstance(namespaces, list) and all(isinstance(ns, str) for ns in namespaces)):
+        return {'error': "namespaces must be a list of names."}
+    try:
+        cluster = clusters.get(message.get('context') or None)
+    except UnknownContext as e:
+        return {'error': f"Unknown context: {e.args[0]}"}
+    cluster.touch()
+    previous = None
+    if client_contexts.get(request.sid, cluster.name) != cluster.name:
+        previous = unsubscribe_client(request.sid)
+    room, previous_view = cluster.view_subscriptions.subscribe(request.sid, resource_type, namespaces)
+    client_contexts[request.sid] = cluster.name
+    for old_room in (previous, previous_view):
+        if old_room and old_room != room:
+            leave_room(old_room)
+    join_room(room)
+    update_subscriber_gauges(cluster)
+    entry = cluster.graph_cache.peek(resource_type)
+    if entry is None or entry.stale:
+        cluster.graph_cache.refresh(resource_type)
+    return {'room': room}
+
+def update_subscriber_gauges(cluster):
+    for resource_type in RESOURCE_KINDS:
+        view_subscribers.set(cluster.view_subscriptions.subscriber_count(resource_type),
+                             context=cluster.label, resource_type=resource_type)
 
 if __name__ == '__main__':
-    thread = Thread(target=monitor_changes)
-    thread.daemon = True
-    thread.start()
+    # 스냅샷은 바뀌지 않으므로 변경 감시 없이 요청 시점에 한 번 읽음
+    if not SNAPSHOT_PATH:
+        thread = Thread(target=monitor_changes)
+        thread.daemon = True
+        thread.start()
     socketio.run(app, host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1 @@
+"""오프라인 벤치마크: 가상 클러스터 생성기(synthetic)와 측정 도구(run)."""
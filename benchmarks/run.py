@@ -0,0 +1,265 @@
+"""가상 클러스터로 그래프 생성, JSON 인코딩, /data, 변경 감지 비용을 측정합니다. 클러스터나 네트워크 없이 실행됩니다.
+
+사용 예:
+    python -m benchmarks.run --pods 20000 --policies 1000
+    python -m benchmarks.run --pods 100000 --policies 5000 --json after.json --baseline before.json
+
+단계:
+    generate                  가상 클러스터 생성
+    full_rebuild              map_policies_to_resources 전체 재계산 (pod 뷰, 레이블 인덱스 사용)
+    engine_build              IncrementalGraph 적재와 graph()
+    simulate                  정책 하나 교체 + 네임스페이스 전체 기본 거부 정책 추가의 영향 계산 (POST /simulate)
+    json_encode, gzip_encode  그래프 JSON 직렬화 (gzip 압축 포함)
+    data_cold                 빈 캐시에서 GET /data (스냅샷 읽기와 배치 계산 포함)
+    data_warm                 캐시된 GET /data (gzip)
+    data_not_modified         If-None-Match 로 GET /data (304)
+    full_rebuild_change_detection
+                              변경 주기마다 전체 재계산 + get_hash (이전 monitor_changes 방식, 레이블 인덱스 사용)
+    change_detection          변경 주기마다 증분 반영 + 버전 patch 계산
+    monitor_cycle             변경 주기마다 저장소 반영, on_object_change, publish_changes (모든 뷰 구독)
+    history_record            초기 객체와 변경 주기를 HistoryLog 에 기록 (payload 는 디스크 사용량)
+    history_reconstruct       마지막 변경 시점의 상태를 체크포인트와 변경 기록으로 다시 만들기
+
+단계마다 경과 시간, 최대 RSS, 결과 크기(payload)를 기록합니다. 최대 RSS 는 Linux 에서는 단계마다 초기화한
+값(/proc/self/clear_refs)이고, 그 밖의 환경에서는 프로세스 시작 이후의 최대값입니다.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import DEFAULT_SELECTOR_MIX, SyntheticCluster, parse_selector_mix
+
+
+def _reset_peak_rss():
+    """최대 RSS 를 현재 RSS 로 초기화합니다. 지원하지 않는 환경이면 False."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_bytes():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 는 바이트, Linux 는 KiB 단위
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Benchmark:
+    """단계별 측정 결과를 모읍니다."""
+
+    def __init__(self):
+        self.results = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """with 블록 하나를 단계 하나로 측정합니다. 블록은 yield 된 기록의 payload_bytes 를 채울 수 있습니다."""
+        record = {'stage': name, 'payload_bytes': None}
+        gc.collect()
+        _reset_peak_rss()
+        start = time.perf_counter()
+        yield record
+        record['seconds'] = time.perf_counter() - start
+        record['peak_rss_bytes'] = _peak_rss_bytes()
+        self.results.append(record)
+
+
+def _payload_size(chunks):
+    return sum(len(chunk) for chunk in chunks)
+
+
+def run(cluster, cycles=3, bench=None):
+    """cluster 로 모든 단계를 측정하고 결과 목록을 반환합니다. app 모듈의 전역 상태를 사용하므로 프로세스당 한 번."""
+    # app 은 가져올 때 전역 저장소와 엔진을 만들므로 여기서 가져옴
+    import app as app_module
+    from app import build_graph_data, get_hash
+    from clusters import ContextPool
+    from graph_encoding import encode_chunks, iter_graph_json
+    from graph_engine import IncrementalGraph
+    from graph_versions import VersionedGraph
+    from history import HistoryLog
+    from snapshot_source import SnapshotSource
+
+    bench = bench or Benchmark()
+    objects = cluster.objects()
+    policies, pods = {'items': objects['networkpolicies']}, {'items': objects['pods']}
+
+    with bench.stage('full_rebuild'):
+        build_graph_data(policies, pods, 'pod')
+
+    with bench.stage('engine_build'):
+        engine = IncrementalGraph('pod')
+        engine.load(policies, pods)
+        graph = engine.graph()
+
+    with bench.stage('simulate') as record:
+        replaced = dict(objects['networkpolicies'][0], spec={'podSelector': {}, 'policyTypes': ['Ingress'], 'ingress': [{}]})
+        namespace = replaced['metadata']['namespace']
+        deny_all = {'metadata': {'name': 'benchmark-deny-all', 'namespace': namespace},
+                    'spec': {'podSelector': {}, 'policyTypes': ['Ingress', 'Egress']}}
+        record['payload_bytes'] = len(json.dumps(engine.simulate([replaced, deny_all])))
+    versioned = VersionedGraph('pod')
+    versioned.update(graph)
+    graph = versioned.snapshot()
+
+    with bench.stage('json_encode') as record:
+        record['payload_bytes'] = _payload_size(iter_graph_json(graph))
+    with bench.stage('gzip_encode') as record:
+        record['payload_bytes'] = _payload_size(encode_chunks(iter_graph_json(graph), 'gzip'))
+    del graph
+
+    # /data 와 monitor_cycle 단계는 벤치마크용 클러스터로 바꿔 실행하고, 끝나면 원래 clusters 로 되돌림
+    previous_clusters = app_module.clusters
+    try:
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(sys.stderr):
+            dump = os.path.join(directory, 'cluster.json')
+            cluster.write_dump(dump)
+            cluster_context = app_module.ClusterContext(None, SnapshotSource(dump, cache_dir=None))
+            app_module.clusters = ContextPool(lambda name: cluster_context)
+            client = app_module.app.test_client()
+            gzip_headers = {'Accept-Encoding': 'gzip'}
+            with bench.stage('data_cold') as record:
+                response = client.get('/data?resource_type=pod', headers=gzip_headers)
+                record['payload_bytes'] = len(response.get_data())
+            etag = response.headers['ETag']
+            with bench.stage('data_warm') as record:
+                record['payload_bytes'] = len(client.get('/data?resource_type=pod', headers=gzip_headers).get_data())
+            with bench.stage('data_not_modified') as record:
+                response = client.get('/data?resource_type=pod', headers=dict(gzip_headers, **{'If-None-Match': etag}))
+                record['payload_bytes'] = len(response.get_data())
+
+            # 모든 뷰를 구독한 대시보드를 가정: 엔진과 첫 그래프(배치 포함)를 만들어 둔 뒤 변경 주기만 측정
+            cluster_context.ensure_stores(list(cluster_context.object_stores))
+            for resource_type in cluster_context.graph_engines:
+                cluster_context.view_subscriptions.subscribe(f"benchmark-{resource_type}", resource_type)
+                cluster_context.get_engine(resource_type)
+            cluster_context.publish_changes()
+
+        changes = [cluster.churn() for _ in range(cycles)]
+
+        with bench.stage('full_rebuild_change_detection') as record:
+            current = {'networkpolicies': {}, 'pods': {}}
+            for kind, items in (('networkpolicies', policies), ('pods', pods)):
+                current[kind] = {(obj['metadata']['namespace'], obj['metadata']['name']): obj for obj in items['items']}
+            last_hash = None
+            payload = 0
+            for events in changes:
+                for kind, event_type, obj in events:
+                    key = (obj['metadata']['namespace'], obj['metadata']['name'])
+                    if event_type == 'DELETED':
+                        current[kind].pop(key, None)
+                    else:
+                        current[kind][key] = obj
+                rebuilt = build_graph_data({'items': list(current['networkpolicies'].values())},
+                                           {'items': list(current['pods'].values())}, 'pod')
+                graph_hash = get_hash(rebuilt)
+                if graph_hash != last_hash:
+                    # 이전 방식은 바뀌면 그래프 전체를 보냄
+                    payload += len(json.dumps(rebuilt))
+                    last_hash = graph_hash
+            record['payload_bytes'] = payload
+
+        with bench.stage('change_detection') as record:
+            payload = 0
+            for events in changes:
+                for kind, event_type, obj in events:
+                    engine.apply(kind, event_type, obj)
+                patch = versioned.update(engine.graph())
+                if patch:
+                    payload += len(json.dumps(patch))
+            record['payload_bytes'] = payload
+
+        with bench.stage('monitor_cycle'), contextlib.redirect_stdout(sys.stderr):
+            for events in changes:
+                for kind, event_type, obj in events:
+                    if cluster_context.object_stores[kind].apply(event_type, obj):
+                        cluster_context.on_object_change(kind, event_type, obj)
+                app_module.publish_changes()
+    finally:
+        app_module.clusters = previous_clusters
+
+    with tempfile.TemporaryDirectory() as directory:
+        # 초기 객체는 시각 0, 변경 주기 i 는 시각 i 에 일어난 것으로 기록
+        now = [0.0]
+        history = HistoryLog(directory, clock=lambda: now[0])
+        with bench.stage('history_record') as record:
+            for kind, items in objects.items():
+                for obj in items:
+                    history.record(kind, 'ADDED', obj)
+            for cycle, events in enumerate(changes, 1):
+                now[0] = float(cycle)
+                for kind, event_type, obj in events:
+                    history.record(kind, event_type, obj)
+            history.flush()
+            record['payload_bytes'] = history.disk_bytes()
+        with bench.stage('history_reconstruct'):
+            history.state_at(float(len(changes)))
+    return bench.results
+
+
+def format_results(results, baseline=None):
+    """결과 표를 만듭니다. baseline 결과가 있으면 단계별 시간 비율(현재/기준)을 함께 보여 줍니다."""
+    baseline_by_stage = {record['stage']: record for record in baseline or []}
+    lines = [f"{'stage':<26}{'seconds':>10}{'peak RSS MiB':>14}{'payload':>14}" + (f"{'vs baseline':>13}" if baseline else '')]
+    for record in results:
+        payload = '' if record['payload_bytes'] is None else f"{record['payload_bytes']:,}"
+        line = f"{record['stage']:<26}{record['seconds']:>10.3f}{record['peak_rss_bytes'] / 2 ** 20:>14.1f}{payload:>14}"
+        previous = baseline_by_stage.get(record['stage'])
+        if previous:
+            line += f"{record['seconds'] / max(previous['seconds'], 1e-9):>12.2f}x"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark graph building, encoding and change detection on a synthetic cluster.")
+    parser.add_argument('--pods', type=int, default=10000)
+    parser.add_argument('--policies', type=int, default=500)
+    parser.add_argument('--namespaces', type=int, default=20)
+    parser.add_argument('--label-cardinality', type=int, default=20, help="Distinct app label values per namespace")
+    parser.add_argument('--selector-mix', type=parse_selector_mix,
+                        default=DEFAULT_SELECTOR_MIX, help="Peer shape weights, e.g. matchLabels=0.5,namespaceSelector=0.3,ipBlock=0.2")
+    parser.add_argument('--churn-rate', type=float, default=0.01, help="Fraction of pods and policies changed per cycle")
+    parser.add_argument('--cycles', type=int, default=3, help="Change cycles to measure")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Write parameters and results to this file")
+    parser.add_argument('--baseline', help="Compare with results previously written by --json")
+    args = parser.parse_args(argv)
+
+    params = {key: value for key, value in vars(args).items() if key not in ('json', 'baseline')}
+    bench = Benchmark()
+    with bench.stage('generate'):
+        cluster = SyntheticCluster(pods=args.pods, policies=args.policies, namespaces=args.namespaces,
+                                   label_cardinality=args.label_cardinality, selector_mix=args.selector_mix,
+                                   churn_rate=args.churn_rate, seed=args.seed)
+    results = run(cluster, cycles=args.cycles, bench=bench)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    print(f"pods={args.pods} policies={args.policies} namespaces={args.namespaces} "
+          f"label_cardinality={args.label_cardinality} churn_rate={args.churn_rate} cycles={args.cycles}")
+    print(format_results(results, baseline))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'params': params, 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
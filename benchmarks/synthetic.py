@@ -0,0 +1,185 @@
+"""벤치마크용 가상 클러스터 생성기. 클러스터 없이 NetworkPolicy, Pod, Deployment, Namespace 를 만듭니다.
+
+같은 seed 와 인자는 언제나 같은 클러스터와 같은 변경 이벤트를 만듭니다.
+"""
+import copy
+import json
+import random
+
+TIERS = ['frontend', 'backend', 'db', 'cache', 'worker']
+TEAMS = ['payments', 'search', 'identity', 'platform', 'data']
+PORTS = [80, 443, 5432, 6379, 8080, 9090]
+
+# 정책 피어(from/to) 모양의 기본 비율
+DEFAULT_SELECTOR_MIX = {'matchLabels': 0.45, 'matchExpressions': 0.25, 'namespaceSelector': 0.2, 'ipBlock': 0.1}
+
+
+def parse_selector_mix(text):
+    """'matchLabels=0.5,ipBlock=0.2' 형식을 비율 사전으로 바꿉니다. 빠진 모양은 0."""
+    mix = dict.fromkeys(DEFAULT_SELECTOR_MIX, 0.0)
+    for part in text.split(','):
+        shape, _, weight = part.partition('=')
+        if shape.strip() not in mix:
+            raise ValueError(f"Unknown selector shape: {shape.strip()}")
+        mix[shape.strip()] = float(weight)
+    if not any(mix.values()):
+        raise ValueError("Selector mix must have at least one positive weight")
+    return mix
+
+
+class SyntheticCluster:
+    """크기와 모양을 정할 수 있는 가상 클러스터.
+
+    네임스페이스마다 label_cardinality 개의 앱(Deployment)이 있고, 파드는 앱들에 나뉘어 ReplicaSet 이 소유합니다.
+    파드 라벨은 app, tier, version, pod-template-hash 입니다. 정책은 네임스페이스에 고르게 나뉘며 피어 모양은
+    selector_mix 비율을 따릅니다.
+    """
+
+    def __init__(self, pods=1000, policies=100, namespaces=10, label_cardinality=10,
+                 selector_mix=None, churn_rate=0.01, seed=0):
+        self.rng = random.Random(seed)
+        self.churn_rate = churn_rate
+        self.selector_mix = selector_mix or DEFAULT_SELECTOR_MIX
+        self.namespace_names = [f"ns-{i}" for i in range(namespaces)]
+        self.apps = [f"app-{i}" for i in range(label_cardinality)]
+        self.namespaces = [self._namespace(i, name) for i, name in enumerate(self.namespace_names)]
+        self.deployments = {}
+        self.pods = {}
+        self.policies = {}
+        self._serial = 0
+
+        apps = [(namespace, app) for namespace in self.namespace_names for app in self.apps]
+        for namespace, app in apps:
+            self.deployments[(namespace, app)] = self._deployment(namespace, app)
+        for i in range(pods):
+            namespace, app = apps[i % len(apps)]
+            pod = self._pod(namespace, app, self.deployments[(namespace, app)])
+            self.pods[(namespace, pod['metadata']['name'])] = pod
+        for i in range(policies):
+            namespace = self.namespace_names[i % namespaces]
+            policy = self._policy(f"policy-{i}", namespace)
+            self.policies[(namespace, policy['metadata']['name'])] = policy
+
+    def objects(self):
+        """kind -> 객체 목록 (kubectl get -o json 의 items 와 같은 모양)."""
+        return {
+            'networkpolicies': list(self.policies.values()),
+            'pods': list(self.pods.values()),
+            'deployments': list(self.deployments.values()),
+            'namespaces': list(self.namespaces),
+        }
+
+    def write_dump(self, path):
+        """kubectl get ... -A -o json 과 같은 List 덤프를 씁니다 (SnapshotSource 와 cli.py 의 입력)."""
+        items = [dict(obj, kind=kind) for kind, objects in
+                 (('NetworkPolicy', self.policies.values()), ('Pod', self.pods.values()),
+                  ('Deployment', self.deployments.values()), ('Namespace', self.namespaces))
+                 for obj in objects]
+        with open(path, 'w') as f:
+            json.dump({'apiVersion': 'v1', 'kind': 'List', 'items': items}, f)
+
+    def churn(self):
+        """변경 한 주기의 이벤트 목록 [(kind, event_type, obj)] 을 만들고 클러스터에 반영합니다.
+
+        파드의 churn_rate 비율만큼 롤링 재시작(삭제 후 새 이름으로 생성), 라벨 변경, phase 변경, 상태 잡음(재시작 횟수)이
+        섞여 일어나고, 정책은 같은 비율로 다시 만들어집니다 (최소 한 개씩).
+        """
+        events = []
+        for key in self.rng.sample(sorted(self.pods), min(len(self.pods), max(1, int(len(self.pods) * self.churn_rate)))):
+            pod = self.pods.pop(key)
+            action = self.rng.random()
+            if action < 0.5:
+                namespace, app = key[0], pod['metadata']['labels']['app']
+                replacement = self._pod(namespace, app, self.deployments[(namespace, app)])
+                self.pods[(namespace, replacement['metadata']['name'])] = replacement
+                events += [('pods', 'DELETED', pod), ('pods', 'ADDED', replacement)]
+                continue
+            pod = copy.deepcopy(pod)
+            if action < 0.7:
+                pod['metadata']['labels']['version'] = f"v{self.rng.randint(1, 3)}"
+            elif action < 0.8:
+                pod['status']['phase'] = self.rng.choice(['Running', 'Pending', 'Failed'])
+            else:
+                # 상태 잡음: 재시작 횟수만 바뀌고 그래프에 쓰이는 필드는 그대로
+                statuses = pod['status'].setdefault('containerStatuses', [{'name': 'main', 'restartCount': 0}])
+                statuses[0]['restartCount'] += 1
+            pod['metadata']['resourceVersion'] = self._next_serial()
+            self.pods[key] = pod
+            events.append(('pods', 'MODIFIED', pod))
+        policy_changes = min(len(self.policies), max(1, int(len(self.policies) * self.churn_rate)))
+        for namespace, name in self.rng.sample(sorted(self.policies), policy_changes):
+            policy = self._policy(name, namespace)
+            self.policies[(namespace, name)] = policy
+            events.append(('networkpolicies', 'MODIFIED', policy))
+        return events
+
+    def _next_serial(self):
+        self._serial += 1
+        return str(self._serial)
+
+    def _namespace(self, index, name):
+        return {'metadata': {'name': name, 'resourceVersion': '1',
+                             'labels': {'name': name, 'kubernetes.io/metadata.name': name,
+                                        'team': TEAMS[index % len(TEAMS)], 'env': 'prod' if index % 3 else 'staging'}}}
+
+    def _deployment(self, namespace, app):
+        labels = {'app': app, 'tier': self.rng.choice(TIERS)}
+        return {'metadata': {'name': app, 'namespace': namespace, 'labels': labels, 'resourceVersion': self._next_serial()},
+                'spec': {'replicas': 1, 'selector': {'matchLabels': {'app': app}}},
+                'status': {'replicas': 1}}
+
+    def _pod(self, namespace, app, deployment):
+        template_hash = f"{self.rng.getrandbits(32):08x}"
+        serial = self._next_serial()
+        labels = {'app': app, 'tier': deployment['metadata']['labels']['tier'],
+                  'version': f"v{self.rng.randint(1, 3)}", 'pod-template-hash': template_hash}
+        return {'metadata': {'name': f"{app}-{template_hash}-{serial}", 'namespace': namespace, 'labels': labels,
+                             'resourceVersion': serial,
+                             'ownerReferences': [{'kind': 'ReplicaSet', 'name': f"{app}-{template_hash}", 'controller': True}]},
+                'status': {'phase': 'Running', 'podIP': f"10.{self._serial >> 16 & 255}.{self._serial >> 8 & 255}.{self._serial & 255}"}}
+
+    def _pod_selector(self):
+        if self.rng.random() < 0.5:
+            return {'matchLabels': {'app': self.rng.choice(self.apps)}}
+        operator = self.rng.choice(['In', 'NotIn', 'Exists'])
+        expression = {'key': 'tier', 'operator': operator}
+        if operator != 'Exists':
+            expression['values'] = self.rng.sample(TIERS, 2)
+        return {'matchExpressions': [expression]}
+
+    def _peer(self, shape):
+        if shape == 'matchLabels':
+            return {'podSelector': {'matchLabels': {'app': self.rng.choice(self.apps), 'tier': self.rng.choice(TIERS)}}}
+        if shape == 'matchExpressions':
+            return {'podSelector': {'matchExpressions': [{'key': 'version', 'operator': 'In', 'values': ['v1', 'v2']},
+                                                         {'key': 'app', 'operator': 'Exists'}]}}
+        # namespaceSelector: 이름으로 고른 네임스페이스(또는 팀)의 파드
+        if self.rng.random() < 0.7:
+            namespace_selector = {'matchLabels': {'name': self.rng.choice(self.namespace_names)}}
+        else:
+            namespace_selector = {'matchExpressions': [{'key': 'team', 'operator': 'In', 'values': self.rng.sample(TEAMS, 2)}]}
+        return {'namespaceSelector': namespace_selector, 'podSelector': self._pod_selector()}
+
+    def _policy(self, name, namespace):
+        shapes, weights = zip(*self.selector_mix.items())
+        spec = {'podSelector': {} if self.rng.random() < 0.1 else self._pod_selector(), 'policyTypes': []}
+        for direction, field in (('ingress', 'from'), ('egress', 'to')):
+            if self.rng.random() < 0.2:
+                continue
+            spec['policyTypes'].append(direction.capitalize())
+            rules = []
+            for _ in range(self.rng.randint(1, 3)):
+                rule = {'ports': [{'protocol': 'TCP', 'port': port} for port in self.rng.sample(PORTS, self.rng.randint(1, 2))]}
+                peers = []
+                for shape in self.rng.choices(shapes, weights, k=self.rng.randint(1, 3)):
+                    if shape == 'ipBlock':
+                        # 이 저장소의 그래프는 규칙 수준의 ipBlock 을 노드로 그림
+                        rule['ipBlock'] = {'cidr': f"172.{self.rng.randint(16, 31)}.0.0/16",
+                                           'except': [f"172.{self.rng.randint(16, 31)}.1.0/24"]}
+                    else:
+                        peers.append(self._peer(shape))
+                if peers:
+                    rule[field] = peers
+                rules.append(rule)
+            spec[direction] = rules
+        return {'metadata': {'name': name, 'namespace': namespace, 'resourceVersion': self._next_serial()}, 'spec': spec}
@@ -0,0 +1,67 @@
+"""객체 목록의 변경 감지: (uid, resourceVersion) 로 바뀐 객체만 찾고, 그중 그래프에 영향을 주는 필드가 바뀐 것만 변경으로 봅니다.
+
+파드의 상태 잡음(condition 시각, 재시작 횟수 등)은 resourceVersion 만 바꾸고 그래프는 그대로이므로 무시됩니다.
+"""
+
+# kind -> 그래프, 그룹, 도달 가능성 판정에 쓰이는 필드 경로
+GRAPH_FIELDS = {
+    'pods': (('metadata', 'labels'), ('metadata', 'ownerReferences'), ('status', 'phase')),
+    'deployments': (('metadata', 'labels'),),
+    'networkpolicies': (('spec',),),
+    'namespaces': (('metadata', 'labels'),),
+}
+
+
+def _field(obj, path):
+    for part in path:
+        obj = (obj or {}).get(part)
+    return obj
+
+
+def object_version(kind, obj):
+    """(uid, resourceVersion, 그래프 필드 값들). kind 를 모르면 객체 전체를 그래프 필드로 봅니다."""
+    metadata = obj.get('metadata', {})
+    paths = GRAPH_FIELDS.get(kind)
+    fields = tuple(_field(obj, path) for path in paths) if paths else obj
+    return metadata.get('uid'), metadata.get('resourceVersion'), fields
+
+
+def graph_changed(old, new):
+    """두 object_version 사이에 그래프가 달라질 변경이 있는지. uid 와 resourceVersion 이 같으면 필드는 비교하지 않습니다."""
+    if old[:2] == new[:2]:
+        return False
+    return old[2] != new[2]
+
+
+class ChangeSet:
+    """목록 비교 결과. (event_type, object) 로 순회하며, 그래프 필드가 그대로인 갱신은 ignored 로만 셉니다."""
+
+    __slots__ = ('events', 'ignored')
+
+    def __init__(self):
+        self.events = []
+        self.ignored = 0
+
+    def add(self, event_type, obj):
+        self.events.append((event_type, obj))
+
+    def _objects(self, event_type):
+        return [obj for kind, obj in self.events if kind == event_type]
+
+    @property
+    def added(self):
+        return self._objects('ADDED')
+
+    @property
+    def modified(self):
+        return self._objects('MODIFIED')
+
+    @property
+    def removed(self):
+        return self._objects('DELETED')
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def __len__(self):
+        return len(self.events)
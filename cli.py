@@ -0,0 +1,76 @@
+"""스냅샷(매니페스트 디렉터리 또는 kubectl 덤프)에서 그래프 JSON 을 만듭니다. Flask 서버를 띄우지 않습니다.
+
+사용 예:
+    python cli.py samples/k8s --resource-type deployment --output graph.json
+    kubectl get pods,deployments,networkpolicies,namespaces -A -o json > dump.json && python cli.py dump.json --layout
+"""
+import argparse
+import contextlib
+import sys
+
+from aggregation import GROUP_BY_MODES, PodGroupGraph
+from graph_encoding import iter_graph_json
+from graph_engine import RESOURCE_KINDS, IncrementalGraph
+from graph_versions import VersionedGraph
+from layout import GraphLayout, with_positions
+from snapshot_source import DEFAULT_CACHE_DIR, SnapshotSource
+
+
+def build_graph(source, resource_type, group_by='labels', layout=False):
+    """source(fetch_all 인터페이스)에서 /data 와 같은 형식의 그래프를 만듭니다. 읽지 못한 kind 가 있으면 그 예외를 던집니다."""
+    if resource_type == 'podgroup':
+        engine = PodGroupGraph(resource_type, group_by=group_by)
+    else:
+        engine = IncrementalGraph(resource_type)
+    results = source.fetch_all(['networkpolicies', engine.resource_kind])
+    for result in results.values():
+        if isinstance(result, Exception):
+            raise result
+    engine.load(results['networkpolicies'], results[engine.resource_kind])
+
+    versioned = VersionedGraph(resource_type)
+    versioned.update(engine.graph())
+    graph = versioned.snapshot()
+    if layout:
+        graph_layout = GraphLayout()
+        graph_layout.update(graph)
+        graph = with_positions(graph, graph_layout.positions())
+    return graph
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the network policy graph from saved manifests or a kubectl dump.")
+    parser.add_argument('snapshot', help="Directory of YAML/JSON manifests, or a 'kubectl get -o json/yaml' dump file")
+    parser.add_argument('-r', '--resource-type', choices=sorted(RESOURCE_KINDS), default='deployment')
+    parser.add_argument('-o', '--output', help="Output file (default: stdout)")
+    parser.add_argument('--group-by', choices=GROUP_BY_MODES, default='labels', help="Grouping for --resource-type podgroup")
+    parser.add_argument('--layout', action='store_true', help="Include precomputed node positions")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Where to keep the parsed snapshot cache (default: %(default)s); "
+                        "must be owned and only writable by the current user")
+    parser.add_argument('--no-cache', action='store_true', help="Always parse the snapshot files")
+    args = parser.parse_args(argv)
+
+    try:
+        source = SnapshotSource(args.snapshot, cache_dir=None if args.no_cache else args.cache_dir)
+        # 진행 메시지가 그래프 JSON 출력(stdout)에 섞이지 않도록 stderr 로 보냄
+        with contextlib.redirect_stdout(sys.stderr):
+            graph = build_graph(source, args.resource_type, args.group_by, args.layout)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    output = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for chunk in iter_graph_json(graph):
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+        else:
+            output.flush()
+    print(f"Wrote {len(graph['nodes'])} nodes and {len(graph['edges'])} edges", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
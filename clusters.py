@@ -0,0 +1,169 @@
+"""여러 kube 컨텍스트를 한 서버에서 다루기 위한 컨텍스트 풀과 목록 조회 스케줄러.
+
+컨텍스트마다 저장소와 그래프 캐시를 따로 두고 (app.ClusterContext), 여기서는 어떤 컨텍스트를 메모리에 둘지와
+언제 다시 조회할지만 정합니다.
+"""
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock
+
+FETCH_WORKERS = 4
+POLL_SECONDS = 30
+MAX_BACKOFF_SECONDS = 300
+MAX_CONTEXTS = 8
+
+
+class UnknownContext(KeyError):
+    """설정에 없는 kube 컨텍스트를 요청한 경우."""
+
+
+class ContextPool:
+    """설정된 컨텍스트를 처음 쓰일 때 만들고, 최근에 쓰인 순서(LRU)로 메모리 한도를 지킵니다.
+
+    factory(name) 가 만든 컨텍스트 객체는 object_count(), in_use(), idle(), close() 를 제공해야 합니다.
+    구독자가 없는(in_use() 가 False) 컨텍스트 중 한동안 쓰이지 않았거나(idle()), max_contexts 개 또는 객체 수 합
+    max_objects 를 넘는 만큼을 오래 전에 쓰인 것부터 내려놓습니다. pinned 에 있는 컨텍스트는 내려놓지 않습니다.
+    """
+
+    def __init__(self, factory, names=(None,), max_contexts=MAX_CONTEXTS, max_objects=None, pinned=(),
+                 on_load=None, on_evict=None):
+        self.factory = factory
+        self.names = list(names)
+        self.default = self.names[0]
+        self.max_contexts = max_contexts
+        self.max_objects = max_objects
+        self.pinned = set(pinned)
+        self.on_load = on_load
+        self.on_evict = on_evict
+        self._contexts = OrderedDict()  # 가장 오래 전에 쓰인 컨텍스트가 앞
+        self._lock = Lock()
+
+    def get(self, name=None):
+        """name 컨텍스트를 반환합니다 (None 이면 기본 컨텍스트). 메모리에 없으면 만들고 한도를 넘은 컨텍스트를 내려놓습니다."""
+        name = self.default if name is None else name
+        if name not in self.names:
+            raise UnknownContext(name)
+        with self._lock:
+            context = self._contexts.get(name)
+            if context is not None:
+                self._contexts.move_to_end(name)
+                return context
+            context = self._contexts[name] = self.factory(name)
+        if self.on_load:
+            self.on_load(name, context)
+        self.enforce_limits(keep=name)
+        return context
+
+    def peek(self, name=None):
+        """메모리에 있는 컨텍스트만 반환합니다 (없으면 None). 사용 순서는 바꾸지 않습니다."""
+        with self._lock:
+            return self._contexts.get(self.default if name is None else name)
+
+    def loaded(self):
+        """메모리에 있는 (이름, 컨텍스트) 목록. 오래 전에 쓰인 것부터."""
+        with self._lock:
+            return list(self._contexts.items())
+
+    def evict(self, name):
+        with self._lock:
+            context = self._contexts.pop(name, None)
+        if context is None:
+            return False
+        context.close()
+        if self.on_evict:
+            self.on_evict(name, context)
+        return True
+
+    def enforce_limits(self, keep=None):
+        """개수/객체 수 한도를 넘었거나 쓰이지 않는 컨텍스트를 오래 전에 쓰인 것부터 내려놓고 그 이름 목록을 반환합니다."""
+        evicted = []
+        for name, context in self.loaded():
+            if name == keep or name in self.pinned or context.in_use():
+                continue
+            loaded = self.loaded()
+            over_count = len(loaded) > self.max_contexts
+            over_objects = self.max_objects is not None and sum(c.object_count() for _, c in loaded) > self.max_objects
+            if not (over_count or over_objects or context.idle()):
+                continue
+            if self.evict(name):
+                evicted.append(name)
+        return evicted
+
+
+class FetchScheduler:
+    """컨텍스트별 주기적 목록 조회를 정해진 수의 작업 스레드에서 실행합니다.
+
+    컨텍스트마다 다음 조회 시각을 두고, 조회가 실패하면 간격을 두 배씩 (max_backoff 까지) 늘립니다.
+    한 컨텍스트의 조회는 동시에 하나만 실행됩니다.
+    """
+
+    def __init__(self, workers=FETCH_WORKERS, interval=POLL_SECONDS, max_backoff=MAX_BACKOFF_SECONDS,
+                 clock=time.monotonic, on_result=None):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fetch')
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.on_result = on_result
+        self._clock = clock
+        self._jobs = {}  # name -> {'poll', 'due', 'failures', 'running'}
+        self._lock = Lock()
+        self._wakeup = Event()
+
+    def add(self, name, poll, delay=0):
+        """poll() 을 name 컨텍스트의 조회 작업으로 등록합니다. 실패하면 poll 이 예외를 던져야 합니다."""
+        with self._lock:
+            self._jobs[name] = {'poll': poll, 'due': self._clock() + delay, 'failures': 0, 'running': False}
+        self._wakeup.set()
+
+    def remove(self, name):
+        with self._lock:
+            self._jobs.pop(name, None)
+
+    def state(self, name):
+        """(다음 조회까지 남은 초, 연속 실패 횟수). 등록되지 않았으면 None."""
+        with self._lock:
+            job = self._jobs.get(name)
+            if job is None:
+                return None
+            return max(0.0, job['due'] - self._clock()), job['failures']
+
+    def run_pending(self):
+        """조회 시각이 된 작업을 작업 스레드에 넘기고 그 future 목록을 반환합니다."""
+        now = self._clock()
+        due = []
+        with self._lock:
+            for name, job in self._jobs.items():
+                if not job['running'] and job['due'] <= now:
+                    job['running'] = True
+                    due.append((name, job))
+        return [self.executor.submit(self._run, name, job) for name, job in due]
+
+    def _run(self, name, job):
+        error = None
+        try:
+            job['poll']()
+        except Exception as e:
+            error = e
+        with self._lock:
+            job['running'] = False
+            job['failures'] = job['failures'] + 1 if error is not None else 0
+            delay = min(self.interval * 2 ** job['failures'], self.max_backoff) if error is not None else self.interval
+            job['due'] = self._clock() + delay
+        if error is not None:
+            print(f"Error polling context {name}: {error} (retrying in {delay:.0f}s)")
+        if self.on_result:
+            self.on_result(name, error)
+        self._wakeup.set()
+
+    def next_due(self):
+        """실행 중이 아닌 작업 중 가장 이른 다음 조회까지 남은 초 (작업이 없으면 None)."""
+        with self._lock:
+            waiting = [job['due'] for job in self._jobs.values() if not job['running']]
+        return max(0.0, min(waiting) - self._clock()) if waiting else None
+
+    def run(self, stop_event):
+        while not stop_event.is_set():
+            self._wakeup.clear()
+            self.run_pending()
+            delay = self.next_due()
+            self._wakeup.wait(self.interval if delay is None else min(delay, self.interval))
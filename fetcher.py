@@ -0,0 +1,206 @@
+import json
+import os
+import shlex
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+CHUNK_SIZE = 1 << 16
+
+# kind 별로 그래프/상세 정보에 필요한 spec, status 필드
+SPEC_FIELDS = {
+    'networkpolicies': ('podSelector', 'policyTypes', 'ingress', 'egress'),
+    'deployments': ('selector',),
+}
+STATUS_FIELDS = {
+    'pods': ('phase',),
+    'deployments': ('availableReplicas',),
+}
+METADATA_FIELDS = ('name', 'namespace', 'uid', 'labels', 'resourceVersion', 'ownerReferences')
+
+
+def trim_object(kind, obj):
+    """객체에서 그래프와 상세 정보에 쓰이는 필드만 남깁니다 (managedFields, 포트 외의 컨테이너 spec 등 제거)."""
+    metadata = obj.get('metadata', {})
+    trimmed = {'metadata': {field: metadata[field] for field in METADATA_FIELDS if field in metadata}}
+    spec = obj.get('spec') or {}
+    if kind in SPEC_FIELDS:
+        trimmed['spec'] = {field: spec[field] for field in SPEC_FIELDS[kind] if field in spec}
+    # 파드는 이름 있는 포트(named port)를 번호로 풀기 위해 컨테이너 포트만 남김
+    container_ports = [{'ports': container['ports']} for container in spec.get('containers') or () if container.get('ports')]
+    if kind == 'pods' and container_ports:
+        trimmed['spec'] = {'containers': container_ports}
+    status = obj.get('status') or {}
+    if kind in STATUS_FIELDS:
+        trimmed['status'] = {field: status[field] for field in STATUS_FIELDS[kind] if field in status}
+    return trimmed
+
+
+class _StreamReader:
+    """텍스트 스트림을 조금씩 읽으면서 JSON 토큰을 디코딩하는 버퍼."""
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size):
+        chunk = self.stream.read(size)
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        """공백을 건너뛰고 다음 문자를 반환합니다 (스트림 끝이면 '')."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill(self.chunk_size)
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Unexpected {char!r} in kubectl output, expected one of {chars!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """다음 JSON 값 하나를 디코딩합니다. 값이 버퍼에 다 들어오지 않았으면 더 읽습니다."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                # 큰 객체는 읽는 양을 늘려 재시도 횟수를 줄임
+                self._fill(max(self.chunk_size, len(self.buffer) - self.pos))
+                continue
+            self.pos = end
+            return value
+
+
+def iter_list_items(stream, chunk_size=CHUNK_SIZE, list_fields=None):
+    """kubectl get -o json 출력의 items 원소를 전체 문서를 메모리에 올리지 않고 하나씩 반환합니다.
+
+    list_fields 에 dict 를 넘기면 items 외의 최상위 필드(metadata 등)를 채워 줍니다.
+    """
+    reader = _StreamReader(stream, chunk_size)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key == 'items' and reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.expect(']')
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(',]') == ']':
+                        break
+        else:
+            value = reader.value()
+            if list_fields is not None:
+                list_fields[key] = value
+        if reader.expect(',}') == '}':
+            return
+
+
+class SubprocessRunner:
+    """kubectl 을 하위 프로세스로 실행합니다. kubectl 대신 가짜 스크립트 명령을 지정할 수 있습니다."""
+
+    def __init__(self, command='kubectl', env=None):
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.env = dict(os.environ, **env) if env else None
+
+    def __call__(self, args):
+        return subprocess.Popen(
+            self.command + list(args),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            env=self.env
+        )
+
+
+def read_list(runner, args, kind, list_fields=None):
+    """runner 로 kubectl 을 실행하고 목록 출력을 스트리밍으로 파싱하면서 객체마다 필드를 줄입니다.
+
+    stderr 는 별도 스레드에서 함께 비웁니다 (stderr 파이프가 차서 kubectl 이 멈추지 않도록).
+    """
+    process = runner(args)
+    stderr_chunks = []
+    stderr_reader = None
+    if process.stderr:
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        stderr_reader.start()
+    parse_error = None
+    items = []
+    try:
+        items = [trim_object(kind, item) for item in iter_list_items(process.stdout, list_fields=list_fields)]
+    except ValueError as e:
+        parse_error = e
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+        if stderr_reader is not None:
+            stderr_reader.join()
+            process.stderr.close()
+    stderr = ''.join(stderr_chunks)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, ' '.join(args), stderr=stderr)
+    if parse_error is not None:
+        raise parse_error
+    return items
+
+
+class KubectlFetcher:
+    """여러 kind 의 목록을 병렬로 가져오고, 파싱하면서 필요한 필드만 남깁니다.
+
+    executor 를 넘기면 fetch_all 이 호출마다 스레드를 만들지 않고 그 작업 풀(여러 컨텍스트가 공유)에서 실행합니다.
+    """
+
+    def __init__(self, runner=None, extra_args=(), on_timing=None, executor=None):
+        self.runner = runner or SubprocessRunner()
+        self.extra_args = list(extra_args)
+        self.on_timing = on_timing
+        self.executor = executor
+        self.timings = {}
+
+    def fetch(self, kind):
+        """kind 목록을 {'items': [...]} 로 반환합니다. kubectl 이 실패하면 예외를 던집니다."""
+        start = time.perf_counter()
+        items = read_list(self.runner, ["get", kind, "--all-namespaces", "-o", "json"] + self.extra_args, kind)
+
+        elapsed = time.perf_counter() - start
+        self.timings[kind] = {'seconds': elapsed, 'objects': len(items)}
+        if self.on_timing:
+            self.on_timing(kind, elapsed, len(items))
+        return {'items': items}
+
+    def fetch_all(self, kinds):
+        """여러 kind 를 동시에 가져옵니다. kind -> 결과 (실패한 kind 는 예외 객체)."""
+        kinds = list(kinds)
+        if not kinds:
+            return {}
+        if self.executor is not None:
+            futures = {kind: self.executor.submit(self.fetch, kind) for kind in kinds}
+            wait(futures.values())
+        else:
+            with ThreadPoolExecutor(max_workers=len(kinds)) as executor:
+                futures = {kind: executor.submit(self.fetch, kind) for kind in kinds}
+        results = {}
+        for kind, future in futures.items():
+            error = future.exception()
+            results[kind] = error if error is not None else future.result()
+        return results
@@ -0,0 +1,132 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from graph_encoding import EncodedGraph
+from graph_filter import partition_by_namespace
+
+
+class GraphBuildError(Exception):
+    """그래프를 만들 데이터를 가져오지 못한 경우."""
+
+
+class CacheEntry:
+    """캐시된 그래프 스냅샷과 만들어진 시각, 원본 객체들의 resourceVersion."""
+
+    __slots__ = ('graph', 'built_at', 'resource_versions', 'stale', '_subgraphs', '_encoded')
+
+    def __init__(self, graph, resource_versions=None, built_at=None):
+        self.graph = graph
+        self.resource_versions = resource_versions or {}
+        self.built_at = built_at if built_at is not None else time.time()
+        self.stale = False
+        self._subgraphs = None
+        self._encoded = EncodedGraph(graph)
+
+    @property
+    def version(self):
+        return self.graph.get('version', 0)
+
+    def namespace_subgraphs(self):
+        """네임스페이스별 부분 그래프. 항목(그래프 버전)마다 한 번만 계산합니다."""
+        if self._subgraphs is None:
+            self._subgraphs = partition_by_namespace(self.graph)
+        return self._subgraphs
+
+    def encoded(self, encoding='identity'):
+        """그래프를 encoding 으로 직렬화한 청크 목록. 인코딩마다 한 번만 만들어 모든 요청이 재사용합니다."""
+        return self._encoded.get(encoding)
+
+
+class GraphCache:
+    """뷰별 그래프 캐시.
+
+    캐시가 비었거나 무효화되면 build(resource_type) 를 별도 스레드에서 실행하며,
+    같은 뷰에 대한 동시 요청은 하나의 빌드 결과를 함께 기다립니다 (single-flight).
+    stale_while_revalidate 이면 무효화된 항목을 바로 돌려주고 백그라운드에서 다시 만듭니다.
+    빌드 도중에 무효화되면 그 결과는 변경 전 상태로 만든 것이므로 만료된 항목으로 저장해 다음 get 이 다시 만듭니다.
+    on_lookup(resource_type, result) 은 get 마다 'hit', 'stale', 'miss' 중 하나로 호출됩니다.
+    """
+
+    def __init__(self, build, stale_while_revalidate=False, max_workers=2, on_lookup=None):
+        self._build = build
+        self.stale_while_revalidate = stale_while_revalidate
+        self.on_lookup = on_lookup
+        self._entries = {}
+        self._in_flight = {}
+        # 무효화 세대: 전체 무효화 횟수와 뷰별 무효화 횟수. 빌드를 시작할 때의 값과 비교함
+        self._generation_all = 0
+        self._generations = {}
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='graph-build')
+
+    def peek(self, resource_type):
+        with self._lock:
+            return self._entries.get(resource_type)
+
+    def get(self, resource_type, timeout=None):
+        """캐시 항목을 반환합니다. 빌드가 필요하면 진행 중인 빌드를 기다리거나 새로 시작합니다."""
+        entry = self.peek(resource_type)
+        if entry is not None and not entry.stale:
+            self._record(resource_type, 'hit')
+            return entry
+        future = self.refresh(resource_type)
+        if entry is not None and self.stale_while_revalidate:
+            self._record(resource_type, 'stale')
+            return entry
+        self._record(resource_type, 'miss')
+        return future.result(timeout)
+
+    def _record(self, resource_type, result):
+        if self.on_lookup:
+            self.on_lookup(resource_type, result)
+
+    def refresh(self, resource_type):
+        """빌드를 시작하거나, 이미 진행 중이면 그 Future 를 반환합니다."""
+        with self._lock:
+            future = self._in_flight.get(resource_type)
+            if future is None:
+                future = self._executor.submit(self._run_build, resource_type)
+                self._in_flight[resource_type] = future
+            return future
+
+    def _generation(self, resource_type):
+        return self._generation_all, self._generations.get(resource_type, 0)
+
+    def put(self, resource_type, entry, generation=None):
+        """항목을 저장합니다. 이미 더 최신 그래프 버전이 있으면 덮어쓰지 않습니다.
+
+        generation 은 빌드를 시작할 때의 무효화 세대이며, 그 뒤에 무효화되었으면 항목을 만료된 것으로 저장합니다.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation(resource_type):
+                entry.stale = True
+            current = self._entries.get(resource_type)
+            if current is None or current.stale or entry.version >= current.version:
+                self._entries[resource_type] = entry
+
+    def evict(self, resource_type):
+        """항목을 캐시에서 지웁니다. 다음 get 은 새로 빌드합니다."""
+        with self._lock:
+            self._entries.pop(resource_type, None)
+
+    def invalidate(self, resource_type=None):
+        with self._lock:
+            if resource_type is None:
+                self._generation_all += 1
+            else:
+                self._generations[resource_type] = self._generations.get(resource_type, 0) + 1
+            for key, entry in self._entries.items():
+                if resource_type is None or key == resource_type:
+                    entry.stale = True
+
+    def _run_build(self, resource_type):
+        with self._lock:
+            generation = self._generation(resource_type)
+        try:
+            entry = self._build(resource_type)
+            self.put(resource_type, entry, generation)
+            return entry
+        finally:
+            with self._lock:
+                self._in_flight.pop(resource_type, None)
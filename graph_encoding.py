@@ -0,0 +1,109 @@
+import json
+import uuid
+import zlib
+from threading import Lock
+
+CHUNK_SIZE = 64 * 1024
+
+# HTTP Content-Encoding 별 zlib wbits (deflate 는 RFC 9110 에 따라 zlib 포맷)
+ENCODINGS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS,
+}
+
+# 서버가 다시 시작되면 그래프 버전 번호가 처음부터 다시 매겨지므로 ETag 에 인스턴스 id 를 포함
+INSTANCE_ID = uuid.uuid4().hex[:8]
+
+
+def negotiate_encoding(accept_encoding):
+    """Accept-Encoding 헤더에서 사용할 인코딩을 고릅니다 (gzip > deflate > identity). q=0 은 거부로 봅니다."""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return 'identity'
+
+
+def graph_etag(resource_type, version, encoding='identity'):
+    """그래프 버전으로 만든 ETag (따옴표 제외). 표현(인코딩)이 다르면 다른 ETag 가 되도록 인코딩을 덧붙입니다."""
+    etag = f"{resource_type}-{INSTANCE_ID}-{version}"
+    return etag if encoding == 'identity' else f"{etag}-{encoding}"
+
+
+def iter_graph_json(graph, chunk_size=CHUNK_SIZE):
+    """그래프를 JSON 으로 조금씩 직렬화합니다.
+
+    노드와 엣지를 하나씩 인코딩해 chunk_size 정도의 bytes 로 묶어 내보내므로,
+    전체 JSON 문자열을 한 번에 만들지 않습니다. nodes, edges 외의 키는 앞쪽에 씁니다.
+    """
+    dumps = json.JSONEncoder(separators=(',', ':'), sort_keys=True).encode
+    buffer = []
+    size = 0
+
+    def write(text):
+        nonlocal size
+        buffer.append(text)
+        size += len(text)
+
+    write('{')
+    for key, value in sorted(graph.items()):
+        if key not in ('nodes', 'edges'):
+            write(f"{dumps(key)}:{dumps(value)},")
+    for position, group in enumerate(('nodes', 'edges')):
+        write(f'"{group}":[' if position == 0 else f'],"{group}":[')
+        for index, element in enumerate(graph.get(group, ())):
+            if index:
+                write(',')
+            write(dumps(element))
+            if size >= chunk_size:
+                yield ''.join(buffer).encode()
+                buffer.clear()
+                size = 0
+    write(']}')
+    yield ''.join(buffer).encode()
+
+
+def encode_chunks(chunks, encoding):
+    """bytes 청크를 encoding 으로 압축하며 내보냅니다. identity 면 그대로 통과시킵니다."""
+    if encoding == 'identity':
+        yield from chunks
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, ENCODINGS[encoding])
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class EncodedGraph:
+    """그래프 한 버전을 인코딩별로 한 번만 직렬화/압축해 보관하고 모든 클라이언트가 재사용합니다."""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._encoded = {}
+        self._lock = Lock()
+
+    def get(self, encoding='identity'):
+        """인코딩된 청크 목록을 반환합니다. 동시에 처음 요청되면 한 번만 인코딩합니다."""
+        encoded = self._encoded.get(encoding)
+        if encoded is None:
+            with self._lock:
+                encoded = self._encoded.get(encoding)
+                if encoded is None:
+                    encoded = list(encode_chunks(iter_graph_json(self.graph), encoding))
+                    self._encoded[encoding] = encoded
+        return encoded
@@ -0,0 +1,369 @@
+from collections import defaultdict
+from threading import RLock
+
+from graph_versions import with_edge_ids
+from label_index import LabelIndex, matches_selector
+
+# 뷰(resource_type) -> 해당 뷰의 리소스 kind
+RESOURCE_KINDS = {
+    'deployment': 'deployments',
+    'pod': 'pods',
+    'podgroup': 'pods',  # 같은 라벨/소유자의 파드를 묶은 뷰 (aggregation.PodGroupGraph)
+}
+
+
+def format_ports(ports):
+    if ports:
+        return ', '.join([f"{p.get('protocol', 'TCP')}/{p.get('port', 'N/A')}" for p in ports])
+    return 'All Ports'
+
+
+def format_edge(edge):
+    """map_policies_to_resources 의 엣지를 Cytoscape 엣지로 변환합니다."""
+    edge_data = {
+        'source': edge['source'],
+        'target': edge['target'],
+        'type': edge['type'],
+        'label': f"{edge['type'].capitalize()} ({format_ports(edge.get('ports'))})"
+    }
+    if 'details' in edge:
+        edge_data['details'] = edge['details']
+    return {'data': edge_data}
+
+
+def format_node(node_id, label, group):
+    return {'data': {'id': node_id, 'label': label, 'group': group}}
+
+
+def ipblock_node(policy_key, ip_block):
+    return f"{policy_key}/ipBlock", f"IPBlock: {ip_block.get('cidr', 'N/A')}"
+
+
+def policy_types(spec):
+    """policyTypes 가 없으면 Ingress 는 항상, Egress 는 egress 규칙이 있을 때만 적용됩니다 (egress: [] 는 규칙 없음)."""
+    types = spec.get('policyTypes')
+    if types:
+        return set(types)
+    return {'Ingress', 'Egress'} if spec.get('egress') else {'Ingress'}
+
+
+def parse_policy(policy):
+    """정책 매니페스트를 (policy_key, entry) 로 풉니다.
+
+    entry['items'] 는 ('edge', ipBlock 엣지) 또는 ('peer', (podSelector, direction, ports)) 이며, 피어는 아직
+    리소스와 맞춰 보지 않은 상태입니다. selector/types 는 정책이 적용되는(격리하는) 리소스를 고르는 데 씁니다.
+    """
+    metadata = policy['metadata']
+    namespace = metadata['namespace']
+    policy_key = f"{namespace}/{metadata['name']}"
+    spec = policy.get('spec', {})
+    entry = {'label': metadata['name'], 'namespace': namespace, 'ipblocks': [], 'items': [],
+             'selector': spec.get('podSelector') or {}, 'types': policy_types(spec)}
+    for direction, field in (('ingress', 'from'), ('egress', 'to')):
+        for rule in spec.get(direction, []):
+            if 'ipBlock' in rule:
+                ip_block = rule['ipBlock']
+                ip_block_id, ip_block_label = ipblock_node(policy_key, ip_block)
+                entry['ipblocks'].append((ip_block_id, ip_block_label))
+                entry['items'].append(('edge', {
+                    'source': policy_key,
+                    'target': ip_block_id,
+                    'type': f"{direction}-ipBlock",
+                    'details': ip_block
+                }))
+            for peer in rule.get(field, []):
+                if 'namespaceSelector' not in peer and 'podSelector' not in peer:
+                    continue
+                if not matches_selector({'name': namespace}, peer.get('namespaceSelector', {})):
+                    continue
+                entry['items'].append(('peer', (peer.get('podSelector', {}), direction, rule.get('ports', []))))
+    return policy_key, entry
+
+
+def canonical_graph(graph_data):
+    """노드/엣지 순서와 무관하게 비교할 수 있도록 그래프를 정렬된 형태로 만듭니다."""
+    def edge_sort_key(edge):
+        data = edge['data']
+        return (data['source'], data['target'], data['type'], data['label'], repr(data.get('details')))
+    return {
+        'nodes': sorted(graph_data['nodes'], key=lambda node: node['data']['id']),
+        'edges': sorted(graph_data['edges'], key=edge_sort_key),
+    }
+
+
+class _Peer:
+    """정책 규칙의 from/to 항목 하나 (파드 셀렉터와 현재 일치하는 리소스 집합)."""
+
+    __slots__ = ('id', 'policy_key', 'namespace', 'selector', 'direction', 'ports', 'anchors', 'matches')
+
+    def __init__(self, peer_id, policy_key, namespace, selector, direction, ports):
+        self.id = peer_id
+        self.policy_key = policy_key
+        self.namespace = namespace
+        self.selector = selector
+        self.direction = direction
+        self.ports = ports
+        self.anchors = _selector_anchors(namespace, selector)
+        self.matches = set()
+
+
+def _selector_anchors(namespace, selector):
+    """셀렉터가 일치하려면 반드시 가져야 하는 라벨 조건(앵커)을 고릅니다.
+
+    ('pair', ns, key, value) / ('key', ns, key) / ('namespace', ns) 중 하나 이상을 반환하며,
+    리소스 라벨 변경 시 이 앵커로 다시 평가할 셀렉터만 추려냅니다.
+    """
+    for key, value in selector.get('matchLabels', {}).items():
+        return [('pair', namespace, key, value)]
+    for expression in selector.get('matchExpressions', []):
+        if expression.get('operator') == 'In':
+            return [('pair', namespace, expression.get('key'), value) for value in expression.get('values') or []]
+    for expression in selector.get('matchExpressions', []):
+        if expression.get('operator') == 'Exists':
+            return [('key', namespace, expression.get('key'))]
+    return [('namespace', namespace)]
+
+
+class IncrementalGraph:
+    """정책/리소스 변경을 객체 단위로 반영하는 그래프 엔진.
+
+    결과는 build_graph_data 로 전체를 다시 만든 그래프와 같으며 (canonical_graph 기준),
+    정책이 바뀌면 그 정책의 엣지만, 리소스가 바뀌면 그 리소스의 이전/현재 라벨과
+    관련된 셀렉터만 다시 평가합니다.
+    """
+
+    def __init__(self, resource_type):
+        self.resource_type = resource_type
+        self.resource_kind = RESOURCE_KINDS[resource_type]
+        self._lock = RLock()
+        self._reset()
+
+    def _reset(self):
+        self._policies = {}  # policy_key -> parse_policy 의 entry (피어는 peer_id)
+        self._resources = {}  # resource_key -> label
+        self._index = LabelIndex()
+        self._peers = {}  # peer_id -> _Peer
+        self._anchored = defaultdict(set)  # anchor -> peer_id 집합
+        self._resource_peers = defaultdict(set)  # resource_key -> 일치하는 peer_id 집합
+        self._next_peer_id = 0
+
+    def load(self, policies, resources):
+        """전체 목록으로 엔진 상태를 초기화합니다."""
+        with self._lock:
+            self._reset()
+            for resource in resources.get('items', []):
+                self.upsert_resource(resource)
+            for policy in policies.get('items', []):
+                self.upsert_policy(policy)
+
+    def apply(self, kind, event_type, obj):
+        """informer 이벤트 하나를 반영합니다. 그래프가 바뀌었으면 True 를 반환합니다."""
+        if kind == 'networkpolicies':
+            if event_type == 'DELETED':
+                return self.delete_policy(obj)
+            return self.upsert_policy(obj)
+        if kind == self.resource_kind:
+            if event_type == 'DELETED':
+                return self.delete_resource(obj)
+            return self.upsert_resource(obj)
+        return False
+
+    # 정책
+    def upsert_policy(self, policy):
+        policy_key, entry = parse_policy(policy)
+        with self._lock:
+            self._remove_policy(policy_key)
+            entry['items'] = [(kind, self._add_peer(policy_key, entry['namespace'], *item) if kind == 'peer' else item)
+                              for kind, item in entry['items']]
+            self._policies[policy_key] = entry
+            return True
+
+    def delete_policy(self, policy):
+        metadata = policy['metadata']
+        with self._lock:
+            return self._remove_policy(f"{metadata['namespace']}/{metadata['name']}")
+
+    def _remove_policy(self, policy_key):
+        entry = self._policies.pop(policy_key, None)
+        if entry is None:
+            return False
+        for kind, item in entry['items']:
+            if kind == 'peer':
+                self._remove_peer(item)
+        return True
+
+    def _add_peer(self, policy_key, namespace, selector, direction, ports):
+        peer = _Peer(self._next_peer_id, policy_key, namespace, selector, direction, ports)
+        self._next_peer_id += 1
+        self._peers[peer.id] = peer
+        for anchor in peer.anchors:
+            self._anchored[anchor].add(peer.id)
+        for resource_key in self._index.select(namespace, selector):
+            peer.matches.add(resource_key)
+            self._resource_peers[resource_key].add(peer.id)
+        return peer.id
+
+    def _remove_peer(self, peer_id):
+        peer = self._peers.pop(peer_id)
+        for anchor in peer.anchors:
+            self._anchored[anchor].discard(peer_id)
+            if not self._anchored[anchor]:
+                del self._anchored[anchor]
+        for resource_key in peer.matches:
+            self._resource_peers[resource_key].discard(peer_id)
+
+    # 리소스
+    def upsert_resource(self, resource):
+        metadata = resource['metadata']
+        namespace = metadata['namespace']
+        resource_key = f"{namespace}/{metadata['name']}"
+        labels = metadata.get('labels') or {}
+        with self._lock:
+            old_labels = self._index.labels(resource_key)
+            if old_labels is not None and old_labels == labels:
+                return False
+            self._resources[resource_key] = f"{metadata['name']}.{namespace}"
+            self._index.add(resource_key, namespace, labels)
+            for peer_id in self._candidate_peers(namespace, old_labels or {}, labels):
+                peer = self._peers[peer_id]
+                if matches_selector(labels, peer.selector):
+                    peer.matches.add(resource_key)
+                    self._resource_peers[resource_key].add(peer_id)
+                else:
+                    peer.matches.discard(resource_key)
+                    self._resource_peers[resource_key].discard(peer_id)
+            return True
+
+    def delete_resource(self, resource):
+        metadata = resource['metadata']
+        resource_key = f"{metadata['namespace']}/{metadata['name']}"
+        with self._lock:
+            if resource_key not in self._resources:
+                return False
+            del self._resources[resource_key]
+            self._index.remove(resource_key)
+            for peer_id in self._resource_peers.pop(resource_key, ()):
+                self._peers[peer_id].matches.discard(resource_key)
+            return True
+
+    def _candidate_peers(self, namespace, old_labels, new_labels):
+        candidates = set(self._anchored.get(('namespace', namespace), ()))
+        for labels in (old_labels, new_labels):
+            for key, value in labels.items():
+                candidates |= self._anchored.get(('pair', namespace, key, value), set())
+                candidates |= self._anchored.get(('key', namespace, key), set())
+        return candidates
+
+    def resource_labels(self, resource_key):
+        with self._lock:
+            return self._index.labels(resource_key)
+
+    # 출력
+    def graph(self):
+        """현재 상태를 build_graph_data 와 같은 형식의 그래프 데이터로 반환합니다."""
+        with self._lock:
+            nodes = {}
+            edges = []
+            for policy_key, entry in self._policies.items():
+                nodes[policy_key] = format_node(policy_key, entry['label'], 'policy')
+            for resource_key, label in self._resources.items():
+                nodes[resource_key] = format_node(resource_key, label, self.resource_type)
+            for policy_key, entry in self._policies.items():
+                for node_id, label in entry['ipblocks']:
+                    nodes[node_id] = format_node(node_id, label, 'ipblock')
+                self._policy_edges(policy_key, entry, self._peer_matches, edges)
+            return {'nodes': list(nodes.values()), 'edges': edges}
+
+    def _peer_matches(self, peer_id):
+        peer = self._peers[peer_id]
+        return peer.direction, peer.ports, peer.matches
+
+    def _policy_edges(self, policy_key, entry, peer_matches, edges):
+        """정책 하나의 엣지를 edges 에 덧붙입니다. peer_matches(item) 은 (direction, ports, 일치하는 리소스 키) 를 반환합니다."""
+        for kind, item in entry['items']:
+            if kind == 'edge':
+                edges.append(format_edge(item))
+                continue
+            direction, ports, matches = peer_matches(item)
+            for resource_key in sorted(matches):
+                edges.append(format_edge({
+                    'source': policy_key,
+                    'target': resource_key,
+                    'type': direction,
+                    'ports': ports
+                }))
+        return edges
+
+    # 시뮬레이션 (상태를 바꾸지 않고 후보 정책의 영향을 계산)
+    def _policy_elements(self, policy_key, entry, candidate=False):
+        """정책 하나의 노드(정책, ipBlock)와 id 를 붙인 엣지. candidate 면 피어를 지금 라벨 색인으로 평가합니다."""
+        if candidate:
+            def peer_matches(item):
+                selector, direction, ports = item
+                return direction, ports, self._index.select(entry['namespace'], selector)
+        else:
+            peer_matches = self._peer_matches
+        nodes = [format_node(policy_key, entry['label'], 'policy')]
+        nodes.extend(format_node(node_id, label, 'ipblock') for node_id, label in entry['ipblocks'])
+        return {node['data']['id']: node for node in nodes}, with_edge_ids(self._policy_edges(policy_key, entry, peer_matches, []))
+
+    def _selected(self, entry):
+        """정책의 spec.podSelector 가 고르는 (격리하는) 리소스. 빈 셀렉터는 네임스페이스의 모든 리소스입니다."""
+        if not entry['selector']:
+            return set(self._index.keys(entry['namespace']))
+        return set(self._index.select(entry['namespace'], entry['selector']))
+
+    def simulate(self, policies=(), deleted=()):
+        """policies 를 추가/교체하고 deleted(policy_key) 를 지웠을 때의 그래프 변경분을 계산합니다.
+
+        후보 정책의 셀렉터만 라벨 색인으로 평가하고, 격리 여부는 후보가 고르는 리소스에 대해서만 같은
+        네임스페이스의 다른 정책과 함께 따집니다. 없는 정책을 지우려 하면 KeyError.
+        """
+        with self._lock:
+            candidates = {}
+            for policy in policies:
+                policy_key, entry = parse_policy(policy)
+                candidates[policy_key] = entry
+            for policy_key in deleted:
+                if policy_key not in self._policies:
+                    raise KeyError(policy_key)
+                candidates[policy_key] = None
+
+            result = {
+                'policies': {'added': [], 'replaced': [], 'deleted': []},
+                'added': {'nodes': [], 'edges': []},
+                'removed': {'nodes': [], 'edges': []},
+                'isolated': {'ingress': [], 'egress': []},
+                'unisolated': {'ingress': [], 'egress': []},
+            }
+            targets = defaultdict(set)  # namespace -> 격리 여부가 바뀔 수 있는 리소스
+            for policy_key, entry in candidates.items():
+                old = self._policies.get(policy_key)
+                result['policies']['deleted' if entry is None else 'replaced' if old else 'added'].append(policy_key)
+                old_nodes, old_edges = self._policy_elements(policy_key, old) if old else ({}, [])
+                new_nodes, new_edges = self._policy_elements(policy_key, entry, candidate=True) if entry else ({}, [])
+                for group, before, after in (('nodes', old_nodes, new_nodes),
+                                             ('edges', {e['data']['id']: e for e in old_edges}, {e['data']['id']: e for e in new_edges})):
+                    result['added'][group].extend(element for element_id, element in after.items() if element_id not in before)
+                    result['removed'][group].extend(element_id for element_id in before if element_id not in after)
+                for version in (old, entry):
+                    if version:
+                        targets[version['namespace']] |= self._selected(version)
+
+            for namespace, resources in targets.items():
+                for direction, policy_type in (('ingress', 'Ingress'), ('egress', 'Egress')):
+                    before = set()
+                    after = set()
+                    for policy_key, entry in self._policies.items():
+                        if entry['namespace'] != namespace or policy_type not in entry['types']:
+                            continue
+                        selected = resources & self._selected(entry)
+                        before |= selected
+                        if policy_key not in candidates:
+                            after |= selected
+                    for entry in candidates.values():
+                        if entry and entry['namespace'] == namespace and policy_type in entry['types']:
+                            after |= resources & self._selected(entry)
+                    result['isolated'][direction].extend(sorted(after - before))
+                    result['unisolated'][direction].extend(sorted(before - after))
+            return result
@@ -0,0 +1,156 @@
+import re
+
+from label_index import matches_selector
+
+_SET_EXPRESSION = re.compile(r'^\s*([\w./-]+)\s+(in|notin)\s+\(([^)]*)\)\s*$')
+
+
+class SelectorParseError(ValueError):
+    """labelSelector 문자열을 해석할 수 없는 경우."""
+
+
+def _split_requirements(text):
+    """쉼표로 요구 조건을 나눕니다. 괄호 안의 쉼표(in/notin 값 목록)는 나누지 않습니다."""
+    requirements = []
+    depth = 0
+    current = ''
+    for char in text:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        if char == ',' and depth == 0:
+            requirements.append(current)
+            current = ''
+        else:
+            current += char
+    requirements.append(current)
+    return [requirement.strip() for requirement in requirements if requirement.strip()]
+
+
+def parse_label_selector(text):
+    """kubectl -l 형식의 셀렉터 문자열을 matchLabels/matchExpressions 셀렉터로 변환합니다.
+
+    지원: key=value, key==value, key!=value, key in (a,b), key notin (a,b), key, !key
+    """
+    selector = {'matchLabels': {}, 'matchExpressions': []}
+    for requirement in _split_requirements(text):
+        match = _SET_EXPRESSION.match(requirement)
+        if match:
+            key, operator, values = match.groups()
+            selector['matchExpressions'].append({
+                'key': key,
+                'operator': 'In' if operator == 'in' else 'NotIn',
+                'values': [value.strip() for value in values.split(',') if value.strip()]
+            })
+        elif '!=' in requirement:
+            key, value = requirement.split('!=', 1)
+            selector['matchExpressions'].append({'key': key.strip(), 'operator': 'NotIn', 'values': [value.strip()]})
+        elif '=' in requirement:
+            key, value = requirement.replace('==', '=', 1).split('=', 1)
+            selector['matchLabels'][key.strip()] = value.strip()
+        elif requirement.startswith('!'):
+            selector['matchExpressions'].append({'key': requirement[1:].strip(), 'operator': 'DoesNotExist'})
+        elif re.match(r'^[\w./-]+$', requirement):
+            selector['matchExpressions'].append({'key': requirement, 'operator': 'Exists'})
+        else:
+            raise SelectorParseError(f"Invalid label selector requirement: {requirement!r}")
+    return selector
+
+
+def node_namespace(node_id):
+    return node_id.split('/', 1)[0]
+
+
+def partition_by_namespace(graph):
+    """그래프를 네임스페이스별 부분 그래프로 나눕니다.
+
+    각 부분 그래프에는 그 네임스페이스의 노드, 그 노드에 닿는 엣지, 그리고 엣지 건너편의
+    다른 네임스페이스 노드(cross-namespace peer)가 포함됩니다.
+    """
+    nodes_by_id = {node['data']['id']: node for node in graph['nodes']}
+    subgraphs = {}
+
+    def subgraph(namespace):
+        if namespace not in subgraphs:
+            subgraphs[namespace] = {'nodes': {}, 'edges': {}}
+        return subgraphs[namespace]
+
+    for node_id, node in nodes_by_id.items():
+        subgraph(node_namespace(node_id))['nodes'][node_id] = node
+    for edge in graph['edges']:
+        data = edge['data']
+        for namespace in {node_namespace(data['source']), node_namespace(data['target'])}:
+            part = subgraph(namespace)
+            part['edges'][data['id']] = edge
+            for endpoint in (data['source'], data['target']):
+                if endpoint in nodes_by_id:
+                    part['nodes'][endpoint] = nodes_by_id[endpoint]
+    return subgraphs
+
+
+def filter_patch(patch, namespaces):
+    """patch 에서 namespaces 의 노드와 그 노드에 닿는 엣지(건너편 노드 포함)만 남깁니다 (partition_by_namespace 와 같은 기준).
+
+    삭제된 id 는 클라이언트가 모르는 id 를 무시하므로 그대로 둡니다.
+    """
+    namespaces = set(namespaces)
+
+    def touches(edge):
+        data = edge['data']
+        return node_namespace(data['source']) in namespaces or node_namespace(data['target']) in namespaces
+
+    filtered = dict(patch)
+    endpoints = set()
+    for part in ('added', 'changed'):
+        edges = [edge for edge in patch[part]['edges'] if touches(edge)]
+        endpoints.update(endpoint for edge in edges for endpoint in (edge['data']['source'], edge['data']['target']))
+        filtered[part] = {'edges': edges}
+    for part in ('added', 'changed'):
+        filtered[part]['nodes'] = [node for node in patch[part]['nodes']
+                                   if node_namespace(node['data']['id']) in namespaces or node['data']['id'] in endpoints]
+    if 'positions' in patch:
+        filtered['positions'] = {node_id: position for node_id, position in patch['positions'].items()
+                                 if node_namespace(node_id) in namespaces or node_id in endpoints}
+    return filtered
+
+
+def merge_subgraphs(subgraphs, namespaces):
+    nodes = {}
+    edges = {}
+    for namespace in namespaces:
+        part = subgraphs.get(namespace)
+        if part:
+            nodes.update(part['nodes'])
+            edges.update(part['edges'])
+    return {'nodes': list(nodes.values()), 'edges': list(edges.values())}
+
+
+def filter_by_labels(graph, selector, labels_of):
+    """셀렉터와 일치하는 리소스 노드, 그 노드로 향하는 엣지와 정책 노드만 남깁니다."""
+    kept = set()
+    for node in graph['nodes']:
+        data = node['data']
+        if data['group'] not in ('policy', 'ipblock') and matches_selector(labels_of(data['id']) or {}, selector):
+            kept.add(data['id'])
+    edges = [edge for edge in graph['edges'] if edge['data']['target'] in kept]
+    kept.update(edge['data']['source'] for edge in edges)
+    return {'nodes': [node for node in graph['nodes'] if node['data']['id'] in kept], 'edges': edges}
+
+
+def paginate(graph, offset, limit):
+    """노드를 id 순으로 limit 개씩 나눕니다.
+
+    엣지는 두 끝점 중 뒤쪽 노드가 포함된 페이지에 한 번만 실리므로, 페이지를 차례로 합치면 전체 그래프가 됩니다.
+    다음 페이지가 없으면 next_offset 은 None 입니다.
+    """
+    nodes = sorted(graph['nodes'], key=lambda node: node['data']['id'])
+    position = {node['data']['id']: index for index, node in enumerate(nodes)}
+    end = min(offset + limit, len(nodes))
+    edges = []
+    for edge in graph['edges']:
+        data = edge['data']
+        last = max(position.get(data['source'], -1), position.get(data['target'], -1))
+        if offset <= last < end:
+            edges.append(edge)
+    return {'nodes': nodes[offset:end], 'edges': edges}, (end if end < len(nodes) else None)
@@ -0,0 +1,90 @@
+from collections import deque
+from threading import Lock
+
+PATCH_HISTORY_SIZE = 50
+
+
+def edge_id(data):
+    return f"{data['source']}->{data['target']}:{data['type']}:{data['label']}"
+
+
+def with_edge_ids(edges):
+    """엣지마다 안정적인 id 를 붙입니다. 같은 내용의 엣지가 여러 개면 '#n' 을 덧붙입니다."""
+    seen = {}
+    result = []
+    for edge in edges:
+        data = edge['data']
+        base_id = edge_id(data)
+        count = seen.get(base_id, 0)
+        seen[base_id] = count + 1
+        result.append({'data': dict(data, id=base_id if count == 0 else f"{base_id}#{count}")})
+    return result
+
+
+class VersionedGraph:
+    """뷰 하나의 그래프를 버전 번호와 함께 보관하고, 갱신 시 변경분(patch)을 계산합니다."""
+
+    def __init__(self, resource_type, history_size=PATCH_HISTORY_SIZE):
+        self.resource_type = resource_type
+        self.version = 0
+        self._nodes = {}
+        self._edges = {}
+        self._patches = deque(maxlen=history_size)
+        self._lock = Lock()
+
+    def update(self, graph_data):
+        """새 그래프를 반영합니다. 바뀐 것이 있으면 patch 를, 없으면 None 을 반환합니다."""
+        nodes = {node['data']['id']: node for node in graph_data['nodes']}
+        edges = {edge['data']['id']: edge for edge in with_edge_ids(graph_data['edges'])}
+        with self._lock:
+            patch = {
+                'resource_type': self.resource_type,
+                'base_version': self.version,
+                'added': {'nodes': [], 'edges': []},
+                'removed': {'nodes': [], 'edges': []},
+                'changed': {'nodes': [], 'edges': []},
+            }
+            for group, old, new in (('nodes', self._nodes, nodes), ('edges', self._edges, edges)):
+                for element_id, element in new.items():
+                    previous = old.get(element_id)
+                    if previous is None:
+                        patch['added'][group].append(element)
+                    elif previous != element:
+                        patch['changed'][group].append(element)
+                patch['removed'][group] = [element_id for element_id in old if element_id not in new]
+
+            if not any(patch[part][group] for part in ('added', 'removed', 'changed') for group in ('nodes', 'edges')):
+                return None
+            self.version += 1
+            patch['version'] = self.version
+            self._nodes = nodes
+            self._edges = edges
+            self._patches.append(patch)
+            return patch
+
+    def clear(self):
+        """그래프와 patch 기록을 비웁니다. 버전은 하나 올려, 이전 버전을 가진 클라이언트가 전체 스냅샷을 다시 받게 합니다."""
+        with self._lock:
+            self._nodes = {}
+            self._edges = {}
+            self._patches.clear()
+            self.version += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'resource_type': self.resource_type,
+                'version': self.version,
+                'nodes': list(self._nodes.values()),
+                'edges': list(self._edges.values()),
+            }
+
+    def patches_since(self, version):
+        """version 이후의 patch 목록을 반환합니다. 기록이 없어 이어 붙일 수 없으면 None."""
+        with self._lock:
+            if version == self.version:
+                return []
+            patches = [patch for patch in self._patches if patch['base_version'] >= version]
+            if not patches or patches[0]['base_version'] != version:
+                return None
+            return patches
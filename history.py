@@ -0,0 +1,318 @@
+"""객체 변경 이력을 디스크에 쌓아 두고 임의의 시점의 클러스터 상태를 다시 만드는 저장소.
+
+디렉터리에는 체크포인트 하나와 그 뒤의 변경 기록이 한 묶음(세그먼트)으로 저장됩니다.
+
+    <ms>.checkpoint.json.gz  그 시점의 전체 객체 (kind -> key -> 객체)
+    <ms>.log.gz              체크포인트 이후의 변경 기록 (JSON 한 줄에 하나, 몇 개씩 묶은 gzip 멤버를 이어 붙임)
+
+변경 기록은 ADDED 면 객체 전체, MODIFIED 면 이전 객체와의 차이(delta), DELETED 면 key 만 담습니다.
+checkpoint_every 개와 현재 객체 수 중 큰 쪽만큼 기록할 때마다 새 체크포인트를 씁니다. 체크포인트 쓰기 비용이
+기록 수에 비례하게 되고, 어떤 시점이든 체크포인트 하나와 그 뒤의 (그만큼 이하의) 기록만 다시 적용하면 됩니다.
+retention_seconds 보다 오래되었거나 max_bytes 를 넘는 세그먼트는 오래된 것부터 지웁니다.
+"""
+import copy
+import gzip
+import json
+import math
+import os
+import time
+import zlib
+from datetime import datetime, timezone
+from threading import Lock
+
+from informer import object_key
+
+CHECKPOINT_EVERY = 5000
+FLUSH_EVERY = 256
+FLUSH_SECONDS = 1.0
+RETENTION_SECONDS = 7 * 24 * 3600
+
+_CHECKPOINT_SUFFIX = '.checkpoint.json.gz'
+_LOG_SUFFIX = '.log.gz'
+_EVENT_CODES = {'ADDED': 'A', 'MODIFIED': 'M', 'DELETED': 'D'}
+_EVENT_NAMES = {code: name for name, code in _EVENT_CODES.items()}
+
+
+def diff_objects(old, new):
+    """old 를 new 로 바꾸는 delta: {'set': [[경로, 값], ...], 'unset': [경로, ...]}. dict 만 재귀로 비교하고 목록은 통째로 바꿉니다."""
+    delta = {'set': [], 'unset': []}
+
+    def walk(path, a, b):
+        for key, value in b.items():
+            if key not in a:
+                delta['set'].append([path + [key], value])
+            elif a[key] != value:
+                if isinstance(a[key], dict) and isinstance(value, dict):
+                    walk(path + [key], a[key], value)
+                else:
+                    delta['set'].append([path + [key], value])
+        delta['unset'].extend(path + [key] for key in a if key not in b)
+
+    walk([], old, new)
+    return delta
+
+
+def apply_delta(obj, delta):
+    """obj 에 delta 를 적용한 새 객체를 반환합니다 (obj 는 바꾸지 않음)."""
+    result = copy.deepcopy(obj)
+    for path, value in delta['set']:
+        target = result
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = value
+    for path in delta['unset']:
+        target = result
+        for key in path[:-1]:
+            target = target.get(key, {})
+        target.pop(path[-1], None)
+    return result
+
+
+def parse_timestamp(value):
+    """유닉스 시각(초) 또는 ISO 8601 문자열을 유닉스 시각으로 바꿉니다. 시간대가 없으면 UTC 로 봅니다. 형식이 틀리면 ValueError."""
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        # inf, nan 은 시각이 아님 (state_at 에서 오류가 나지 않도록 여기서 거름)
+        if not math.isfinite(seconds):
+            raise ValueError(f"Not a finite timestamp: {value!r}")
+        return seconds
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _read_log(path):
+    """로그 파일의 기록 목록과, 온전한 gzip 멤버가 끝나는 위치(bytes)를 반환합니다.
+
+    쓰다 만 마지막 멤버(비정상 종료)는 CRC 확인을 통과하지 못하므로 그 앞까지만 읽습니다.
+    """
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, 'rb') as f:
+        data = f.read()
+    records = []
+    valid = 0
+    while valid < len(data):
+        decompressor = zlib.decompressobj(wbits=31)
+        try:
+            text = decompressor.decompress(data[valid:])
+        except zlib.error:
+            break
+        if not decompressor.eof:
+            break
+        records.extend(json.loads(line) for line in text.splitlines() if line.strip())
+        valid = len(data) - len(decompressor.unused_data)
+    return records, valid
+
+
+def _replay(state, record):
+    objects = state.setdefault(record['k'], {})
+    event = record['e']
+    if event == 'A':
+        objects[record['key']] = record['o']
+    elif event == 'M':
+        objects[record['key']] = apply_delta(objects.get(record['key'], {}), record['d'])
+    else:
+        objects.pop(record['key'], None)
+
+
+class HistoryLog:
+    """그래프에 영향을 주는 객체 변경을 디스크에 시간순으로 쌓고, 임의 시점의 상태와 두 시점 사이의 변경을 돌려줍니다.
+
+    같은 디렉터리로 다시 열면 마지막 체크포인트와 기록으로 현재 상태를 복원해 이어서 기록합니다.
+    """
+
+    def __init__(self, directory, checkpoint_every=CHECKPOINT_EVERY, retention_seconds=RETENTION_SECONDS,
+                 max_bytes=None, flush_every=FLUSH_EVERY, flush_seconds=FLUSH_SECONDS, clock=time.time):
+        self.directory = directory
+        self.checkpoint_every = checkpoint_every
+        self.retention_seconds = retention_seconds
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self._clock = clock
+        self._lock = Lock()
+        self._buffer = []
+        self._last_flush = clock()
+        self._cached = (None, None)  # 마지막으로 읽은 (체크포인트 시각, 상태)
+        os.makedirs(directory, exist_ok=True)
+
+        checkpoints = self.checkpoints()
+        if checkpoints:
+            self._segment = checkpoints[-1]
+            self._state = self._load_checkpoint(self._segment)
+            records, valid = _read_log(self._log_path(self._segment))
+            for record in records:
+                _replay(self._state, record)
+            self._since_checkpoint = len(records)
+            self._object_count = sum(len(objects) for objects in self._state.values())
+            if os.path.exists(self._log_path(self._segment)):
+                # 잘린 꼬리 뒤에 이어 쓰면 그 뒤의 기록을 읽을 수 없으므로 잘라 냄
+                os.truncate(self._log_path(self._segment), valid)
+        else:
+            self._state = {}
+            self._object_count = 0
+            self._write_checkpoint(self._millis(clock()))
+
+    @staticmethod
+    def _millis(timestamp):
+        return int(timestamp * 1000)
+
+    def _checkpoint_path(self, millis):
+        return os.path.join(self.directory, f"{millis:015d}{_CHECKPOINT_SUFFIX}")
+
+    def _log_path(self, millis):
+        return os.path.join(self.directory, f"{millis:015d}{_LOG_SUFFIX}")
+
+    def checkpoints(self):
+        """디스크에 있는 체크포인트 시각(밀리초) 목록, 오래된 것부터."""
+        return sorted(int(name[:-len(_CHECKPOINT_SUFFIX)]) for name in os.listdir(self.directory)
+                      if name.endswith(_CHECKPOINT_SUFFIX))
+
+    def _load_checkpoint(self, millis):
+        with gzip.open(self._checkpoint_path(millis), 'rt', encoding='utf-8') as f:
+            return json.load(f)['objects']
+
+    def _write_checkpoint(self, millis):
+        path = self._checkpoint_path(millis)
+        # json.dump 은 파일에 조금씩 쓰느라 C 인코더를 쓰지 못하므로 한 번에 직렬화해 씀
+        payload = json.dumps({'time': millis / 1000, 'objects': self._state}, separators=(',', ':'))
+        with gzip.open(path + '.tmp', 'wb', compresslevel=6) as f:
+            f.write(payload.encode('utf-8'))
+        os.replace(path + '.tmp', path)
+        self._segment = millis
+        self._since_checkpoint = 0
+
+    def record(self, kind, event_type, obj, timestamp=None):
+        """변경 하나를 기록합니다. 저장된 상태와 같은 객체(재시작 후의 relist 등)는 건너뜁니다."""
+        if event_type not in _EVENT_CODES:
+            return
+        key = object_key(obj)
+        with self._lock:
+            objects = self._state.setdefault(kind, {})
+            old = objects.get(key)
+            # 체크포인트 시각이 같은 밀리초를 피해 늘어났을 수 있으므로 기록 시각은 현재 세그먼트의 시작 이후로 둠
+            # (state_at 은 체크포인트 시각으로 세그먼트를 고름)
+            now = self._clock() if timestamp is None else timestamp
+            entry = {'t': max(now, self._segment / 1000), 'k': kind, 'key': key}
+            if event_type == 'DELETED':
+                if old is None:
+                    return
+                entry['e'] = 'D'
+                del objects[key]
+                self._object_count -= 1
+            elif old is None:
+                entry['e'] = 'A'
+                entry['o'] = objects[key] = obj
+                self._object_count += 1
+            else:
+                delta = diff_objects(old, obj)
+                if not delta['set'] and not delta['unset']:
+                    return
+                entry['e'] = 'M'
+                entry['d'] = delta
+                objects[key] = obj
+            self._buffer.append(entry)
+            self._since_checkpoint += 1
+            if len(self._buffer) >= self.flush_every or entry['t'] - self._last_flush >= self.flush_seconds:
+                self._flush()
+            # 체크포인트 비용은 객체 수에 비례하므로 간격도 객체 수 이상으로 둠 (기록 하나당 쓰기 비용이 일정)
+            if self._since_checkpoint >= max(self.checkpoint_every, self._object_count):
+                self._flush()
+                # 같은 밀리초에 체크포인트가 둘 생기면 이전 세그먼트를 덮어쓰므로 시각을 하나 늘림
+                self._write_checkpoint(max(self._millis(entry['t']), self._segment + 1))
+                self._prune(entry['t'])
+
+    def reconcile(self, kind, keys, timestamp=None):
+        """kind 의 전체 목록(keys)을 받은 뒤 호출합니다. 기록에는 있지만 목록에 없는 객체(서버가 꺼져 있는 동안 지워진 것)를 삭제로 기록합니다."""
+        keys = set(keys)
+        with self._lock:
+            gone = [obj for key, obj in self._state.get(kind, {}).items() if key not in keys]
+        for obj in gone:
+            self.record(kind, 'DELETED', obj, timestamp)
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            lines = ''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in self._buffer)
+            # 이어 붙인 gzip 멤버도 하나의 gzip 스트림으로 읽힘
+            with open(self._log_path(self._segment), 'ab') as f:
+                f.write(gzip.compress(lines.encode('utf-8')))
+            self._buffer = []
+        self._last_flush = self._clock()
+
+    def _prune(self, now):
+        """보존 기간이 지났거나 용량 한도를 넘은 세그먼트를 오래된 것부터 지웁니다 (현재 세그먼트는 남김)."""
+        segments = self.checkpoints()[:-1]
+        sizes = {millis: self._segment_bytes(millis) for millis in segments}
+        total = sum(sizes.values()) + self._segment_bytes(self._segment)
+        for index, millis in enumerate(segments):
+            # 이 세그먼트는 다음 체크포인트 직전까지의 상태를 담음
+            segment_end = (segments[index + 1] if index + 1 < len(segments) else self._segment) / 1000
+            expired = now - segment_end > self.retention_seconds
+            if not expired and (self.max_bytes is None or total <= self.max_bytes):
+                break
+            for path in (self._checkpoint_path(millis), self._log_path(millis)):
+                if os.path.exists(path):
+                    os.remove(path)
+            total -= sizes[millis]
+
+    def _segment_bytes(self, millis):
+        return sum(os.path.getsize(path) for path in (self._checkpoint_path(millis), self._log_path(millis))
+                   if os.path.exists(path))
+
+    def disk_bytes(self):
+        return sum(self._segment_bytes(millis) for millis in self.checkpoints())
+
+    def oldest(self):
+        """다시 만들 수 있는 가장 이른 시각 (초)."""
+        checkpoints = self.checkpoints()
+        return checkpoints[0] / 1000 if checkpoints else None
+
+    def state_at(self, timestamp):
+        """timestamp 시점의 객체 상태 (kind -> key -> 객체). 기록이 남아 있지 않은 시점이면 None."""
+        self.flush()
+        millis = self._millis(timestamp)
+        candidates = [checkpoint for checkpoint in self.checkpoints() if checkpoint <= millis]
+        if not candidates:
+            return None
+        checkpoint = candidates[-1]
+        with self._lock:
+            cached_checkpoint, cached_state = self._cached
+        if cached_checkpoint != checkpoint:
+            cached_state = self._load_checkpoint(checkpoint)
+            with self._lock:
+                self._cached = (checkpoint, cached_state)
+        # 체크포인트 사본에 기록을 적용 (객체는 바꾸지 않고 교체만 하므로 kind 별 dict 만 복사)
+        state = {kind: dict(objects) for kind, objects in cached_state.items()}
+        for record in _read_log(self._log_path(checkpoint))[0]:
+            if record['t'] > timestamp:
+                break
+            _replay(state, record)
+        return state
+
+    def changes(self, start, end, limit=None):
+        """start 이후 end 까지의 변경 목록 [{'time', 'kind', 'event', 'key'}], 시간순."""
+        self.flush()
+        checkpoints = self.checkpoints()
+        first = max([checkpoint for checkpoint in checkpoints if checkpoint <= self._millis(start)], default=None)
+        result = []
+        for checkpoint in checkpoints:
+            if (first is not None and checkpoint < first) or checkpoint > self._millis(end):
+                continue
+            for record in _read_log(self._log_path(checkpoint))[0]:
+                if record['t'] <= start:
+                    continue
+                if record['t'] > end:
+                    break
+                result.append({'time': record['t'], 'kind': record['k'], 'event': _EVENT_NAMES[record['e']], 'key': record['key']})
+                if limit is not None and len(result) >= limit:
+                    return result
+        return result
@@ -0,0 +1,209 @@
+import json
+from threading import Lock
+from urllib.parse import urlencode
+
+from change_detection import ChangeSet, graph_changed, object_version
+from fetcher import SubprocessRunner, read_list, trim_object
+
+# kind -> Kubernetes API 경로 (kubectl get --raw 로 list/watch 호출)
+API_PATHS = {
+    'networkpolicies': '/apis/networking.k8s.io/v1/networkpolicies',
+    'pods': '/api/v1/pods',
+    'deployments': '/apis/apps/v1/deployments',
+    'namespaces': '/api/v1/namespaces',
+}
+
+WATCH_TIMEOUT_SECONDS = 300
+
+
+class ResourceExpired(Exception):
+    """watch 중 410 Gone 을 받아 다시 list 해야 하는 경우."""
+
+
+def object_key(obj):
+    metadata = obj.get('metadata', {})
+    namespace = metadata.get('namespace')
+    name = metadata.get('name')
+    return f"{namespace}/{name}" if namespace else name
+
+
+class ObjectStore:
+    """resourceVersion 을 추적하는 스레드 안전 로컬 객체 저장소.
+
+    kind 를 알면 객체마다 (uid, resourceVersion, 그래프 필드)를 기억해 두고, 그래프 필드가 그대로인 갱신은
+    저장만 하고 변경으로 알리지 않습니다 (change_detection).
+    """
+
+    def __init__(self, kind=None):
+        self.kind = kind
+        self._objects = {}
+        self._versions = {}
+        self._lock = Lock()
+        self.resource_version = None
+        self.synced = False
+        self.ignored_updates = 0
+
+    def __len__(self):
+        return len(self._objects)
+
+    def get(self, key):
+        with self._lock:
+            return self._objects.get(key)
+
+    def list(self):
+        """kubectl get -o json 과 같은 모양({'items': [...]})으로 현재 객체를 반환합니다."""
+        with self._lock:
+            return {'items': list(self._objects.values())}
+
+    def replace(self, items, resource_version):
+        """list 결과로 저장소를 교체하고 그래프에 영향을 주는 변경을 ChangeSet 으로 반환합니다."""
+        new_objects = {}
+        new_versions = {}
+        changes = ChangeSet()
+        with self._lock:
+            for item in items:
+                key = object_key(item)
+                new_objects[key] = item
+                version = new_versions[key] = object_version(self.kind, item)
+                old = self._versions.get(key)
+                if old is None:
+                    changes.add('ADDED', item)
+                elif graph_changed(old, version):
+                    changes.add('MODIFIED', item)
+                elif old[:2] != version[:2]:
+                    changes.ignored += 1
+            for key, old in self._objects.items():
+                if key not in new_objects:
+                    changes.add('DELETED', old)
+            self._objects = new_objects
+            self._versions = new_versions
+            self.resource_version = resource_version
+            self.synced = True
+            self.ignored_updates += changes.ignored
+        return changes
+
+    def apply(self, event_type, obj):
+        """watch 이벤트 하나를 반영합니다. 그래프에 영향을 주는 변경이면 True 를 반환합니다."""
+        key = object_key(obj)
+        with self._lock:
+            resource_version = _resource_version(obj)
+            if resource_version:
+                self.resource_version = resource_version
+            if event_type in ('ADDED', 'MODIFIED'):
+                old = self._versions.get(key)
+                version = object_version(self.kind, obj)
+                if old is not None and old[:2] == version[:2]:
+                    return False
+                self._objects[key] = obj
+                self._versions[key] = version
+                if old is not None and not graph_changed(old, version):
+                    self.ignored_updates += 1
+                    return False
+                return True
+            if event_type == 'DELETED':
+                self._versions.pop(key, None)
+                return self._objects.pop(key, None) is not None
+        return False
+
+
+def _resource_version(obj):
+    return obj.get('metadata', {}).get('resourceVersion')
+
+
+class KubectlWatchSource:
+    """kubectl get --raw 로 Kubernetes API 의 list/watch 를 호출하는 이벤트 소스."""
+
+    def __init__(self, runner=None):
+        self.runner = runner or SubprocessRunner()
+
+    def list(self, kind):
+        list_fields = {}
+        items = read_list(self.runner, ["get", "--raw", API_PATHS[kind]], kind, list_fields)
+        return {'metadata': list_fields.get('metadata', {}), 'items': items}
+
+    def watch(self, kind, resource_version):
+        query = urlencode({
+            'watch': 'true',
+            'resourceVersion': resource_version or '',
+            'allowWatchBookmarks': 'true',
+            'timeoutSeconds': WATCH_TIMEOUT_SECONDS,
+        })
+        process = self.runner(["get", "--raw", f"{API_PATHS[kind]}?{query}"])
+        try:
+            # API 서버의 watch 응답은 한 줄에 이벤트 하나씩 (JSON lines)
+            for line in process.stdout:
+                line = line.strip()
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.get('type') in ('ADDED', 'MODIFIED', 'DELETED'):
+                    event['object'] = trim_object(kind, event['object'])
+                yield event
+        finally:
+            process.kill()
+            process.wait()
+
+
+class Informer:
+    """list + watch 로 ObjectStore 를 최신 상태로 유지합니다.
+
+    source 는 list(kind) 와 watch(kind, resource_version) 을 제공하는 객체이며,
+    테스트에서는 가짜 이벤트 스트림으로 대체할 수 있습니다.
+    """
+
+    def __init__(self, kind, source, store=None, on_change=None, retry_seconds=5, on_error=None):
+        self.kind = kind
+        self.source = source
+        self.store = store if store is not None else ObjectStore(kind)
+        self.on_change = on_change
+        self.on_error = on_error
+        self.retry_seconds = retry_seconds
+        self.needs_relist = True
+        self.has_synced = False
+
+    def relist(self):
+        result = self.source.list(self.kind)
+        resource_version = result.get('metadata', {}).get('resourceVersion')
+        changes = self.store.replace(result.get('items', []), resource_version)
+        self.needs_relist = False
+        self.has_synced = True
+        for event_type, obj in changes:
+            self._notify(event_type, obj)
+
+    def handle_event(self, event):
+        event_type = event.get('type')
+        obj = event.get('object', {})
+        if event_type == 'ERROR':
+            if obj.get('code') == 410:
+                raise ResourceExpired(obj.get('message', '410 Gone'))
+            raise RuntimeError(obj.get('message', f"watch error for {self.kind}"))
+        if event_type == 'BOOKMARK':
+            self.store.resource_version = _resource_version(obj) or self.store.resource_version
+            return
+        if self.store.apply(event_type, obj):
+            self._notify(event_type, obj)
+
+    def sync_once(self):
+        """필요하면 relist 한 뒤 watch 스트림 하나가 끝날 때까지 이벤트를 반영합니다."""
+        if self.needs_relist:
+            self.relist()
+        try:
+            for event in self.source.watch(self.kind, self.store.resource_version):
+                self.handle_event(event)
+        except ResourceExpired:
+            self.needs_relist = True
+
+    def run(self, stop_event):
+        while not stop_event.is_set():
+            try:
+                self.sync_once()
+            except Exception as e:
+                print(f"Error watching {self.kind}: {e}")
+                if self.on_error:
+                    self.on_error(self.kind, e)
+                self.needs_relist = True
+                stop_event.wait(self.retry_seconds)
+
+    def _notify(self, event_type, obj):
+        if self.on_change:
+            self.on_change(self.kind, event_type, obj)
@@ -0,0 +1,149 @@
+from collections import defaultdict
+
+
+def _expression_matches(labels, expression):
+    key = expression.get('key')
+    operator = expression.get('operator')
+    values = expression.get('values') or []
+    if operator == 'In':
+        return key in labels and labels[key] in values
+    if operator == 'NotIn':
+        return key not in labels or labels[key] not in values
+    if operator == 'Exists':
+        return key in labels
+    if operator == 'DoesNotExist':
+        return key not in labels
+    return False
+
+
+def matches_selector(labels, selector):
+    """라벨이 셀렉터(matchLabels, matchExpressions)를 모두 만족하는지 확인합니다."""
+    if not selector:
+        return False
+    for key, value in selector.get('matchLabels', {}).items():
+        if labels.get(key) != value:
+            return False
+    for expression in selector.get('matchExpressions', []):
+        if not _expression_matches(labels, expression):
+            return False
+    return True
+
+
+class LabelIndex:
+    """네임스페이스별 라벨 역색인.
+
+    (namespace, key, value) 와 (namespace, key) 별로 리소스 키 집합(posting set)을 유지하고,
+    셀렉터는 posting set 들의 교집합/차집합으로 계산합니다.
+    """
+
+    def __init__(self):
+        self._entries = {}  # key -> (namespace, labels)
+        self._order = {}  # key -> 삽입 순서 (결과 정렬용)
+        self._next_order = 0
+        self._by_namespace = defaultdict(set)
+        self._by_pair = defaultdict(set)
+        self._by_key = defaultdict(set)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def add(self, key, namespace, labels):
+        if key in self._entries:
+            self.remove(key)
+        labels = dict(labels or {})
+        self._entries[key] = (namespace, labels)
+        self._order[key] = self._next_order
+        self._next_order += 1
+        self._by_namespace[namespace].add(key)
+        for label_key, label_value in labels.items():
+            self._by_pair[(namespace, label_key, label_value)].add(key)
+            self._by_key[(namespace, label_key)].add(key)
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        del self._order[key]
+        namespace, labels = entry
+        self._discard(self._by_namespace, namespace, key)
+        for label_key, label_value in labels.items():
+            self._discard(self._by_pair, (namespace, label_key, label_value), key)
+            self._discard(self._by_key, (namespace, label_key), key)
+
+    def labels(self, key):
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def namespace(self, key):
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def keys(self, namespace=None):
+        if namespace is None:
+            return self._sorted(self._entries)
+        return self._sorted(self._by_namespace.get(namespace, ()))
+
+    def select(self, namespace, selector):
+        """namespace 안에서 selector 와 일치하는 리소스 키를 삽입 순서대로 반환합니다.
+
+        matches_selector 와 동일한 의미를 가집니다 (빈 셀렉터는 아무것도 선택하지 않음).
+        """
+        if not selector:
+            return []
+
+        positive = []
+        negative = []
+        for label_key, label_value in selector.get('matchLabels', {}).items():
+            positive.append(self._by_pair.get((namespace, label_key, label_value), set()))
+        for expression in selector.get('matchExpressions', []):
+            label_key = expression.get('key')
+            operator = expression.get('operator')
+            values = expression.get('values') or []
+            if operator == 'In':
+                positive.append(self._union_pairs(namespace, label_key, values))
+            elif operator == 'Exists':
+                positive.append(self._by_key.get((namespace, label_key), set()))
+            elif operator == 'NotIn':
+                negative.append(self._union_pairs(namespace, label_key, values))
+            elif operator == 'DoesNotExist':
+                negative.append(self._by_key.get((namespace, label_key), set()))
+            else:
+                return []
+
+        if positive:
+            positive.sort(key=len)
+            if not positive[0]:
+                return []
+            result = set(positive[0])
+            for postings in positive[1:]:
+                result &= postings
+                if not result:
+                    return []
+        else:
+            result = set(self._by_namespace.get(namespace, ()))
+
+        for postings in negative:
+            result -= postings
+        return self._sorted(result)
+
+    def _union_pairs(self, namespace, label_key, values):
+        postings = [self._by_pair.get((namespace, label_key, value)) for value in values]
+        postings = [p for p in postings if p]
+        if len(postings) == 1:
+            return postings[0]
+        return set().union(*postings)
+
+    def _sorted(self, keys):
+        return sorted(keys, key=self._order.__getitem__)
+
+    @staticmethod
+    def _discard(index, posting_key, key):
+        postings = index.get(posting_key)
+        if postings is None:
+            return
+        postings.discard(key)
+        if not postings:
+            del index[posting_key]
@@ -0,0 +1,194 @@
+import zlib
+from threading import Lock
+
+import numpy as np
+
+IDEAL_EDGE_LENGTH = 80.0
+GRAVITY = 0.01
+COOLING = 0.95
+
+# 배치 한 번에 계산할 (이동 노드 x 상대 노드 x 반복 횟수) 쌍 수의 예산 (반복 횟수를 정함)
+PAIR_BUDGET = 2e8
+FULL_ITERATIONS = (10, 200)
+INCREMENTAL_ITERATIONS = (5, 50)
+
+# 노드가 이보다 많으면 척력을 이 수만큼 표본 추출한 노드로 근사
+EXACT_REPULSION_LIMIT = 4000
+BLOCK_ROWS = 512
+
+
+def _jitter(node_id, scale):
+    """노드 id 로 정해지는 작은 오프셋 (같은 그래프는 언제나 같은 배치가 되도록)."""
+    rng = np.random.default_rng(zlib.crc32(node_id.encode()))
+    return rng.uniform(-scale, scale, 2)
+
+
+def _iterations(moving, total, bounds):
+    low, high = bounds
+    return int(min(high, max(low, PAIR_BUDGET / max(moving * total, 1))))
+
+
+def _repulsion(positions, rows, others, scale, k):
+    """rows 노드가 others 노드들로부터 받는 척력 합 (Fruchterman-Reingold, k²/d).
+
+    (rows x others) 거리 행렬을 BLOCK_ROWS 행씩 float32 로 계산해 메모리 사용량을 제한합니다.
+    """
+    points = positions.astype(np.float32)
+    other_x, other_y = points[others, 0], points[others, 1]
+    forces = np.empty((len(rows), 2))
+    for start in range(0, len(rows), BLOCK_ROWS):
+        block = points[rows[start:start + BLOCK_ROWS]]
+        dx = block[:, 0, None] - other_x[None, :]
+        dy = block[:, 1, None] - other_y[None, :]
+        inverse = dx * dx
+        inverse += dy * dy
+        np.maximum(inverse, 0.01, out=inverse)
+        np.reciprocal(inverse, out=inverse)
+        forces[start:start + BLOCK_ROWS, 0] = np.einsum('ij,ij->i', dx, inverse)
+        forces[start:start + BLOCK_ROWS, 1] = np.einsum('ij,ij->i', dy, inverse)
+    return forces * (k * k * scale)
+
+
+def force_directed(positions, edges, moving, iterations, temperature, k=IDEAL_EDGE_LENGTH, seed=0):
+    """positions(n x 2) 중 moving 인덱스의 노드만 움직이며 힘 기반 배치를 수행합니다.
+
+    edges 는 (m x 2) 인덱스 배열. 고정 노드도 척력/인력의 상대로는 참여합니다.
+    """
+    positions = positions.copy()
+    total = len(positions)
+    if total == 0 or len(moving) == 0:
+        return positions
+    rng = np.random.default_rng(seed)
+    is_moving = np.zeros(total, dtype=bool)
+    is_moving[moving] = True
+    sources, targets = (edges[:, 0], edges[:, 1]) if len(edges) else (np.empty(0, int), np.empty(0, int))
+    relevant = is_moving[sources] | is_moving[targets]
+    sources, targets = sources[relevant], targets[relevant]
+
+    for _ in range(iterations):
+        if total > EXACT_REPULSION_LIMIT:
+            others = rng.choice(total, EXACT_REPULSION_LIMIT, replace=False)
+            displacement = _repulsion(positions, moving, others, total / EXACT_REPULSION_LIMIT, k)
+        else:
+            displacement = _repulsion(positions, moving, np.arange(total), 1.0, k)
+
+        # 인력: 엣지 양 끝을 d²/k 로 끌어당김
+        delta = positions[sources] - positions[targets]
+        distance = np.sqrt((delta ** 2).sum(axis=1)) + 1e-9
+        pull = delta * (distance / k)[:, None]
+        attraction = np.zeros((total, 2))
+        for axis in (0, 1):
+            attraction[:, axis] = (np.bincount(targets, pull[:, axis], total) - np.bincount(sources, pull[:, axis], total))
+        displacement += attraction[moving]
+
+        # 연결되지 않은 조각이 멀리 흩어지지 않도록 중심으로 약하게 당김
+        displacement -= positions[moving] * GRAVITY * k
+
+        length = np.sqrt((displacement ** 2).sum(axis=1)) + 1e-9
+        positions[moving] += displacement / length[:, None] * np.minimum(length, temperature)[:, None]
+        temperature *= COOLING
+    return positions
+
+
+class GraphLayout:
+    """뷰 하나의 노드 좌표를 그래프 버전마다 계산해 보관합니다.
+
+    처음에는 네임스페이스별로 모아 둔 시작 좌표에서 전체를 배치하고, 이후 버전에서는 이전 좌표를
+    그대로 두고 새 노드와 그 이웃, 새 엣지의 끝점만 움직여 배치를 다듬습니다.
+    """
+
+    def __init__(self, k=IDEAL_EDGE_LENGTH):
+        self.k = k
+        self.version = None
+        self._positions = {}
+        self._edges = set()
+        self._lock = Lock()
+
+    def positions(self):
+        with self._lock:
+            return dict(self._positions)
+
+    def update(self, graph):
+        """graph(버전 포함)의 좌표를 계산합니다. 이번 버전에서 좌표가 바뀌거나 새로 생긴 노드의 {id: {'x','y'}} 를 반환합니다."""
+        with self._lock:
+            node_ids = [node['data']['id'] for node in graph['nodes']]
+            if graph.get('version') == self.version and self._positions.keys() == set(node_ids):
+                return {}
+            index = {node_id: i for i, node_id in enumerate(node_ids)}
+            edge_pairs = {(edge['data']['source'], edge['data']['target']) for edge in graph['edges']
+                          if edge['data']['source'] in index and edge['data']['target'] in index}
+            edges = np.array([(index[s], index[t]) for s, t in edge_pairs], dtype=int).reshape(-1, 2)
+
+            new_ids = [node_id for node_id in node_ids if node_id not in self._positions]
+            first_run = not self._positions
+            if first_run:
+                positions = self._initial_positions(node_ids)
+                moving = np.arange(len(node_ids))
+                iterations = _iterations(len(moving), len(node_ids), FULL_ITERATIONS)
+                temperature = self.k * max(np.sqrt(len(node_ids)), 1.0)
+            else:
+                positions = self._seed_positions(node_ids, edge_pairs, new_ids)
+                # 새 노드와 그 이웃, 새 엣지의 끝점만 움직임 (정책 노드에 연결된 나머지 노드들은 그대로)
+                new = set(new_ids)
+                touched = set(new)
+                for source, target in edge_pairs - self._edges:
+                    touched.update((source, target))
+                touched |= {t for s, t in edge_pairs if s in new} | {s for s, t in edge_pairs if t in new}
+                moving = np.array(sorted(index[node_id] for node_id in touched), dtype=int)
+                iterations = _iterations(len(moving), len(node_ids), INCREMENTAL_ITERATIONS)
+                temperature = self.k
+
+            positions = force_directed(positions, edges, moving, iterations, temperature, self.k)
+
+            previous = self._positions
+            self._positions = {node_id: {'x': round(float(x), 1), 'y': round(float(y), 1)}
+                               for node_id, (x, y) in zip(node_ids, positions)}
+            self._edges = edge_pairs
+            self.version = graph.get('version')
+            return {node_id: position for node_id, position in self._positions.items() if previous.get(node_id) != position}
+
+    def _initial_positions(self, node_ids):
+        """네임스페이스 중심을 원 위에 두고 노드를 그 주변에 흩어 놓습니다."""
+        by_namespace = {}
+        for node_id in node_ids:
+            by_namespace.setdefault(node_id.split('/', 1)[0], []).append(node_id)
+        radius = self.k * np.sqrt(len(node_ids))
+        positions = np.zeros((len(node_ids), 2))
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        for i, namespace in enumerate(sorted(by_namespace)):
+            angle = 2 * np.pi * i / len(by_namespace)
+            center = np.array([np.cos(angle), np.sin(angle)]) * (radius if len(by_namespace) > 1 else 0)
+            spread = self.k * np.sqrt(len(by_namespace[namespace]))
+            for node_id in by_namespace[namespace]:
+                positions[index[node_id]] = center + _jitter(node_id, spread)
+        return positions
+
+    def _seed_positions(self, node_ids, edge_pairs, new_ids):
+        """기존 노드는 이전 좌표, 새 노드는 배치된 이웃(없으면 같은 네임스페이스)의 평균 좌표 근처에서 시작합니다."""
+        placed = {node_id: np.array([p['x'], p['y']]) for node_id, p in self._positions.items()}
+        new = set(new_ids)
+        neighbors = {}
+        for source, target in edge_pairs:
+            neighbors.setdefault(source, []).append(target)
+            neighbors.setdefault(target, []).append(source)
+        namespace_points = {}
+        for node_id, point in placed.items():
+            namespace_points.setdefault(node_id.split('/', 1)[0], []).append(point)
+
+        positions = np.zeros((len(node_ids), 2))
+        for i, node_id in enumerate(node_ids):
+            if node_id not in new:
+                positions[i] = placed[node_id]
+                continue
+            anchors = [placed[peer] for peer in neighbors.get(node_id, ()) if peer in placed and peer not in new]
+            if not anchors:
+                anchors = namespace_points.get(node_id.split('/', 1)[0]) or [np.zeros(2)]
+            positions[i] = np.mean(anchors, axis=0) + _jitter(node_id, self.k)
+        return positions
+
+
+def with_positions(graph, positions):
+    """노드마다 Cytoscape preset 레이아웃용 position 을 붙인 새 그래프를 반환합니다 (원본 노드는 바꾸지 않음)."""
+    nodes = [dict(node, position=positions[node['data']['id']]) if node['data']['id'] in positions else node
+             for node in graph['nodes']]
+    return dict(graph, nodes=nodes)
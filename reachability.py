@@ -0,0 +1,346 @@
+from threading import Lock
+
+import numpy as np
+
+from graph_engine import policy_types
+from informer import object_key
+from label_index import LabelIndex
+
+# 네임스페이스 라벨에 항상 포함되는 라벨 (Kubernetes 1.21+)
+NAMESPACE_NAME_LABEL = 'kubernetes.io/metadata.name'
+
+
+def _bit(packed, index):
+    """np.packbits 로 묶인 배열(마지막 축)에서 index 번째 비트를 bool 로 꺼냅니다."""
+    return (packed[..., index >> 3] & (0x80 >> (index & 7))).astype(bool)
+
+
+class _RuleSet:
+    """한 방향(ingress 또는 egress)의 규칙들.
+
+    selected[r] 는 규칙 r 의 정책이 선택한 파드, peers[r] 는 규칙 r 의 from/to 와 일치하는 파드이며
+    둘 다 파드 수 만큼의 비트를 np.packbits 로 묶은 (규칙 수 x 바이트 수) 행렬입니다.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.policies = []
+        self._selected = []
+        self._peers = []
+        self._all_ports = []
+        self._ports = []  # (규칙 번호, protocol, 시작 포트, 끝 포트, 이름)
+
+    def add(self, policy_key, selected, peers, ports):
+        rule = len(self.policies)
+        self.policies.append(policy_key)
+        self._selected.append(np.packbits(selected))
+        self._peers.append(np.packbits(peers))
+        self._all_ports.append(not ports)
+        for port in ports or ():
+            protocol = port.get('protocol', 'TCP')
+            number = port.get('port')
+            if number is None:
+                self._ports.append((rule, protocol, 0, 65535, None))
+            elif isinstance(number, int):
+                self._ports.append((rule, protocol, number, port.get('endPort', number), None))
+            else:
+                self._ports.append((rule, protocol, -1, -1, str(number)))
+
+    def freeze(self, pod_ports=None):
+        """규칙을 행렬로 묶습니다. pod_ports 는 (포트 이름, protocol) -> 파드별 컨테이너 포트 번호 벡터 (-1 은 없음)."""
+        self.pod_ports = pod_ports or {}
+        width = (self.size + 7) // 8
+        self.selected = np.array(self._selected, dtype=np.uint8).reshape(-1, width)
+        self.peers = np.array(self._peers, dtype=np.uint8).reshape(-1, width)
+        self.all_ports = np.array(self._all_ports, dtype=bool)
+        entries = list(zip(*self._ports)) if self._ports else [(), (), (), (), ()]
+        self.port_rule = np.array(entries[0], dtype=int)
+        self.port_protocol = np.array(entries[1], dtype=object)
+        self.port_start = np.array(entries[2], dtype=int)
+        self.port_end = np.array(entries[3], dtype=int)
+        self.port_name = np.array(entries[4], dtype=object)
+        self.port_named = np.array([name is not None for name in entries[4]], dtype=bool)
+        del self._selected, self._peers, self._all_ports, self._ports
+
+    def port_matches(self, port, protocol=None):
+        """port/protocol 을 허용하는 규칙: (모든 목적지에서 허용하는 규칙의 bool 벡터, {규칙: 허용하는 목적지 파드 비트셋}).
+
+        port 가 None 이면 포트와 무관하게 보되, protocol 이 있으면 그 프로토콜의 포트를 하나라도 허용하는 규칙만 남깁니다.
+        port 만 있으면 protocol 은 TCP 입니다. 이름 있는 포트는 목적지 파드의 컨테이너 포트로 풀기 때문에, 번호로 질의할 때
+        이름 있는 포트 규칙(또는 이름으로 질의할 때 번호 규칙)은 그 포트를 가진 목적지 파드에서만 허용합니다.
+        """
+        partial = {}
+        if port is None:
+            if protocol is None:
+                return np.ones(len(self.policies), dtype=bool), partial
+            hit = self.port_protocol == protocol
+        else:
+            protocol = protocol or 'TCP'
+            same_protocol = self.port_protocol == protocol
+            if isinstance(port, int):
+                hit = (self.port_start <= port) & (port <= self.port_end) & same_protocol
+                for entry in np.flatnonzero(same_protocol & self.port_named):
+                    numbers = self.pod_ports.get((self.port_name[entry], protocol))
+                    if numbers is not None:
+                        self._add_partial(partial, self.port_rule[entry], numbers == port)
+            else:
+                # 포트 목록 없이 protocol 만 있는 항목(0-65535)은 이름과 무관하게 허용
+                hit = ((self.port_name == port) | ((self.port_start == 0) & (self.port_end == 65535))) & same_protocol
+                numbers = self.pod_ports.get((port, protocol))
+                if numbers is not None:
+                    for entry in np.flatnonzero(same_protocol & ~self.port_named):
+                        self._add_partial(partial, self.port_rule[entry],
+                                          (self.port_start[entry] <= numbers) & (numbers <= self.port_end[entry]))
+        counts = np.bincount(self.port_rule[hit], minlength=len(self.policies))
+        rules = self.all_ports | (counts > 0)
+        return rules, {rule: np.packbits(pods) for rule, pods in partial.items() if not rules[rule]}
+
+    @staticmethod
+    def _add_partial(partial, rule, pods):
+        if pods.any():
+            partial[rule] = partial[rule] | pods if rule in partial else pods
+
+    def rules_for(self, port, protocol, destination):
+        """목적지 파드 하나(번호)에 대해 port/protocol 을 허용하는 규칙의 bool 벡터."""
+        rules, partial = self.port_matches(port, protocol)
+        if partial:
+            rules = rules.copy()
+            for rule, pods in partial.items():
+                rules[rule] = _bit(pods, destination)
+        return rules
+
+
+class ReachabilityIndex:
+    """NetworkPolicy 의미에 따른 파드 간 도달 가능성 인덱스.
+
+    - 어떤 ingress(egress) 정책이든 선택한 파드는 그 방향으로 기본 거부(isolated)가 되고,
+      선택한 정책들의 규칙 합집합만 허용됩니다. 선택되지 않은 파드는 모두 허용합니다.
+    - A 에서 B 로의 연결은 A 의 egress 와 B 의 ingress 가 모두 허용해야 합니다.
+    - ipBlock 피어는 클러스터 외부 주소로 보고 파드 간 판정에서는 제외합니다.
+    - 이름 있는 포트(named port)는 목적지 파드의 컨테이너 포트(spec.containers[].ports)로 번호를 풀어 비교합니다.
+
+    정책 규칙마다 선택 파드/피어 파드를 비트셋으로 보관하므로, "X 에 접근할 수 있는 파드" 질의는
+    해당 규칙 행들의 OR 와 ingress/egress 결과의 AND 몇 번으로 끝납니다.
+    """
+
+    def __init__(self, policies, pods, namespaces=()):
+        self.pods = []
+        self.position = {}
+        pod_namespaces = []
+        self._pairs = {}  # (key, value) -> 파드 번호 목록
+        self._label_keys = {}  # key -> 파드 번호 목록
+        named_ports = {}  # (포트 이름, protocol) -> [(파드 번호, 포트 번호)]
+        for pod in pods:
+            metadata = pod.get('metadata', {})
+            index = len(self.pods)
+            self.position[object_key(pod)] = index
+            self.pods.append(object_key(pod))
+            pod_namespaces.append(metadata.get('namespace'))
+            for label_key, label_value in (metadata.get('labels') or {}).items():
+                self._pairs.setdefault((label_key, label_value), []).append(index)
+                self._label_keys.setdefault(label_key, []).append(index)
+            for container in (pod.get('spec') or {}).get('containers') or ():
+                for container_port in container.get('ports') or ():
+                    if container_port.get('name') and 'containerPort' in container_port:
+                        named_ports.setdefault((container_port['name'], container_port.get('protocol', 'TCP')), []).append(
+                            (index, container_port['containerPort']))
+        self._masks = {}
+
+        # 네임스페이스 셀렉터용 색인 (모든 네임스페이스를 하나의 가상 네임스페이스 '' 에 넣음)
+        namespace_index = LabelIndex()
+        names = set(pod_namespaces)
+        for namespace in namespaces:
+            metadata = namespace.get('metadata', {})
+            names.discard(metadata.get('name'))
+            namespace_index.add(metadata.get('name'), '', dict(metadata.get('labels') or {}, **{NAMESPACE_NAME_LABEL: metadata.get('name')}))
+        for name in sorted(names):
+            namespace_index.add(name, '', {NAMESPACE_NAME_LABEL: name})
+        self._namespace_index = namespace_index
+        self._namespace_ids = {name: i for i, name in enumerate(namespace_index.keys(''))}
+        self._pod_namespace = np.array([self._namespace_ids[name] for name in pod_namespaces], dtype=int)
+
+        size = len(self.pods)
+        self.ingress = _RuleSet(size)
+        self.egress = _RuleSet(size)
+        ingress_isolated = np.zeros(size, dtype=bool)
+        egress_isolated = np.zeros(size, dtype=bool)
+        for policy in policies:
+            key = object_key(policy)
+            namespace = policy.get('metadata', {}).get('namespace')
+            spec = policy.get('spec', {})
+            selected = self._label_mask(spec.get('podSelector') or {}) & self._namespace_mask([namespace])
+            types = policy_types(spec)
+            if 'Ingress' in types:
+                ingress_isolated |= selected
+                for rule in spec.get('ingress') or []:
+                    self.ingress.add(key, selected, self._rule_peers(namespace, rule.get('from')), rule.get('ports'))
+            if 'Egress' in types:
+                egress_isolated |= selected
+                for rule in spec.get('egress') or []:
+                    self.egress.add(key, selected, self._rule_peers(namespace, rule.get('to')), rule.get('ports'))
+        pod_ports = {}
+        for name, entries in named_ports.items():
+            numbers = np.full(size, -1, dtype=int)
+            indices, values = zip(*entries)
+            numbers[list(indices)] = values
+            pod_ports[name] = numbers
+        self.ingress.freeze(pod_ports)
+        self.egress.freeze(pod_ports)
+        self._ingress_open = np.packbits(~ingress_isolated)
+        self._egress_open = np.packbits(~egress_isolated)
+        del self._masks, self._pairs, self._label_keys
+
+    def __contains__(self, pod_key):
+        return pod_key in self.position
+
+    def _indices_mask(self, indices):
+        mask = np.zeros(len(self.pods), dtype=bool)
+        mask[indices] = True
+        return mask
+
+    def _label_mask(self, selector):
+        """모든 네임스페이스의 파드 중 라벨이 selector 와 일치하는 파드 벡터. 빈 셀렉터({})는 모든 파드.
+
+        같은 셀렉터를 쓰는 정책이 많으므로 셀렉터별로 한 번만 계산합니다.
+        """
+        cache_key = repr(selector)
+        mask = self._masks.get(cache_key)
+        if mask is not None:
+            return mask
+        mask = np.ones(len(self.pods), dtype=bool)
+        for label_key, label_value in selector.get('matchLabels', {}).items():
+            mask &= self._indices_mask(self._pairs.get((label_key, label_value), []))
+        for expression in selector.get('matchExpressions', []):
+            label_key = expression.get('key')
+            operator = expression.get('operator')
+            values = expression.get('values') or []
+            if operator in ('In', 'NotIn'):
+                matched = self._indices_mask([i for value in values for i in self._pairs.get((label_key, value), [])])
+                mask &= matched if operator == 'In' else ~matched
+            elif operator in ('Exists', 'DoesNotExist'):
+                matched = self._indices_mask(self._label_keys.get(label_key, []))
+                mask &= matched if operator == 'Exists' else ~matched
+            else:
+                mask[:] = False
+        self._masks[cache_key] = mask
+        return mask
+
+    def _namespace_mask(self, namespaces):
+        selected = np.zeros(len(self._namespace_ids), dtype=bool)
+        selected[[self._namespace_ids[name] for name in namespaces if name in self._namespace_ids]] = True
+        return selected[self._pod_namespace]
+
+    def _rule_peers(self, namespace, peers):
+        """from/to 항목들과 일치하는 파드 벡터. 항목이 없으면 모든 파드(모든 출발지/목적지)."""
+        if not peers:
+            return np.ones(len(self.pods), dtype=bool)
+        mask = np.zeros(len(self.pods), dtype=bool)
+        for peer in peers:
+            pod_selector = peer.get('podSelector')
+            namespace_selector = peer.get('namespaceSelector')
+            if pod_selector is None and namespace_selector is None:
+                continue  # ipBlock
+            if namespace_selector is None:
+                namespaces = [namespace]
+            elif not namespace_selector.get('matchLabels') and not namespace_selector.get('matchExpressions'):
+                namespaces = self._namespace_ids
+            else:
+                namespaces = self._namespace_index.select('', namespace_selector)
+            mask |= self._label_mask(pod_selector or {}) & self._namespace_mask(namespaces)
+        return mask
+
+    def _unpack(self, packed):
+        return [self.pods[i] for i in np.flatnonzero(np.unpackbits(packed, count=len(self.pods)))]
+
+    def sources(self, target, port=None, protocol=None):
+        """target 파드에 port/protocol 로 접근할 수 있는 파드 키 목록."""
+        index = self.position[target]
+        ingress_rules = _bit(self.ingress.selected, index) & self.ingress.rules_for(port, protocol, index)
+        if _bit(self._ingress_open, index):
+            allowed_in = np.full(self._ingress_open.shape, 0xFF, dtype=np.uint8)
+        else:
+            allowed_in = np.bitwise_or.reduce(self.ingress.peers[ingress_rules], axis=0) if ingress_rules.any() else np.zeros_like(self._ingress_open)
+        # 출발지 쪽: egress 가 열려 있거나, target 을 피어로 허용하는 egress 규칙에 선택된 파드
+        egress_rules = _bit(self.egress.peers, index) & self.egress.rules_for(port, protocol, index)
+        allowed_out = self._egress_open.copy()
+        if egress_rules.any():
+            allowed_out |= np.bitwise_or.reduce(self.egress.selected[egress_rules], axis=0)
+        return self._unpack(allowed_in & allowed_out)
+
+    def destinations(self, source, port=None, protocol=None):
+        """source 파드가 port/protocol 로 접근할 수 있는 파드 키 목록."""
+        index = self.position[source]
+        # 목적지마다 이름 있는 포트의 번호가 다르므로 그런 규칙은 허용하는 목적지 비트셋으로 좁혀 더함
+        selected = _bit(self.egress.selected, index)
+        egress_rules, egress_partial = self.egress.port_matches(port, protocol)
+        egress_rules = selected & egress_rules
+        if _bit(self._egress_open, index):
+            allowed_out = np.full(self._egress_open.shape, 0xFF, dtype=np.uint8)
+        else:
+            allowed_out = np.bitwise_or.reduce(self.egress.peers[egress_rules], axis=0) if egress_rules.any() else np.zeros_like(self._egress_open)
+            for rule, pods in egress_partial.items():
+                if selected[rule]:
+                    allowed_out |= self.egress.peers[rule] & pods
+        peers = _bit(self.ingress.peers, index)
+        ingress_rules, ingress_partial = self.ingress.port_matches(port, protocol)
+        ingress_rules = peers & ingress_rules
+        allowed_in = self._ingress_open.copy()
+        if ingress_rules.any():
+            allowed_in |= np.bitwise_or.reduce(self.ingress.selected[ingress_rules], axis=0)
+        for rule, pods in ingress_partial.items():
+            if peers[rule]:
+                allowed_in |= self.ingress.selected[rule] & pods
+        return self._unpack(allowed_out & allowed_in)
+
+    def check(self, source, target, port=None, protocol=None):
+        """source 에서 target 으로의 연결 허용 여부와, 각 방향에서 허용한 정책 목록을 반환합니다.
+
+        정책 목록이 None 이면 그 방향으로는 격리되지 않아 모두 허용된 것입니다.
+        """
+        source_index = self.position[source]
+        target_index = self.position[target]
+        egress_policies = None
+        if not _bit(self._egress_open, source_index):
+            rules = (_bit(self.egress.selected, source_index) & _bit(self.egress.peers, target_index)
+                     & self.egress.rules_for(port, protocol, target_index))
+            egress_policies = sorted({self.egress.policies[r] for r in np.flatnonzero(rules)})
+        ingress_policies = None
+        if not _bit(self._ingress_open, target_index):
+            rules = (_bit(self.ingress.selected, target_index) & _bit(self.ingress.peers, source_index)
+                     & self.ingress.rules_for(port, protocol, target_index))
+            ingress_policies = sorted({self.ingress.policies[r] for r in np.flatnonzero(rules)})
+        return {
+            'allowed': egress_policies != [] and ingress_policies != [],
+            'egress': egress_policies,
+            'ingress': ingress_policies,
+        }
+
+
+class ReachabilityCache:
+    """ReachabilityIndex 를 필요할 때 한 번 만들고, 정책/파드/네임스페이스가 바뀌면 버립니다."""
+
+    def __init__(self, build):
+        self._build = build
+        self._index = None
+        self._generation = 0
+        self._lock = Lock()
+        self._build_lock = Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._index = None
+
+    def get(self):
+        """현재 인덱스를 반환합니다. 만들 수 없으면 (build 가 None 을 반환하면) None."""
+        with self._build_lock:
+            with self._lock:
+                if self._index is not None:
+                    return self._index
+                generation = self._generation
+            index = self._build()
+            with self._lock:
+                # 만드는 동안 변경이 있었으면 이번 질의에만 쓰고 캐시하지 않음
+                if generation == self._generation:
+                    self._index = index
+            return index
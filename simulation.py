@@ -0,0 +1,62 @@
+"""POST /simulate 의 입력을 읽습니다: 적용 전의 NetworkPolicy 후보(추가/교체)와 지울 정책.
+
+영향 계산은 IncrementalGraph.simulate 가 현재 엔진 상태를 바꾸지 않고 후보 정책의 셀렉터만 평가해 합니다.
+"""
+import json
+
+import yaml
+
+from fetcher import trim_object
+from snapshot_source import flatten_list
+
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class SimulationError(ValueError):
+    """후보 정책을 읽을 수 없는 경우 (400)."""
+
+
+def candidate_policies(documents):
+    """매니페스트 문서들(kind: List 포함)에서 NetworkPolicy 만 골라 라이브 경로와 같은 필드만 남깁니다."""
+    policies = []
+    for document in documents:
+        if not isinstance(document, dict):
+            raise SimulationError("Each document must be a Kubernetes object.")
+        for obj in flatten_list(document):
+            if obj.get('kind') != 'NetworkPolicy':
+                raise SimulationError(f"Only NetworkPolicy objects can be simulated, got {obj.get('kind')!r}.")
+            policy = trim_object('networkpolicies', obj)
+            if not policy['metadata'].get('name'):
+                raise SimulationError("NetworkPolicy is missing metadata.name.")
+            policy['metadata'].setdefault('namespace', 'default')
+            policies.append(policy)
+    return policies
+
+
+def parse_request(body, is_json, deleted=()):
+    """요청 본문을 (추가/교체할 정책 목록, 지울 policy_key 목록) 으로 읽습니다.
+
+    객체 {"policies": [매니페스트...], "delete": ["namespace/name", ...]} 이거나, 매니페스트 YAML/JSON
+    (여러 문서, kind: List 가능) 을 그대로 보낼 수 있습니다. deleted 는 쿼리 파라미터로 받은 지울 정책입니다.
+    """
+    deleted = list(deleted)
+    try:
+        if is_json:
+            payload = json.loads(body or 'null')
+            documents = payload if isinstance(payload, list) else [payload]
+        else:
+            documents = [document for document in yaml.load_all(body, Loader=_YamlLoader) if document]
+    except (ValueError, yaml.YAMLError) as e:
+        raise SimulationError(f"Invalid request body: {e}") from e
+    if len(documents) == 1 and isinstance(documents[0], dict) and 'kind' not in documents[0]:
+        extra = documents[0].get('delete') or []
+        documents = documents[0].get('policies') or []
+        if not isinstance(documents, list) or not isinstance(extra, list):
+            raise SimulationError("'policies' and 'delete' must be lists.")
+        deleted.extend(extra)
+    if not all(isinstance(key, str) and key.count('/') == 1 for key in deleted):
+        raise SimulationError("Policies to delete must be given as namespace/name.")
+    policies = candidate_policies(documents)
+    if not policies and not deleted:
+        raise SimulationError("No NetworkPolicy to simulate.")
+    return policies, deleted
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import time
+from threading import Lock
+
+import yaml
+
+from fetcher import iter_list_items, trim_object
+
+# 매니페스트의 kind -> 저장소 kind (kubectl 리소스 이름)
+KINDS = {
+    'NetworkPolicy': 'networkpolicies',
+    'Pod': 'pods',
+    'Deployment': 'deployments',
+    'Namespace': 'namespaces',
+}
+SNAPSHOT_EXTENSIONS = ('.json', '.yaml', '.yml')
+CACHE_FORMAT = 2
+# 사용자별 캐시 디렉터리. 공유 임시 디렉터리는 다른 사용자가 캐시 파일을 미리 넣어 둘 수 있어 쓰지 않음
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                                 'k8s-netpol-visualizer', 'snapshots')
+
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def snapshot_files(path):
+    """path 가 디렉터리면 그 아래의 YAML/JSON 파일들을, 파일이면 그 파일만 정렬된 순서로 반환합니다."""
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for directory, _, names in os.walk(path):
+        files.extend(os.path.join(directory, name) for name in names if name.endswith(SNAPSHOT_EXTENSIONS))
+    return sorted(files)
+
+
+def _documents(path):
+    """파일 하나의 최상위 문서들. JSON 목록은 items 를 스트리밍으로 하나씩 읽습니다."""
+    with open(path, encoding='utf-8') as f:
+        if not path.endswith('.json'):
+            yield from (document for document in yaml.load_all(f, Loader=_YamlLoader) if document)
+            return
+        list_fields = {}
+        found = False
+        # 원시 API 목록(PodList 등)의 항목에는 kind 가 없으므로 목록의 kind 에서 채움.
+        # 목록의 kind 가 items 뒤에 나오면 그때까지 kind 없는 항목만 잠시 모아 둠
+        untyped = []
+        for item in iter_list_items(f, list_fields=list_fields):
+            found = True
+            if 'kind' in item or 'kind' in list_fields:
+                yield _with_kind(item, _item_kind(list_fields))
+            else:
+                untyped.append(item)
+        for item in untyped:
+            yield _with_kind(item, _item_kind(list_fields))
+        # items 가 없는 파일은 객체 하나 (또는 빈 목록)
+        if not found and not list_fields.get('kind', 'List').endswith('List'):
+            yield list_fields
+
+
+def _item_kind(list_fields):
+    return list_fields.get('kind', '')[:-len('List')] or None
+
+
+def _with_kind(item, kind):
+    if 'kind' not in item and kind:
+        item['kind'] = kind
+    return item
+
+
+def flatten_list(document):
+    """kind: List (kubectl get -o yaml/json 결과)는 항목들로 펼칩니다."""
+    if document.get('kind', '').endswith('List') and 'items' in document:
+        item_kind = document['kind'][:-len('List')] or None
+        for item in document['items'] or []:
+            yield from flatten_list(_with_kind(item, item_kind))
+    else:
+        yield document
+
+
+def load_objects(path):
+    """스냅샷 경로에서 kind 별 객체 목록을 읽습니다. 라이브 경로와 같은 필드만 남깁니다 (trim_object).
+
+    namespace 가 없는 네임스페이스 객체는 default 로 보고, 객체가 참조하지만 Namespace 매니페스트가 없는
+    네임스페이스는 만들어 넣습니다.
+    """
+    objects = {kind: {} for kind in KINDS.values()}
+    for file_path in snapshot_files(path):
+        try:
+            for document in _documents(file_path):
+                for obj in flatten_list(document):
+                    kind = KINDS.get(obj.get('kind'))
+                    if kind is None:
+                        continue
+                    trimmed = trim_object(kind, obj)
+                    metadata = trimmed['metadata']
+                    if kind != 'namespaces':
+                        metadata.setdefault('namespace', 'default')
+                    # 같은 객체가 여러 파일에 있으면 나중 것을 사용
+                    objects[kind][(metadata.get('namespace'), metadata.get('name'))] = trimmed
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid snapshot file {file_path}: {e}") from e
+    namespaces = objects['namespaces']
+    for kind, items in objects.items():
+        if kind == 'namespaces':
+            continue
+        for namespace, _ in list(items):
+            namespaces.setdefault((None, namespace), {'metadata': {'name': namespace}})
+    return {kind: list(items.values()) for kind, items in objects.items()}
+
+
+def fingerprint(path):
+    """스냅샷 입력 파일들의 경로, 크기, 수정 시각으로 만든 캐시 키."""
+    digest = hashlib.sha256(f"{CACHE_FORMAT}:{os.path.abspath(path)}".encode())
+    for file_path in snapshot_files(path):
+        stat = os.stat(file_path)
+        digest.update(f"\0{os.path.abspath(file_path)}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def private_directory(path):
+    """path 를 0700 으로 만들고, 현재 사용자 소유이며 그룹/다른 사용자가 쓸 수 없는 디렉터리인지 확인합니다."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        return False
+    if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+        return False
+    return not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+class SnapshotSource:
+    """저장된 매니페스트 디렉터리나 kubectl get -o json/yaml 덤프를 kubectl 대신 쓰는 데이터 원본.
+
+    KubectlFetcher 와 같은 fetch/fetch_all 인터페이스를 제공하므로 저장소, 그래프 엔진, API 가 그대로 동작합니다.
+    처음 읽은 결과는 cache_dir 에 JSON 으로 저장하고, 입력 파일이 바뀌지 않았으면 다음부터 그것을 읽습니다.
+    cache_dir 이 현재 사용자만 쓸 수 있는 디렉터리가 아니면 캐시를 쓰지 않습니다.
+    """
+
+    def __init__(self, path, cache_dir=DEFAULT_CACHE_DIR):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Snapshot path not found: {path}")
+        self.path = path
+        self.cache_dir = cache_dir
+        self.timings = {}
+        self._objects = None
+        self._lock = Lock()
+
+    def _cache_path(self):
+        # 내용은 JSON 이지만, 캐시 디렉터리가 스냅샷 아래에 있어도 입력 파일로 읽히지 않도록 확장자를 다르게 둠
+        return os.path.join(self.cache_dir, f"{fingerprint(self.path)}.cache")
+
+    def objects(self):
+        """kind -> 객체 목록. 처음 호출할 때 캐시나 파일에서 읽습니다."""
+        with self._lock:
+            if self._objects is None:
+                self._objects = self._load()
+            return self._objects
+
+    def _load(self):
+        start = time.perf_counter()
+        cache_path = self._cache_path() if self.cache_dir else None
+        if cache_path and not private_directory(self.cache_dir):
+            print(f"Not using snapshot cache {self.cache_dir}: it must be owned and only writable by the current user")
+            cache_path = None
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, encoding='utf-8') as f:
+                objects = json.load(f)
+            source = 'cache'
+        else:
+            objects = load_objects(self.path)
+            source = self.path
+            if cache_path:
+                # 다른 프로세스가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체.
+                # YAML 이 읽은 날짜 등은 라이브 경로(JSON)와 같이 문자열로 저장
+                with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.cache_dir, delete=False) as f:
+                    try:
+                        json.dump(objects, f, separators=(',', ':'), default=str)
+                    except Exception:
+                        # 쓰다 만 임시 파일이 캐시 디렉터리에 남지 않도록 지움
+                        os.remove(f.name)
+                        raise
+                os.replace(f.name, cache_path)
+        print(f"Loaded snapshot from {source} in {time.perf_counter() - start:.3f}s")
+        return objects
+
+    def fetch(self, kind):
+        items = self.objects().get(kind, [])
+        self.timings[kind] = {'seconds': 0.0, 'objects': len(items)}
+        return {'items': list(items)}
+
+    def fetch_all(self, kinds):
+        """KubectlFetcher.fetch_all 과 같이 kind -> 결과를 반환합니다. 스냅샷을 읽지 못하면 모든 kind 가 그 예외."""
+        try:
+            return {kind: self.fetch(kind) for kind in kinds}
+        except (OSError, ValueError) as e:
+            return {kind: e for kind in kinds}
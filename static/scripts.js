@@ -12,18 +12,69 @@ document.addEventListener('DOMContentLoaded', function() {
     // 노드 위치 저장을 위한 객체 (선택 사항)
     let nodePositions = {};
 
+    // 현재 그래프 버전 (서버 patch 의 base_version 과 비교)
+    let currentVersion = 0;
+    let resyncing = false;
+    // 다시 맞추는 동안 patch 가 도착했는지 (받은 뒤 한 번 더 맞춤)
+    let patchDuringResync = false;
+
+    // 현재 선택된 kube 컨텍스트 (null 이면 서버의 기본 컨텍스트)
+    let currentContext = null;
+
     // 초기 데이터 로드
     fetchData(currentResourceType);
+    loadNamespaces();
+    loadContexts();
+
+    // 요청 URL 에 선택한 컨텍스트를 붙임
+    function withContext(url) {
+        if (currentContext === null) {
+            return url;
+        }
+        return url + (url.includes('?') ? '&' : '?') + 'context=' + encodeURIComponent(currentContext);
+    }
 
     // 네임스페이스 리스트 로드
-    fetch('/namespaces')
-        .then(response => response.json())
-        .then(data => {
-            populateNamespaceFilters(data.namespaces);
-        })
-        .catch(error => {
-            console.error('Error fetching namespaces:', error);
-        });
+    function loadNamespaces() {
+        fetch(withContext('/namespaces'))
+            .then(response => response.json())
+            .then(data => {
+                populateNamespaceFilters(data.namespaces);
+            })
+            .catch(error => {
+                console.error('Error fetching namespaces:', error);
+            });
+    }
+
+    // 서버가 여러 컨텍스트를 다루면 컨텍스트 선택 상자를 보여 줌
+    function loadContexts() {
+        fetch('/contexts')
+            .then(response => response.json())
+            .then(data => {
+                if (data.contexts.length < 2) {
+                    return;
+                }
+                const select = document.getElementById('context-select');
+                select.innerHTML = '';
+                data.contexts.forEach(function(name) {
+                    const option = document.createElement('option');
+                    option.value = name;
+                    option.textContent = name;
+                    option.selected = name === data.default;
+                    select.appendChild(option);
+                });
+                currentContext = data.default;
+                document.querySelector('.context-filter-container').style.display = 'block';
+                select.addEventListener('change', function() {
+                    currentContext = this.value;
+                    loadNamespaces();
+                    fetchData(currentResourceType);
+                });
+            })
+            .catch(error => {
+                console.error('Error fetching contexts:', error);
+            });
+    }
 
     // 리소스 타입 필터 변경 시 데이터 로드
     document.getElementsByName('resource_type').forEach(function(radio) {
@@ -40,6 +91,7 @@ document.addEventListener('DOMContentLoaded', function() {
         if (window.cy) {
             window.cy.destroy();
         }
+        currentVersion = data.version || 0;
 
         window.cy = cytoscape({
             container: document.getElementById('graph'),
@@ -59,6 +111,21 @@ document.addEventListener('DOMContentLoaded', function() {
                         'height': 'label'
                     }
                 },
+                {
+                    selector: 'node[group="podgroup"]',
+                    style: {
+                        'background-color': '#39CCCC',
+                        'label': 'data(label)',
+                        'text-valign': 'center',
+                        'color': '#fff',
+                        'text-outline-width': 2,
+                        'text-outline-color': '#39CCCC',
+                        'font-size': '10px',
+                        'shape': 'round-rectangle',
+                        'width': 'label',
+                        'height': 'label'
+                    }
+                },
                 {
                     selector: 'node[group="pod"]',
                     style: {
@@ -143,7 +210,11 @@ document.addEventListener('DOMContentLoaded', function() {
                     }
                 }
             ],
-            layout: {
+            // 서버가 계산한 좌표가 있으면 그대로 사용하고, 없을 때만 브라우저에서 레이아웃 계산
+            layout: data.nodes.every(node => node.position) ? {
+                name: 'preset',
+                padding: 10
+            } : {
                 name: 'cose-bilkent',
                 padding: 10,
                 animate: false,
@@ -170,8 +241,8 @@ document.addEventListener('DOMContentLoaded', function() {
             var content = '';
 
             if(node.data('group') === 'policy') {
-                const policyName = node.data('label').split('/').pop(); // 네임스페이스/정책명 중 정책명 추출
-                fetch(`/policy/${encodeURIComponent(policyName)}`)
+                const [policyNamespace, policyName] = node.data('id').split('/'); // 네임스페이스/정책명
+                fetch(withContext(`/policy/${encodeURIComponent(policyNamespace)}/${encodeURIComponent(policyName)}`))
                     .then(response => response.json())
                     .then(policyData => {
                         if(policyData.error) {
@@ -231,7 +302,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     });
             } else if(node.data('group') === 'deployment') {
                 const deploymentFullName = node.data('id'); // 네임스페이스/Deployment명 전체
-                fetch(`/resource/deployment/${encodeURIComponent(deploymentFullName)}`)
+                fetch(withContext(`/resource/deployment/${encodeURIComponent(deploymentFullName)}`))
                     .then(response => response.json())
                     .then(deploymentData => {
                         if(deploymentData.error) {
@@ -251,7 +322,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     });
             } else if(node.data('group') === 'pod') {
                 const podFullName = node.data('id'); // 네임스페이스/Pod명 전체
-                fetch(`/resource/pod/${encodeURIComponent(podFullName)}`)
+                fetch(withContext(`/resource/pod/${encodeURIComponent(podFullName)}`))
                     .then(response => response.json())
                     .then(podData => {
                         if(podData.error) {
@@ -269,6 +340,19 @@ document.addEventListener('DOMContentLoaded', function() {
                         content = `<strong>Error:</strong> Failed to fetch pod details.`;
                         document.getElementById('detail-content').innerHTML = content;
                     });
+            } else if(node.data('group') === 'podgroup') {
+                // 그룹 정보는 노드 데이터에 있으므로 서버 요청 없이 표시
+                content = `<strong>Pod Group:</strong> ${node.data('label')}<br>`;
+                if(node.data('owner')) {
+                    content += `<strong>Owner:</strong> ${node.data('owner')}<br>`;
+                }
+                content += `<strong>Pods:</strong> ${node.data('count')}<br>`;
+                content += `<strong>Labels:</strong> ${JSON.stringify(node.data('labels'))}<br><br>`;
+                content += `<button id="expand-group">Expand</button>`;
+                document.getElementById('detail-content').innerHTML = content;
+                document.getElementById('expand-group').addEventListener('click', function() {
+                    expandGroup(node);
+                });
             } else if(node.data('group') === 'ipblock') {
                 // IPBlock 상세 정보 처리
                 const ipBlockLabel = node.data('label');
@@ -320,7 +404,7 @@ document.addEventListener('DOMContentLoaded', function() {
             namespaceCheckboxes.forEach(cb => cb.checked = false);
         }
 
-        filterGraph();
+        fetchData(currentResourceType); // 서버에서 선택한 네임스페이스의 부분 그래프만 받음
     }
 
     // 네임스페이스 체크박스 변경 핸들러
@@ -338,91 +422,220 @@ document.addEventListener('DOMContentLoaded', function() {
             allCheckbox.checked = false;
         }
 
-        filterGraph();
+        fetchData(currentResourceType); // 서버에서 선택한 네임스페이스의 부분 그래프만 받음
     }
 
-    // 그래프 필터링 함수
-    function filterGraph() {
+    // 선택된 네임스페이스 목록 (ALL 이거나 체크박스가 아직 없으면 null = 전체)
+    function selectedNamespaces() {
         const allCheckbox = document.getElementById('filter-all');
-        const namespaceCheckboxes = document.querySelectorAll('.namespace-checkbox');
-        const selectedNamespaces = [];
+        if (!allCheckbox || allCheckbox.checked) {
+            return null;
+        }
+        return Array.from(document.querySelectorAll('.namespace-checkbox:checked')).map(cb => cb.value);
+    }
 
-        if (allCheckbox.checked) {
-            namespaceCheckboxes.forEach(cb => cb.checked = true);
-            selectedNamespaces.push(...Array.from(namespaceCheckboxes).map(cb => cb.value));
-        } else {
-            namespaceCheckboxes.forEach(cb => {
-                if(cb.checked) {
-                    selectedNamespaces.push(cb.value);
+    // 라벨 셀렉터 필터가 적용 중인지 여부
+    function labelSelectorActive() {
+        return document.getElementById('label-selector').value.trim() !== '';
+    }
+
+    // 서버 측 필터(네임스페이스, 라벨 셀렉터)가 적용 중인지 여부
+    function serverFilterActive() {
+        return selectedNamespaces() !== null || labelSelectorActive();
+    }
+
+    // 실시간 업데이트 수신: 서버는 버전이 붙은 변경분(patch)만 전송
+    // 서버는 구독한 뷰의 방에만 보내지만, 뷰를 바꾸는 사이에 도착한 이전 뷰의 patch 는 무시
+    ['deployment', 'pod', 'podgroup'].forEach(function(resource_type) {
+        socket.on(`update_${resource_type}`, function(patch) {
+            if (currentResourceType === resource_type) {
+                handlePatch(patch);
+            }
+        });
+    });
+
+    // 현재 뷰(컨텍스트, 리소스 타입, 선택한 네임스페이스)를 구독해 그 뷰의 변경분만 받음
+    function subscribeView(resource_type) {
+        socket.emit('subscribe', {context: currentContext, resource_type: resource_type, namespaces: selectedNamespaces()});
+    }
+
+    // 서버 재시작 등으로 재연결되면 다시 구독하고 전체 스냅샷을 다시 받음
+    socket.io.on('reconnect', function() {
+        fetchData(currentResourceType);
+    });
+
+    function handlePatch(patch) {
+        if (resyncing) {
+            patchDuringResync = true;
+            return;
+        }
+        if (!window.cy) {
+            return;
+        }
+        // 중간 버전을 놓쳤거나 라벨 셀렉터가 적용 중이면 다시 맞춤
+        // (라벨 셀렉터 결과는 라벨이 바뀐 노드나 남길 정책 노드 때문에 patch 만으로는 알 수 없음)
+        if (patch.base_version !== currentVersion || labelSelectorActive()) {
+            resync();
+            return;
+        }
+        applyPatch(patch);
+    }
+
+    // 현재 버전 이후의 patch 를 받아오고, 서버에 기록이 없으면 전체 스냅샷으로 대체
+    function resync() {
+        if (serverFilterActive()) {
+            // 부분 그래프는 다시 받아옴. 받는 동안 온 patch 들은 모아서 받은 뒤에 한 번만 다시 받음
+            resyncing = true;
+            patchDuringResync = false;
+            fetchData(currentResourceType).finally(function() {
+                resyncing = false;
+                if (patchDuringResync) {
+                    resync();
                 }
             });
+            return;
         }
+        resyncing = true;
+        patchDuringResync = false;
+        fetch(withContext(`/data?resource_type=${currentResourceType}&since=${currentVersion}`))
+            .then(response => response.json())
+            .then(data => {
+                if (data.patches) {
+                    data.patches.forEach(applyPatch);
+                } else {
+                    initializeGraph(data);
+                }
+            })
+            .catch(error => {
+                console.error('Error resyncing graph:', error);
+            })
+            .finally(function() {
+                resyncing = false;
+                // 받는 동안 온 patch 는 버렸으므로 그 버전까지 다시 맞춤
+                if (patchDuringResync) {
+                    resync();
+                }
+            });
+    }
 
-        window.cy.nodes().forEach(function(node) {
-            const nodeId = node.data('id');
-            const namespace = nodeId.split('/')[0];
-            if(selectedNamespaces.includes(namespace)) {
-                node.show();
-            } else {
-                node.hide();
-            }
+    // patch 를 기존 그래프에 그대로 적용 (기존 노드 위치 유지, 전체 레이아웃 재실행 없음)
+    function applyPatch(patch) {
+        let addedNodes;
+        cy.batch(function() {
+            patch.removed.edges.concat(patch.removed.nodes).forEach(function(id) {
+                cy.getElementById(id).remove();
+            });
+            patch.changed.nodes.concat(patch.changed.edges).forEach(function(element) {
+                cy.getElementById(element.data.id).data(element.data);
+            });
+            const namespaces = selectedNamespaces();
+            addedNodes = cy.add(patch.added.nodes.filter(function(node) {
+                return namespaces === null || namespaces.includes(node.data.id.split('/')[0]);
+            }));
+            cy.add(patch.added.edges.filter(function(edge) {
+                return cy.getElementById(edge.data.source).nonempty() && cy.getElementById(edge.data.target).nonempty();
+            }));
+            // 서버가 다시 계산한 좌표를 반영하고, 좌표가 없는 새 노드만 이웃 근처에 둠
+            const positions = patch.positions || {};
+            Object.keys(positions).forEach(function(id) {
+                if (!nodePositions[id]) {
+                    cy.getElementById(id).position(positions[id]);
+                }
+            });
+            placeNewNodes(addedNodes.filter(node => !positions[node.id()]));
         });
+        currentVersion = patch.version;
+        applySearch(); // 검색 필터 재적용
+    }
 
-        window.cy.edges().forEach(function(edge) {
-            const sourceVisible = edge.source().visible();
-            const targetVisible = edge.target().visible();
-            if(sourceVisible && targetVisible) {
-                edge.show();
-            } else {
-                edge.hide();
+    // 그룹 노드를 구성 파드 노드로 펼침 (요청할 때만 서버에서 받아옴)
+    function expandGroup(groupNode) {
+        const [namespace, name] = groupNode.id().split('/');
+        fetch(withContext(`/group/${encodeURIComponent(namespace)}/${encodeURIComponent(name)}`))
+            .then(response => response.json())
+            .then(data => {
+                if (data.error) {
+                    throw new Error(data.error);
+                }
+                const center = groupNode.position();
+                cy.batch(function() {
+                    groupNode.remove();
+                    const radius = 20 * Math.sqrt(data.nodes.length);
+                    data.nodes.forEach(function(node, index) {
+                        const angle = 2 * Math.PI * index / data.nodes.length;
+                        node.position = {x: center.x + radius * Math.cos(angle), y: center.y + radius * Math.sin(angle)};
+                    });
+                    cy.add(data.nodes);
+                    cy.add(data.edges.filter(function(edge) {
+                        return cy.getElementById(edge.data.source).nonempty() && cy.getElementById(edge.data.target).nonempty();
+                    }));
+                });
+                document.getElementById('detail-content').innerHTML = `<strong>Expanded:</strong> ${data.count} pods`;
+                applySearch();
+            })
+            .catch(error => {
+                console.error('Error expanding group:', error);
+                document.getElementById('detail-content').innerHTML = `<strong>Error:</strong> Failed to expand group.`;
+            });
+    }
+
+    // 새 노드는 이미 배치된 이웃 노드 근처에 둠
+    function placeNewNodes(addedNodes) {
+        const extent = cy.extent();
+        addedNodes.forEach(function(node) {
+            const neighbors = node.neighborhood('node').filter(n => !addedNodes.contains(n));
+            let x = (extent.x1 + extent.x2) / 2;
+            let y = (extent.y1 + extent.y2) / 2;
+            if (neighbors.length > 0) {
+                x = neighbors.reduce((sum, n) => sum + n.position('x'), 0) / neighbors.length;
+                y = neighbors.reduce((sum, n) => sum + n.position('y'), 0) / neighbors.length;
             }
+            node.position({
+                x: x + (Math.random() - 0.5) * 80,
+                y: y + (Math.random() - 0.5) * 80
+            });
         });
     }
 
-    // 실시간 업데이트 수신 및 그래프 업데이트
-    socket.on('update_deployment', function(graphData) {
-        if (currentResourceType === 'deployment') {
-            showLoading(); // 로딩 시작
-            cy.batch(function() {
-                cy.elements().remove();
-                cy.add(graphData.nodes.concat(graphData.edges));
-                cy.layout({
-                    name: 'cose-bilkent',
-                    padding: 10,
-                    animate: false,
-                    nodeDimensionsIncludeLabels: true
-                }).run();
-                filterGraph(); // 필터 재적용
-                hideLoading(); // 로딩 완료
-            });
+    // 한 번에 받을 최대 노드 수 (큰 그래프는 여러 페이지로 나눠 받음)
+    const PAGE_SIZE = 2000;
+
+    // 데이터 가져오는 함수 (네임스페이스/라벨 셀렉터 필터는 서버에서 적용)
+    function fetchData(resource_type) {
+        showLoading(); // 로딩 시작
+        subscribeView(resource_type);
+        const params = new URLSearchParams({resource_type: resource_type, limit: PAGE_SIZE});
+        const namespaces = selectedNamespaces();
+        if (namespaces !== null) {
+            params.set('namespaces', namespaces.join(','));
+        }
+        const labelSelector = document.getElementById('label-selector').value.trim();
+        if (labelSelector) {
+            params.set('labelSelector', labelSelector);
         }
-    });
 
-    socket.on('update_pod', function(graphData) {
-        if (currentResourceType === 'pod') {
-            showLoading(); // 로딩 시작
-            cy.batch(function() {
-                cy.elements().remove();
-                cy.add(graphData.nodes.concat(graphData.edges));
-                cy.layout({
-                    name: 'cose-bilkent',
-                    padding: 10,
-                    animate: false,
-                    nodeDimensionsIncludeLabels: true
-                }).run();
-                filterGraph(); // 필터 재적용
-                hideLoading(); // 로딩 완료
-            });
+        const graph = {nodes: [], edges: []};
+        function fetchPage(cursor) {
+            if (cursor) {
+                params.set('cursor', cursor);
+            }
+            return fetch(withContext(`/data?${params.toString()}`))
+                .then(response => response.json())
+                .then(data => {
+                    if (data.error) {
+                        throw new Error(data.error);
+                    }
+                    graph.version = data.version;
+                    graph.nodes.push(...data.nodes);
+                    graph.edges.push(...data.edges);
+                    return data.next_cursor ? fetchPage(data.next_cursor) : graph;
+                });
         }
-    });
 
-    // 데이터 가져오는 함수
-    function fetchData(resource_type) {
-        showLoading(); // 로딩 시작
-        fetch(`/data?resource_type=${resource_type}`)
-            .then(response => response.json())
+        return fetchPage(null)
             .then(data => {
                 initializeGraph(data);
+                applySearch();
                 hideLoading(); // 로딩 완료
             })
             .catch(error => {
@@ -441,47 +654,12 @@ document.addEventListener('DOMContentLoaded', function() {
         loadingOverlay.style.display = 'none';
     }
 
-    // 현재 필터 상태 재적용 함수 (선택 사항)
-    function applyCurrentFilters() {
-        const allCheckbox = document.getElementById('filter-all');
-        const namespaceCheckboxes = document.querySelectorAll('.namespace-checkbox');
-        const selectedNamespaces = [];
-
-        if (allCheckbox.checked) {
-            namespaceCheckboxes.forEach(cb => cb.checked = true);
-            selectedNamespaces.push(...Array.from(namespaceCheckboxes).map(cb => cb.value));
-        } else {
-            namespaceCheckboxes.forEach(cb => {
-                if(cb.checked) {
-                    selectedNamespaces.push(cb.value);
-                }
-            });
+    // 검색 기능 구현 (이미 받은 노드 중에서 이름으로 검색)
+    function applySearch() {
+        if (!window.cy) {
+            return;
         }
-
-        window.cy.nodes().forEach(function(node) {
-            const nodeId = node.data('id');
-            const namespace = nodeId.split('/')[0];
-            if(selectedNamespaces.includes(namespace)) {
-                node.show();
-            } else {
-                node.hide();
-            }
-        });
-
-        window.cy.edges().forEach(function(edge) {
-            const sourceVisible = edge.source().visible();
-            const targetVisible = edge.target().visible();
-            if(sourceVisible && targetVisible) {
-                edge.show();
-            } else {
-                edge.hide();
-            }
-        });
-    }
-
-    // 검색 기능 구현
-    document.getElementById('search').addEventListener('input', function(e) {
-        var query = e.target.value.toLowerCase();
+        var query = document.getElementById('search').value.toLowerCase();
         window.cy.nodes().forEach(function(node) {
             var label = node.data('label').toLowerCase();
             if(label.includes(query)) {
@@ -499,5 +677,14 @@ document.addEventListener('DOMContentLoaded', function() {
                 edge.hide();
             }
         });
+    }
+
+    document.getElementById('search').addEventListener('input', applySearch);
+
+    // 라벨 셀렉터 (예: app=web,tier!=db) 는 서버에서 적용
+    document.getElementById('label-selector').addEventListener('keydown', function(e) {
+        if (e.key === 'Enter') {
+            fetchData(currentResourceType);
+        }
     });
 });
@@ -0,0 +1,78 @@
+import time
+from threading import Lock
+
+# 구독자와 요청이 이 시간 동안 없던 뷰는 엔진, 캐시, 배치를 내려놓음
+VIEW_IDLE_SECONDS = 300
+
+
+def room_name(resource_type, namespaces=None, context=None):
+    """뷰 하나(kube 컨텍스트 + resource_type + 네임스페이스 집합)의 Socket.IO 방 이름."""
+    name = f"view:{resource_type}"
+    if namespaces:
+        name += f":{','.join(sorted(namespaces))}"
+    return f"{context}/{name}" if context else name
+
+
+class ViewSubscriptions:
+    """Socket.IO 클라이언트(sid)별로 구독 중인 뷰와, 뷰별 마지막 사용 시각을 관리합니다.
+
+    구독자가 있는 뷰만 계산해 보내고, 구독자와 요청이 idle_seconds 동안 없던 뷰는 take_idle_views 로 골라 내려놓습니다.
+    """
+
+    def __init__(self, idle_seconds=VIEW_IDLE_SECONDS, clock=time.monotonic, context=None):
+        self.idle_seconds = idle_seconds
+        self.context = context
+        self._clock = clock
+        self._clients = {}  # sid -> (resource_type, namespaces, room)
+        self._last_used = {}  # resource_type -> 마지막으로 구독자나 요청이 있던 시각
+        self._lock = Lock()
+
+    def subscribe(self, sid, resource_type, namespaces=None):
+        """sid 의 구독을 바꿉니다. (새 방, 이전 방 또는 None) 을 반환합니다."""
+        namespaces = tuple(sorted(set(namespaces))) if namespaces else None
+        room = room_name(resource_type, namespaces, self.context)
+        with self._lock:
+            previous = self._clients.get(sid)
+            self._clients[sid] = (resource_type, namespaces, room)
+            now = self._clock()
+            self._last_used[resource_type] = now
+            if previous is not None:
+                self._last_used[previous[0]] = now
+        return room, previous[2] if previous is not None else None
+
+    def unsubscribe(self, sid):
+        """sid 의 구독을 지우고 그 방 이름을 반환합니다 (없으면 None)."""
+        with self._lock:
+            previous = self._clients.pop(sid, None)
+            if previous is None:
+                return None
+            self._last_used[previous[0]] = self._clock()
+            return previous[2]
+
+    def touch(self, resource_type):
+        """HTTP 요청 등으로 뷰가 쓰였음을 기록합니다."""
+        with self._lock:
+            self._last_used[resource_type] = self._clock()
+
+    def active_views(self):
+        with self._lock:
+            return {resource_type for resource_type, _, _ in self._clients.values()}
+
+    def rooms(self, resource_type):
+        """resource_type 을 구독 중인 방 -> 네임스페이스 집합 (전체면 None)."""
+        with self._lock:
+            return {room: namespaces for view, namespaces, room in self._clients.values() if view == resource_type}
+
+    def subscriber_count(self, resource_type):
+        with self._lock:
+            return sum(1 for view, _, _ in self._clients.values() if view == resource_type)
+
+    def take_idle_views(self):
+        """구독자가 없고 idle_seconds 동안 쓰이지 않은 뷰 목록. 반환한 뷰는 다시 쓰일 때까지 목록에서 빠집니다."""
+        with self._lock:
+            active = {resource_type for resource_type, _, _ in self._clients.values()}
+            deadline = self._clock() - self.idle_seconds
+            idle = [view for view, last_used in self._last_used.items() if view not in active and last_used <= deadline]
+            for view in idle:
+                del self._last_used[view]
+            return idle
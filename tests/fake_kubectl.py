@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""테스트/벤치마크용 가짜 kubectl.
+
+FAKE_KUBECTL_DIR 디렉터리의 <kind>.json 을 kubectl get <kind> -o json 출력처럼 내보냅니다.
+FAKE_KUBECTL_FAIL 에 쉼표로 나열한 kind 는 실패(종료 코드 1)합니다.
+FAKE_KUBECTL_STDERR_BYTES 를 주면 출력 전에 그만큼 stderr 에 경고를 씁니다.
+--context <이름> 을 주면 FAKE_KUBECTL_DIR/<이름>/ 에서 읽고, 그 디렉터리가 없으면 없는 컨텍스트로 실패합니다.
+"""
+import json
+import os
+import sys
+
+RAW_KINDS = {
+    '/apis/networking.k8s.io/v1/networkpolicies': 'networkpolicies',
+    '/api/v1/pods': 'pods',
+    '/apis/apps/v1/deployments': 'deployments',
+    '/api/v1/namespaces': 'namespaces',
+}
+
+
+def main(args):
+    directory = os.environ.get('FAKE_KUBECTL_DIR', '.')
+    if '--context' in args:
+        position = args.index('--context')
+        context = args[position + 1]
+        args = args[:position] + args[position + 2:]
+        directory = os.path.join(directory, context)
+        if not os.path.isdir(directory):
+            sys.stderr.write(f"error: context \"{context}\" does not exist\n")
+            return 1
+    if len(args) < 2 or args[0] != 'get':
+        sys.stderr.write(f"unsupported command: {' '.join(args)}\n")
+        return 1
+    if args[1] == '--raw':
+        kind = RAW_KINDS.get(args[2].split('?')[0])
+    else:
+        kind = args[1]
+    if kind in os.environ.get('FAKE_KUBECTL_FAIL', '').split(','):
+        sys.stderr.write(f"error: the server doesn't have a resource type \"{kind}\"\n")
+        return 1
+
+    stderr_bytes = int(os.environ.get('FAKE_KUBECTL_STDERR_BYTES', 0))
+    if stderr_bytes:
+        sys.stderr.write('W' * stderr_bytes)
+        sys.stderr.flush()
+
+    path = os.path.join(directory, f"{kind}.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            sys.stdout.write(f.read())
+    else:
+        json.dump({'apiVersion': 'v1', 'items': [], 'kind': 'List', 'metadata': {'resourceVersion': ''}}, sys.stdout)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,121 @@
+import random
+import unittest
+
+import app as app_module
+from aggregation import PodGroupGraph, class_key, controller_owner
+from graph_engine import IncrementalGraph
+from tests.test_app import use_cluster
+from tests.test_graph_engine import random_policy, random_resource
+
+
+def owned_pod(name, namespace, owner_kind, owner_name, **labels):
+    return {'metadata': {'name': name, 'namespace': namespace, 'labels': labels,
+                         'ownerReferences': [{'kind': owner_kind, 'name': owner_name, 'controller': True}]}}
+
+
+def edge_set(graph, node_of):
+    return {(node_of(e['data']['source']), node_of(e['data']['target']), e['data']['type'], e['data']['label'])
+            for e in graph['edges']}
+
+
+class TestPodGroupGraph(unittest.TestCase):
+
+    def assert_groups_match_pods(self, groups, pods):
+        """그룹 엣지를 구성 파드로 펼치면 파드 뷰의 엣지와 같아야 함."""
+        group_of = {}
+        for node in groups.graph()['nodes']:
+            for member in groups.members(node['data']['id']) or ():
+                group_of[member] = node['data']['id']
+        self.assertEqual(edge_set(pods.graph(), lambda node_id: group_of.get(node_id, node_id)),
+                         edge_set(groups.graph(), lambda node_id: node_id))
+
+    def test_matches_pod_view_under_random_changes(self):
+        rng = random.Random(12)
+        for group_by in ('labels', 'owner'):
+            groups = PodGroupGraph(group_by=group_by)
+            pods = IncrementalGraph('pod')
+            for i in range(8):
+                policy = random_policy(rng, f"pol-{i}", rng.choice(['ns-a', 'ns-b']))
+                groups.apply('networkpolicies', 'ADDED', policy)
+                pods.apply('networkpolicies', 'ADDED', policy)
+            resources = {}
+            for step in range(200):
+                name = f"pod-{rng.randrange(40)}"
+                if name in resources and rng.random() < 0.3:
+                    event, resource = 'DELETED', resources.pop(name)
+                else:
+                    resource = random_resource(rng, name, 'ns-a' if rng.random() < 0.7 else 'ns-b')
+                    if name in resources:
+                        groups.apply('pods', 'DELETED', resources[name])
+                        pods.apply('pods', 'DELETED', resources[name])
+                    event, resources[name] = 'ADDED', resource
+                groups.apply('pods', event, resource)
+                pods.apply('pods', event, resource)
+            self.assert_groups_match_pods(groups, pods)
+
+    def test_counts_and_membership(self):
+        engine = PodGroupGraph()
+        web = [random_resource(random.Random(0), f"web-{i}", 'ns') for i in range(3)]
+        for pod in web:
+            pod['metadata']['labels'] = {'app': 'web'}
+            self.assertTrue(engine.apply('pods', 'ADDED', pod))
+        self.assertFalse(engine.apply('pods', 'MODIFIED', web[0]))
+
+        [node] = engine.graph()['nodes']
+        self.assertEqual(node['data']['count'], 3)
+        self.assertEqual(node['data']['label'], 'web.ns (3)')
+        self.assertEqual(engine.members(node['data']['id']), ['ns/web-0', 'ns/web-1', 'ns/web-2'])
+
+        web[0]['metadata']['labels'] = {'app': 'db'}
+        engine.apply('pods', 'MODIFIED', web[0])
+        self.assertEqual(sorted(n['data']['count'] for n in engine.graph()['nodes']), [1, 2])
+        engine.apply('pods', 'DELETED', web[0])
+        self.assertEqual([n['data']['count'] for n in engine.graph()['nodes']], [2])
+
+    def test_owner_grouping_ignores_pod_template_hash(self):
+        old = owned_pod('web-5d8f-a', 'ns', 'ReplicaSet', 'web-5d8f', app='web', **{'pod-template-hash': '5d8f'})
+        new = owned_pod('web-7c9b-b', 'ns', 'ReplicaSet', 'web-7c9b', app='web', **{'pod-template-hash': '7c9b'})
+        self.assertEqual(controller_owner(old), ('Deployment', 'web'))
+        self.assertEqual(class_key(old, 'owner'), class_key(new, 'owner'))
+        self.assertNotEqual(class_key(old, 'labels'), class_key(new, 'labels'))
+        self.assertEqual(controller_owner(owned_pod('db-0', 'ns', 'StatefulSet', 'db')), ('StatefulSet', 'db'))
+
+        engine = PodGroupGraph(group_by='owner')
+        engine.apply('pods', 'ADDED', old)
+        engine.apply('pods', 'ADDED', new)
+        [node] = engine.graph()['nodes']
+        self.assertEqual(node['data']['owner'], 'Deployment/web')
+        self.assertEqual(node['data']['count'], 2)
+
+
+class TestGroupEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        engine = PodGroupGraph()
+        engine.load(
+            {'items': [{'metadata': {'name': 'allow', 'namespace': 'ns'},
+                        'spec': {'podSelector': {}, 'ingress': [{'from': [{'podSelector': {'matchLabels': {'app': 'web'}},
+                                                                           'namespaceSelector': {'matchLabels': {'name': 'ns'}}}],
+                                                                 'ports': [{'protocol': 'TCP', 'port': 80}]}]}}]},
+            {'items': [owned_pod(f"web-{i}", 'ns', 'ReplicaSet', 'web-1', app='web') for i in range(3)]})
+        cluster = use_cluster(self)
+        cluster.graph_engines['podgroup'] = engine
+        cluster.publish_graph('podgroup', engine.graph())
+        self.group_id = next(n['data']['id'] for n in engine.graph()['nodes'] if n['data']['group'] == 'podgroup')
+
+    def test_expand_group(self):
+        data = self.client.get(f"/group/{self.group_id}").get_json()
+        self.assertEqual(data['count'], 3)
+        self.assertEqual([n['data']['id'] for n in data['nodes']], ['ns/web-0', 'ns/web-1', 'ns/web-2'])
+        self.assertEqual(sorted(e['data']['target'] for e in data['edges']), ['ns/web-0', 'ns/web-1', 'ns/web-2'])
+        self.assertEqual(len({e['data']['id'] for e in data['edges']}), 3)
+        self.assertEqual(self.client.get('/group/ns/missing').status_code, 404)
+
+    def test_label_selector_on_groups(self):
+        data = self.client.get('/data?resource_type=podgroup&labelSelector=app%3Dweb').get_json()
+        self.assertIn(self.group_id, [n['data']['id'] for n in data['nodes']])
+
+
+if __name__ == '__main__':
+    unittest.main()
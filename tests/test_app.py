@@ -1,40 +1,66 @@
+import os
 import unittest
-from app import app, get_network_policies, get_pods, map_policies_to_pods
+from unittest import mock
+
+import app as app_module
+from app import app, get_deployments, get_network_policies, get_pods, map_policies_to_resources
+from clusters import ContextPool
+from snapshot_source import SnapshotSource
+
+SAMPLES = os.path.join(os.path.dirname(__file__), '..', 'samples', 'k8s')
+
+
+def use_cluster(test, fetcher=None):
+    """테스트 동안 app 이 새 ClusterContext 하나만 기본 컨텍스트로 쓰도록 바꾸고 그 컨텍스트를 반환합니다."""
+    cluster = app_module.ClusterContext(None, fetcher)
+    patcher = mock.patch.object(app_module, 'clusters', ContextPool(lambda name: cluster))
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return cluster
+
 
 class TestK8sNetPolVisualizer(unittest.TestCase):
+    """samples/k8s 매니페스트를 스냅샷 원본으로 사용해 kubectl 없이 실행합니다."""
 
     def setUp(self):
         self.app = app.test_client()
         self.app.testing = True
+        use_cluster(self, SnapshotSource(SAMPLES, cache_dir=None))
 
     def test_get_network_policies(self):
         policies = get_network_policies()
         self.assertIsNotNone(policies)
         self.assertIn('items', policies)
+        self.assertEqual(len(policies['items']), 3)
 
     def test_get_pods(self):
         pods = get_pods()
         self.assertIsNotNone(pods)
         self.assertIn('items', pods)
 
-    def test_map_policies_to_pods(self):
+    def test_map_policies_to_resources(self):
         policies = get_network_policies()
-        pods = get_pods()
-        pod_map, edges = map_policies_to_pods(policies, pods)
-        self.assertIsInstance(pod_map, dict)
+        deployments = get_deployments()
+        policy_map, edges, resource_map = map_policies_to_resources(policies, deployments, 'deployment')
+        self.assertEqual(sorted(policy_map), ['test-namespace-1/allow-app-a-to-app-b', 'test-namespace-2/deny-all',
+                                              'test-namespace-3/allow-specific'])
+        self.assertIn('test-namespace-1/app-a', resource_map)
         self.assertIsInstance(edges, list)
 
     def test_policy_details_endpoint(self):
-        response = self.app.get('/policy/sample-policy')
-        # 실제 환경에 맞게 assertions 추가
-        # 예: self.assertEqual(response.status_code, 200)
-        #     self.assertIn('ingress', response.get_json())
-
-    def test_pod_details_endpoint(self):
-        response = self.app.get('/pod/default/sample-pod')
-        # 실제 환경에 맞게 assertions 추가
-        # 예: self.assertEqual(response.status_code, 200)
-        #     self.assertIn('labels', response.get_json())
+        response = self.app.get('/policy/test-namespace-1/allow-app-a-to-app-b')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ingress', response.get_json())
+
+    def test_resource_details_endpoint(self):
+        response = self.app.get('/resource/deployment/test-namespace-1/app-a')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['labels'], {})
+
+    def test_namespaces_endpoint(self):
+        response = self.app.get('/namespaces')
+        self.assertEqual(response.get_json()['namespaces'], ['test-namespace-1', 'test-namespace-2', 'test-namespace-3'])
+
 
 if __name__ == '__main__':
     unittest.main()
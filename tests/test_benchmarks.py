@@ -0,0 +1,77 @@
+import contextlib
+import io
+import unittest
+
+import app as app_module
+from app import build_graph_data
+from benchmarks.run import Benchmark, format_results, run
+from benchmarks.synthetic import SyntheticCluster, parse_selector_mix
+from graph_engine import IncrementalGraph, canonical_graph
+
+
+class TestSyntheticCluster(unittest.TestCase):
+
+    def test_counts_and_determinism(self):
+        cluster = SyntheticCluster(pods=500, policies=40, namespaces=5, label_cardinality=4, seed=3)
+        objects = cluster.objects()
+        self.assertEqual([len(objects[kind]) for kind in ('pods', 'networkpolicies', 'deployments', 'namespaces')],
+                         [500, 40, 20, 5])
+        self.assertEqual(len({pod['metadata']['labels']['app'] for pod in objects['pods']}), 4)
+        self.assertEqual(SyntheticCluster(pods=500, policies=40, namespaces=5, label_cardinality=4, seed=3).objects(), objects)
+
+    def test_selector_mix(self):
+        self.assertEqual(parse_selector_mix('ipBlock=1'),
+                         {'matchLabels': 0.0, 'matchExpressions': 0.0, 'namespaceSelector': 0.0, 'ipBlock': 1.0})
+        with self.assertRaises(ValueError):
+            parse_selector_mix('podSelector=1')
+
+        cluster = SyntheticCluster(pods=10, policies=20, namespaces=2, selector_mix=parse_selector_mix('namespaceSelector=1'))
+        peers = [peer for policy in cluster.objects()['networkpolicies'] for rule in policy['spec'].get('ingress', [])
+                 for peer in rule['from']]
+        self.assertTrue(peers)
+        self.assertTrue(all('namespaceSelector' in peer for peer in peers))
+
+    def test_churn_events_keep_engine_consistent(self):
+        cluster = SyntheticCluster(pods=300, policies=30, namespaces=3, label_cardinality=3, churn_rate=0.1, seed=1)
+        objects = cluster.objects()
+        engine = IncrementalGraph('pod')
+        engine.load({'items': objects['networkpolicies']}, {'items': objects['pods']})
+        for _ in range(3):
+            events = cluster.churn()
+            self.assertEqual(sum(kind == 'pods' and event_type != 'ADDED' for kind, event_type, _ in events), 30)
+            for kind, event_type, obj in events:
+                engine.apply(kind, event_type, obj)
+        objects = cluster.objects()
+        self.assertEqual(len(objects['pods']), 300)
+        expected = build_graph_data({'items': objects['networkpolicies']}, {'items': objects['pods']}, 'pod')
+        self.assertEqual(canonical_graph(engine.graph()), canonical_graph(expected))
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_stage_records_and_baseline(self):
+        bench = Benchmark()
+        with bench.stage('encode') as record:
+            record['payload_bytes'] = 1234
+        [result] = bench.results
+        self.assertEqual(result['payload_bytes'], 1234)
+        self.assertGreater(result['peak_rss_bytes'], 0)
+
+        table = format_results(bench.results, [dict(result, seconds=result['seconds'] * 2)])
+        self.assertIn('1,234', table)
+        self.assertIn('0.50x', table)
+
+
+    def test_run_small_cluster_restores_clusters(self):
+        previous = app_module.clusters
+        cluster = SyntheticCluster(pods=100, policies=10, namespaces=2, label_cardinality=3, churn_rate=0.1, seed=1)
+        with contextlib.redirect_stderr(io.StringIO()):
+            results = run(cluster, cycles=2)
+        self.assertIs(app_module.clusters, previous)
+        stages = [result['stage'] for result in results]
+        self.assertEqual(stages[:2], ['full_rebuild', 'engine_build'])
+        self.assertIn('full_rebuild_change_detection', stages)
+
+
+if __name__ == '__main__':
+    unittest.main()
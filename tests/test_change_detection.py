@@ -0,0 +1,64 @@
+import unittest
+
+from change_detection import graph_changed, object_version
+from informer import Informer, ObjectStore
+from tests.test_informer import FakeSource
+
+
+def pod(name, resource_version, uid='uid-1', phase='Running', restarts=0, **labels):
+    return {'metadata': {'name': name, 'namespace': 'default', 'uid': uid, 'resourceVersion': str(resource_version),
+                         'labels': labels},
+            'status': {'phase': phase, 'containerStatuses': [{'name': 'main', 'restartCount': restarts}]}}
+
+
+class TestChangeDetection(unittest.TestCase):
+
+    def test_object_version_uses_graph_fields(self):
+        base = object_version('pods', pod('a', 1, app='web'))
+        self.assertFalse(graph_changed(base, object_version('pods', pod('a', 2, restarts=3, app='web'))))
+        self.assertFalse(graph_changed(base, object_version('pods', pod('a', 2, uid='uid-2', app='web'))))
+        self.assertTrue(graph_changed(base, object_version('pods', pod('a', 2, app='db'))))
+        self.assertTrue(graph_changed(base, object_version('pods', pod('a', 2, phase='Failed', app='web'))))
+        # kind 를 모르면 resourceVersion 이 바뀐 모든 갱신을 변경으로 봄
+        self.assertTrue(graph_changed(object_version(None, pod('a', 1)), object_version(None, pod('a', 2))))
+
+    def test_store_ignores_status_noise(self):
+        store = ObjectStore('pods')
+        self.assertTrue(store.apply('ADDED', pod('a', 1, app='web')))
+        self.assertFalse(store.apply('MODIFIED', pod('a', 2, restarts=1, app='web')))
+        # 그래프 필드는 그대로여도 최신 객체는 저장됨
+        self.assertEqual(store.get('default/a')['status']['containerStatuses'][0]['restartCount'], 1)
+        self.assertEqual(store.ignored_updates, 1)
+        self.assertTrue(store.apply('MODIFIED', pod('a', 3, app='db')))
+
+    def test_relist_change_set(self):
+        store = ObjectStore('pods')
+        store.replace([pod('a', 1, app='web'), pod('b', 1, app='web'), pod('c', 1, app='web')], '1')
+        changes = store.replace([pod('a', 2, restarts=5, app='web'), pod('b', 2, app='db'), pod('d', 2, app='web')], '2')
+
+        self.assertEqual([obj['metadata']['name'] for obj in changes.added], ['d'])
+        self.assertEqual([obj['metadata']['name'] for obj in changes.modified], ['b'])
+        self.assertEqual([obj['metadata']['name'] for obj in changes.removed], ['c'])
+        self.assertEqual(changes.ignored, 1)
+        self.assertEqual([event_type for event_type, _ in changes], ['MODIFIED', 'ADDED', 'DELETED'])
+
+    def test_informer_notifies_only_graph_changes(self):
+        source = FakeSource(
+            lists=[{'metadata': {'resourceVersion': '10'}, 'items': [pod('a', 5, app='web')]}],
+            streams=[[
+                {'type': 'MODIFIED', 'object': pod('a', 11, restarts=1, app='web')},
+                {'type': 'MODIFIED', 'object': pod('a', 12, restarts=2, app='web')},
+                {'type': 'MODIFIED', 'object': pod('a', 13, restarts=2, app='api')},
+            ]],
+        )
+        changes = []
+        informer = Informer('pods', source, on_change=lambda kind, event_type, obj: changes.append(
+            (event_type, obj['metadata']['resourceVersion'])))
+        informer.sync_once()
+
+        self.assertEqual(changes, [('ADDED', '5'), ('MODIFIED', '13')])
+        self.assertEqual(informer.store.resource_version, '13')
+
+
+if __name__ == '__main__':
+    unittest.main()
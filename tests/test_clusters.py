@@ -0,0 +1,192 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import app as app_module
+from clusters import ContextPool, FetchScheduler, UnknownContext
+from fetcher import SubprocessRunner
+
+FAKE_KUBECTL = os.path.join(os.path.dirname(__file__), 'fake_kubectl.py')
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeContext:
+
+    def __init__(self, name, objects=1):
+        self.name = name
+        self.objects = objects
+        self.subscribed = False
+        self.unused = False
+        self.closed = False
+
+    def object_count(self):
+        return self.objects
+
+    def in_use(self):
+        return self.subscribed
+
+    def idle(self):
+        return self.unused
+
+    def close(self):
+        self.closed = True
+
+
+class TestContextPool(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        created = {}
+        evicted = []
+        pool = ContextPool(lambda name: created.setdefault(name, FakeContext(name)), ['a', 'b', 'c', 'd'],
+                           max_contexts=2, on_evict=lambda name, context: evicted.append(name))
+        self.assertIs(pool.get(), pool.get('a'))
+        pool.get('b')
+        pool.get('a')  # b 가 가장 오래 전에 쓰인 컨텍스트가 됨
+        pool.get('c')
+        self.assertEqual(evicted, ['b'])
+        self.assertTrue(created['b'].closed)
+        self.assertEqual([name for name, _ in pool.loaded()], ['a', 'c'])
+
+        # 구독자가 있는 컨텍스트는 한도를 넘어도 남겨 둠
+        created['a'].subscribed = True
+        pool.get('d')
+        self.assertEqual([name for name, _ in pool.loaded()], ['a', 'd'])
+        with self.assertRaises(UnknownContext):
+            pool.get('e')
+        self.assertIsNone(pool.peek('b'))
+
+    def test_object_limit_idle_and_pinned(self):
+        pool = ContextPool(lambda name: FakeContext(name, objects=60), ['a', 'b', 'c'], max_objects=100, pinned=['a'])
+        pool.get('a')
+        pool.get('b')
+        self.assertEqual([name for name, _ in pool.loaded()], ['a', 'b'])
+        pool.get('c')
+        self.assertEqual([name for name, _ in pool.loaded()], ['a', 'c'])
+
+        pool.peek('c').objects = 1
+        self.assertEqual(pool.enforce_limits(), [])
+        pool.peek('c').unused = True
+        self.assertEqual(pool.enforce_limits(), ['c'])
+        self.assertEqual([name for name, _ in pool.loaded()], ['a'])
+
+
+class TestFetchScheduler(unittest.TestCase):
+
+    def test_backoff_and_reset(self):
+        clock = FakeClock()
+        scheduler = FetchScheduler(workers=2, interval=10, max_backoff=35, clock=clock)
+        outcomes = iter([False, False, False, True])
+        calls = []
+
+        def poll():
+            calls.append(clock.now)
+            if not next(outcomes):
+                raise RuntimeError("unreachable")
+
+        scheduler.add('prod', poll)
+        for expected_delay, expected_failures in ((20, 1), (35, 2), (35, 3), (10, 0)):
+            [future] = scheduler.run_pending()
+            future.result(5)
+            self.assertEqual(scheduler.state('prod'), (expected_delay, expected_failures))
+            self.assertEqual(scheduler.run_pending(), [])
+            clock.now += expected_delay
+        self.assertEqual(calls, [0, 20, 55, 90])
+
+        scheduler.remove('prod')
+        self.assertIsNone(scheduler.state('prod'))
+        self.assertIsNone(scheduler.next_due())
+        scheduler.executor.shutdown()
+
+
+def pod(name, namespace, app):
+    return {'metadata': {'name': name, 'namespace': namespace, 'uid': f"uid-{name}", 'resourceVersion': '1',
+                         'labels': {'app': app}}, 'status': {'phase': 'Running'}}
+
+
+class TestMultipleContexts(unittest.TestCase):
+    """tests/fake_kubectl.py 가 --context 마다 다른 디렉터리를 읽는 가짜 클러스터 두 개로 실행합니다."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.write('ctx-a', 'pods', [pod('web', 'shop', 'web')])
+        self.write('ctx-b', 'pods', [pod('db', 'bank', 'db')])
+
+        runner = SubprocessRunner([sys.executable, FAKE_KUBECTL], env={'FAKE_KUBECTL_DIR': self.directory})
+        self.scheduler = FetchScheduler(workers=2)
+        self.addCleanup(self.scheduler.executor.shutdown)
+        contexts = ['ctx-a', 'ctx-b', 'ctx-missing']
+        for name, value in (('kubectl_runner', runner), ('fetch_scheduler', self.scheduler), ('CLUSTER_CONTEXTS', contexts)):
+            patcher = mock.patch.object(app_module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.pool = ContextPool(app_module.create_cluster, contexts, max_contexts=2,
+                                on_load=app_module.on_context_load, on_evict=app_module.on_context_evict)
+        patcher = mock.patch.object(app_module, 'clusters', self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = app_module.app.test_client()
+
+    def write(self, context, kind, items):
+        os.makedirs(os.path.join(self.directory, context), exist_ok=True)
+        with open(os.path.join(self.directory, context, f"{kind}.json"), 'w') as f:
+            json.dump({'apiVersion': 'v1', 'kind': 'List', 'metadata': {'resourceVersion': '1'}, 'items': items}, f)
+
+    def node_ids(self, query):
+        return sorted(n['data']['id'] for n in self.client.get(f"/data?{query}").get_json()['nodes'])
+
+    def test_data_per_context(self):
+        self.assertEqual(self.node_ids('resource_type=pod'), ['shop/web'])
+        self.assertEqual(self.node_ids('resource_type=pod&context=ctx-b'), ['bank/db'])
+        self.assertEqual(self.client.get('/data?resource_type=pod&context=other').status_code, 404)
+        self.assertEqual(self.client.get('/data?resource_type=pod&context=ctx-missing').status_code, 500)
+        self.assertEqual(self.client.get('/contexts').get_json(),
+                         {'contexts': ['ctx-a', 'ctx-b', 'ctx-missing'], 'default': 'ctx-a', 'loaded': ['ctx-b', 'ctx-missing']})
+        # ctx-missing 을 불러오면서 가장 오래 전에 쓰인 ctx-a 를 내려놓고 조회 예약도 지움
+        self.assertIsNone(self.scheduler.state('ctx-a'))
+        self.assertIsNotNone(self.scheduler.state('ctx-b'))
+
+    def test_poll_and_emit_to_context_room(self):
+        first = app_module.socketio.test_client(app_module.app)
+        second = app_module.socketio.test_client(app_module.app)
+        self.assertEqual(first.emit('subscribe', {'resource_type': 'pod', 'context': 'ctx-b'}, callback=True),
+                         {'room': 'ctx-b/view:pod'})
+        self.assertEqual(second.emit('subscribe', {'resource_type': 'pod'}, callback=True), {'room': 'ctx-a/view:pod'})
+        self.assertIn('error', second.emit('subscribe', {'resource_type': 'pod', 'context': 'other'}, callback=True))
+        self.pool.get('ctx-b').graph_cache.refresh('pod').result(5)
+        self.pool.get('ctx-a').graph_cache.refresh('pod').result(5)
+
+        self.write('ctx-b', 'pods', [pod('db', 'bank', 'db'), pod('cache', 'bank', 'cache')])
+        self.pool.get('ctx-b').poll()
+        app_module.publish_changes()
+
+        [update] = [message for message in first.get_received() if message['name'] == 'update_pod']
+        self.assertEqual([n['data']['id'] for n in update['args'][0]['added']['nodes']], ['bank/cache'])
+        self.assertEqual([message for message in second.get_received() if message['name'] == 'update_pod'], [])
+
+        # 다른 컨텍스트로 바꾸면 이전 컨텍스트의 구독은 지워짐
+        first.emit('subscribe', {'resource_type': 'pod', 'context': 'ctx-a'}, callback=True)
+        self.assertEqual(self.pool.get('ctx-b').view_subscriptions.active_views(), set())
+        self.assertEqual(self.pool.get('ctx-a').view_subscriptions.subscriber_count('pod'), 2)
+
+        # 컨텍스트에 닿지 못하면 poll 이 실패를 알려 스케줄러가 간격을 늘림
+        shutil.rmtree(os.path.join(self.directory, 'ctx-b'))
+        with self.assertRaises(RuntimeError):
+            self.pool.get('ctx-b').poll()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+import app as app_module
+from informer import ObjectStore
+from tests.test_app import use_cluster
+
+
+def policy(name, namespace):
+    return {
+        'metadata': {'name': name, 'namespace': namespace, 'resourceVersion': '1'},
+        'spec': {'podSelector': {}, 'ingress': [{'ports': [{'protocol': 'TCP', 'port': 80}]}]},
+    }
+
+
+def resource(name, namespace, status, labels=None):
+    return {'metadata': {'name': name, 'namespace': namespace, 'resourceVersion': '1', 'labels': labels or {}}, 'status': status}
+
+
+class FakeFetcher:
+    """kubectl 대신 미리 준비한 목록을 돌려주고 호출된 kind 를 기록합니다."""
+
+    def __init__(self, lists):
+        self.lists = lists
+        self.calls = []
+
+    def fetch_all(self, kinds):
+        self.calls.extend(kinds)
+        return {kind: self.lists[kind] for kind in kinds}
+
+
+class TestDetailEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.cluster = use_cluster(self, FakeFetcher({}))
+        self.stores = self.cluster.object_stores
+        self.stores['networkpolicies'].replace([policy('allow-web', 'ns-a'), policy('allow-web', 'ns-b'), policy('deny', 'ns-a')], None)
+        self.stores['pods'].replace([resource('web-1', 'ns-a', {'phase': 'Running'}, {'app': 'web'})], None)
+        self.stores['deployments'].replace([resource('web', 'ns-a', {'availableReplicas': 2}, {'app': 'web'})], None)
+
+    def test_policy_by_namespace(self):
+        response = self.client.get('/policy/ns-b/allow-web')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['namespace'], 'ns-b')
+        self.assertEqual(self.client.get('/policy/allow-web?namespace=ns-a').get_json()['namespace'], 'ns-a')
+        self.assertEqual(self.client.get('/policy/ns-b/deny').status_code, 404)
+
+    def test_ambiguous_policy_name(self):
+        response = self.client.get('/policy/allow-web')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['namespaces'], ['ns-a', 'ns-b'])
+        self.assertEqual(self.client.get('/policy/deny').get_json()['namespace'], 'ns-a')
+
+    def test_resource_details(self):
+        pod = self.client.get('/resource/pod/ns-a/web-1').get_json()
+        self.assertEqual(pod['status'], 'Running')
+        self.assertEqual(pod['labels'], {'app': 'web'})
+        deployment = self.client.get('/resource/deployment/ns-a/web').get_json()
+        self.assertEqual(deployment['status'], 2)
+        self.assertEqual(self.client.get('/resource/pod/ns-a/missing').status_code, 404)
+        self.assertEqual(self.client.get('/resource/service/ns-a/web').status_code, 400)
+
+    def test_store_filled_once_on_demand(self):
+        self.stores['pods'] = ObjectStore()
+        self.cluster.fetcher.lists['pods'] = {'items': [resource('db-1', 'ns-a', {'phase': 'Pending'})]}
+
+        self.assertEqual(self.client.get('/resource/pod/ns-a/db-1').get_json()['status'], 'Pending')
+        self.assertEqual(self.client.get('/resource/pod/ns-a/db-1').get_json()['status'], 'Pending')
+        self.assertEqual(self.cluster.fetcher.calls, ['pods'])
+
+
+if __name__ == '__main__':
+    unittest.main()
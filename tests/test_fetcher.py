@@ -0,0 +1,107 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from fetcher import KubectlFetcher, SubprocessRunner, iter_list_items, trim_object
+from informer import KubectlWatchSource
+
+FAKE_KUBECTL = os.path.join(os.path.dirname(__file__), 'fake_kubectl.py')
+
+
+def pod(name, namespace='default'):
+    return {
+        'apiVersion': 'v1',
+        'kind': 'Pod',
+        'metadata': {
+            'name': name,
+            'namespace': namespace,
+            'uid': f"uid-{name}",
+            'labels': {'app': name, 'quote': 'a "b" [c]'},
+            'resourceVersion': '7',
+            'managedFields': [{'manager': 'kubectl', 'fieldsV1': {'f:metadata': {}}}],
+        },
+        'spec': {'containers': [{'name': 'nginx', 'image': 'nginx:latest'}]},
+        'status': {'phase': 'Running', 'conditions': [{'type': 'Ready', 'status': 'True'}]},
+    }
+
+
+class TestFetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pods = [pod(f"pod-{i}") for i in range(50)]
+        with open(os.path.join(self.directory.name, 'pods.json'), 'w') as f:
+            json.dump({'apiVersion': 'v1', 'kind': 'List', 'metadata': {'resourceVersion': '42'}, 'items': self.pods}, f, indent=4)
+        self.runner = SubprocessRunner([sys.executable, FAKE_KUBECTL], env={'FAKE_KUBECTL_DIR': self.directory.name})
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_iter_list_items_small_chunks(self):
+        document = json.dumps({'apiVersion': 'v1', 'items': self.pods, 'kind': 'List', 'metadata': {'resourceVersion': '42'}}, indent=2)
+        for chunk_size in (1, 7, 1 << 16):
+            list_fields = {}
+            items = list(iter_list_items(io.StringIO(document), chunk_size, list_fields))
+            self.assertEqual(items, self.pods)
+            self.assertEqual(list_fields['metadata'], {'resourceVersion': '42'})
+        self.assertEqual(list(iter_list_items(io.StringIO('{"items": []}'))), [])
+        self.assertEqual(list(iter_list_items(io.StringIO('{}'))), [])
+        with self.assertRaises(ValueError):
+            list(iter_list_items(io.StringIO('{"items": [{"a": 1}')))
+
+    def test_trim_object(self):
+        trimmed = trim_object('pods', self.pods[0])
+        self.assertEqual(trimmed, {
+            'metadata': {'name': 'pod-0', 'namespace': 'default', 'uid': 'uid-pod-0',
+                         'labels': {'app': 'pod-0', 'quote': 'a "b" [c]'}, 'resourceVersion': '7'},
+            'status': {'phase': 'Running'},
+        })
+        # 이름 있는 포트를 풀 수 있도록 컨테이너 포트만 남김
+        obj = dict(self.pods[0], spec={'containers': [
+            {'name': 'nginx', 'image': 'nginx:latest', 'ports': [{'name': 'http', 'containerPort': 80}]}, {'name': 'sidecar'}]})
+        self.assertEqual(trim_object('pods', obj)['spec'], {'containers': [{'ports': [{'name': 'http', 'containerPort': 80}]}]})
+
+    def test_fetch_all_with_fake_kubectl(self):
+        timings = []
+        fetcher = KubectlFetcher(self.runner, on_timing=lambda kind, seconds, count: timings.append((kind, count)))
+
+        results = fetcher.fetch_all(['pods', 'networkpolicies'])
+
+        self.assertEqual([item['metadata']['name'] for item in results['pods']['items']], [p['metadata']['name'] for p in self.pods])
+        self.assertNotIn('managedFields', results['pods']['items'][0]['metadata'])
+        self.assertEqual(results['networkpolicies'], {'items': []})
+        self.assertEqual(sorted(timings), [('networkpolicies', 0), ('pods', 50)])
+        self.assertEqual(fetcher.timings['pods']['objects'], 50)
+
+    def test_fetch_failure(self):
+        runner = SubprocessRunner([sys.executable, FAKE_KUBECTL], env={'FAKE_KUBECTL_DIR': self.directory.name, 'FAKE_KUBECTL_FAIL': 'pods'})
+        results = KubectlFetcher(runner).fetch_all(['pods', 'deployments'])
+        self.assertIsInstance(results['pods'], subprocess.CalledProcessError)
+        self.assertIn('pods', results['pods'].stderr)
+        self.assertEqual(results['deployments'], {'items': []})
+
+    def test_fetch_drains_large_stderr(self):
+        # stderr 가 파이프 버퍼보다 많아도 stdout 을 읽는 동안 막히지 않아야 함
+        runner = SubprocessRunner([sys.executable, FAKE_KUBECTL],
+                                  env={'FAKE_KUBECTL_DIR': self.directory.name, 'FAKE_KUBECTL_STDERR_BYTES': str(1 << 20)})
+        results = {}
+        thread = threading.Thread(target=lambda: results.update(KubectlFetcher(runner).fetch('pods')), daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(results['items']), 50)
+
+    def test_watch_source_list(self):
+        result = KubectlWatchSource(self.runner).list('pods')
+        self.assertEqual(result['metadata'], {'resourceVersion': '42'})
+        self.assertEqual(len(result['items']), 50)
+        self.assertNotIn('spec', result['items'][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import threading
+import unittest
+
+from graph_cache import CacheEntry, GraphBuildError, GraphCache
+
+
+class CountingBuild:
+    """호출 횟수와 실행 스레드를 기록하고, release 될 때까지 빌드를 붙잡아 두는 가짜 빌드 함수."""
+
+    def __init__(self):
+        self.calls = 0
+        self.threads = []
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.lock = threading.Lock()
+
+    def __call__(self, resource_type):
+        with self.lock:
+            self.calls += 1
+            version = self.calls
+        self.threads.append(threading.current_thread().name)
+        self.started.set()
+        self.release.wait(5)
+        return CacheEntry({'version': version, 'nodes': [], 'edges': []}, resource_versions={'pods': str(version)})
+
+
+class TestGraphCache(unittest.TestCase):
+
+    def test_concurrent_misses_share_one_build(self):
+        build = CountingBuild()
+        cache = GraphCache(build)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get('pod', timeout=5))) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        build.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(build.calls, 1)
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(entry is results[0] for entry in results))
+        self.assertTrue(build.threads[0].startswith('graph-build'))
+        self.assertEqual(results[0].resource_versions, {'pods': '1'})
+        self.assertIsNotNone(results[0].built_at)
+
+    def test_hit_after_build(self):
+        build = CountingBuild()
+        build.release.set()
+        cache = GraphCache(build)
+        first = cache.get('pod')
+        self.assertIs(cache.get('pod'), first)
+        self.assertEqual(build.calls, 1)
+
+    def test_invalidate_rebuilds(self):
+        build = CountingBuild()
+        build.release.set()
+        cache = GraphCache(build)
+        cache.get('pod')
+        cache.invalidate('pod')
+        self.assertEqual(cache.get('pod').version, 2)
+
+    def test_invalidate_during_build(self):
+        for invalidate_all in (False, True):
+            build = CountingBuild()
+            cache = GraphCache(build)
+            future = cache.refresh('pod')
+            # 빌드가 변경 전 상태를 읽은 뒤에 변경이 들어옴
+            self.assertTrue(build.started.wait(5))
+            cache.invalidate(None if invalidate_all else 'pod')
+            build.release.set()
+            self.assertEqual(future.result(5).version, 1)
+            self.assertTrue(cache.peek('pod').stale)
+            self.assertEqual(cache.get('pod', timeout=5).version, 2)
+            self.assertFalse(cache.peek('pod').stale)
+
+        # 다른 뷰의 무효화는 영향을 주지 않음
+        build = CountingBuild()
+        cache = GraphCache(build)
+        future = cache.refresh('pod')
+        self.assertTrue(build.started.wait(5))
+        cache.invalidate('deployment')
+        build.release.set()
+        future.result(5)
+        self.assertFalse(cache.peek('pod').stale)
+
+    def test_stale_while_revalidate(self):
+        build = CountingBuild()
+        build.release.set()
+        cache = GraphCache(build, stale_while_revalidate=True)
+        first = cache.get('pod')
+        build.release.clear()
+        cache.invalidate('pod')
+
+        self.assertIs(cache.get('pod'), first)
+        build.release.set()
+        cache.refresh('pod').result(5)
+        self.assertEqual(cache.get('pod').version, 2)
+
+    def test_lookup_results_reported(self):
+        build = CountingBuild()
+        build.release.set()
+        lookups = []
+        cache = GraphCache(build, stale_while_revalidate=True, on_lookup=lambda resource_type, result: lookups.append(result))
+        cache.get('pod')
+        cache.get('pod')
+        cache.invalidate('pod')
+        cache.get('pod')
+        self.assertEqual(lookups, ['miss', 'hit', 'stale'])
+
+    def test_put_keeps_newer_version(self):
+        cache = GraphCache(CountingBuild())
+        cache.put('pod', CacheEntry({'version': 5}))
+        cache.put('pod', CacheEntry({'version': 4}))
+        self.assertEqual(cache.peek('pod').version, 5)
+
+    def test_build_error_propagates(self):
+        def failing_build(resource_type):
+            raise GraphBuildError('kubectl failed')
+        cache = GraphCache(failing_build)
+        with self.assertRaises(GraphBuildError):
+            cache.get('pod')
+        self.assertIsNone(cache.peek('pod'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import gzip
+import json
+import unittest
+import zlib
+
+import app as app_module
+from graph_cache import CacheEntry
+from graph_encoding import EncodedGraph, encode_chunks, iter_graph_json, negotiate_encoding
+from tests.test_app import use_cluster
+
+
+def make_graph(size, version=1):
+    nodes = [{'data': {'id': f"ns/pod-{i}", 'label': f"pod-{i}", 'group': 'pod'}} for i in range(size)]
+    edges = [{'data': {'id': f"ns/allow->ns/pod-{i}", 'source': 'ns/allow', 'target': f"ns/pod-{i}",
+                       'type': 'ingress', 'label': 'Ingress (TCP/80)'}} for i in range(size)]
+    return {'resource_type': 'pod', 'version': version, 'nodes': nodes, 'edges': edges}
+
+
+class TestGraphEncoding(unittest.TestCase):
+
+    def test_negotiate_encoding(self):
+        self.assertEqual(negotiate_encoding('gzip, deflate, br'), 'gzip')
+        self.assertEqual(negotiate_encoding('deflate;q=0.5, gzip;q=0'), 'deflate')
+        self.assertEqual(negotiate_encoding('*'), 'gzip')
+        self.assertEqual(negotiate_encoding('br'), 'identity')
+        self.assertEqual(negotiate_encoding(None), 'identity')
+
+    def test_streamed_json_matches_json_dumps(self):
+        graph = make_graph(500)
+        for chunk_size in (1, 100, 1 << 20):
+            chunks = list(iter_graph_json(graph, chunk_size))
+            self.assertEqual(json.loads(b''.join(chunks)), graph)
+        self.assertGreater(len(list(iter_graph_json(graph, 1000))), 10)
+        self.assertEqual(json.loads(b''.join(iter_graph_json({'nodes': [], 'edges': []}))), {'nodes': [], 'edges': []})
+
+    def test_compressed_chunks(self):
+        graph = make_graph(200)
+        self.assertEqual(json.loads(gzip.decompress(b''.join(encode_chunks(iter_graph_json(graph, 512), 'gzip')))), graph)
+        self.assertEqual(json.loads(zlib.decompress(b''.join(encode_chunks(iter_graph_json(graph, 512), 'deflate')))), graph)
+
+    def test_encoded_once_per_encoding(self):
+        encoded = EncodedGraph(make_graph(10))
+        self.assertIs(encoded.get('gzip'), encoded.get('gzip'))
+        self.assertIsNot(encoded.get('gzip'), encoded.get('identity'))
+
+
+class TestConditionalDataEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.graph = make_graph(50, version=4)
+        self.cluster = use_cluster(self)
+        self.cluster.graph_cache.put('pod', CacheEntry(self.graph))
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get('/data?resource_type=pod')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), self.graph)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        etag = response.headers['ETag']
+
+        not_modified = self.client.get('/data?resource_type=pod', headers={'If-None-Match': etag})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.data, b'')
+
+        self.cluster.graph_cache.put('pod', CacheEntry(make_graph(51, version=5)))
+        changed = self.client.get('/data?resource_type=pod', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+    def test_gzip_response(self):
+        response = self.client.get('/data?resource_type=pod', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+        self.assertEqual(json.loads(gzip.decompress(response.data)), self.graph)
+        identity = self.client.get('/data?resource_type=pod')
+        self.assertNotEqual(identity.headers['ETag'], response.headers['ETag'])
+
+        page = self.client.get('/data?resource_type=pod&limit=10', headers={'Accept-Encoding': 'deflate'})
+        self.assertEqual(page.headers['Content-Encoding'], 'deflate')
+        self.assertEqual(len(json.loads(zlib.decompress(page.data))['nodes']), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import random
+import unittest
+
+from app import build_graph_data
+from graph_engine import IncrementalGraph, canonical_graph
+
+NAMESPACES = ['ns-a', 'ns-b']
+LABEL_VALUES = {'app': ['web', 'db', 'cache'], 'tier': ['front', 'back']}
+
+
+def random_labels(rng):
+    return {key: rng.choice(values) for key, values in LABEL_VALUES.items() if rng.random() < 0.7}
+
+
+def random_pod_selector(rng):
+    choice = rng.random()
+    if choice < 0.4:
+        key = rng.choice(list(LABEL_VALUES))
+        return {'matchLabels': {key: rng.choice(LABEL_VALUES[key])}}
+    if choice < 0.6:
+        return {'matchExpressions': [{'key': 'app', 'operator': 'In', 'values': rng.sample(LABEL_VALUES['app'], 2)}]}
+    if choice < 0.7:
+        return {'matchExpressions': [{'key': 'tier', 'operator': 'Exists'}]}
+    if choice < 0.8:
+        return {'matchExpressions': [{'key': 'app', 'operator': 'NotIn', 'values': ['db']}]}
+    if choice < 0.9:
+        return {'matchLabels': {}}
+    return {}
+
+
+def random_policy(rng, name, namespace):
+    spec = {'podSelector': random_pod_selector(rng)}
+    for direction, field in (('ingress', 'from'), ('egress', 'to')):
+        rules = []
+        for _ in range(rng.randint(0, 2)):
+            rule = {'ports': [{'protocol': 'TCP', 'port': rng.choice([80, 443, 5432])}]}
+            peers = []
+            for _ in range(rng.randint(1, 2)):
+                peers.append({
+                    'podSelector': random_pod_selector(rng),
+                    'namespaceSelector': {'matchLabels': {'name': rng.choice(NAMESPACES)}},
+                })
+            rule[field] = peers
+            if rng.random() < 0.2:
+                rule['ipBlock'] = {'cidr': f"10.{rng.randint(0, 9)}.0.0/16"}
+            rules.append(rule)
+        spec[direction] = rules
+    return {'metadata': {'name': name, 'namespace': namespace}, 'spec': spec}
+
+
+def random_resource(rng, name, namespace):
+    return {'metadata': {'name': name, 'namespace': namespace, 'labels': random_labels(rng)}, 'status': {'phase': 'Running'}}
+
+
+class TestIncrementalGraph(unittest.TestCase):
+
+    def assert_matches_full_rebuild(self, engine, policies, resources):
+        expected = build_graph_data({'items': list(policies.values())}, {'items': list(resources.values())}, engine.resource_type)
+        self.assertEqual(canonical_graph(engine.graph()), canonical_graph(expected))
+
+    def test_randomized_changes_match_full_rebuild(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            engine = IncrementalGraph('pod')
+            policies = {}
+            resources = {}
+            for step in range(300):
+                namespace = rng.choice(NAMESPACES)
+                action = rng.random()
+                if action < 0.3:
+                    name = f"pod-{rng.randint(0, 40)}"
+                    resource = random_resource(rng, name, namespace)
+                    event_type = 'MODIFIED' if (namespace, name) in resources else 'ADDED'
+                    resources[(namespace, name)] = resource
+                    engine.apply('pods', event_type, resource)
+                elif action < 0.45 and resources:
+                    key = rng.choice(sorted(resources))
+                    engine.apply('pods', 'DELETED', resources.pop(key))
+                elif action < 0.75:
+                    name = f"policy-{rng.randint(0, 10)}"
+                    policy = random_policy(rng, name, namespace)
+                    event_type = 'MODIFIED' if (namespace, name) in policies else 'ADDED'
+                    policies[(namespace, name)] = policy
+                    engine.apply('networkpolicies', event_type, policy)
+                elif action < 0.85 and policies:
+                    key = rng.choice(sorted(policies))
+                    engine.apply('networkpolicies', 'DELETED', policies.pop(key))
+                else:
+                    # 다른 뷰의 리소스 이벤트는 무시되어야 함
+                    self.assertFalse(engine.apply('deployments', 'ADDED', random_resource(rng, 'other', namespace)))
+                if step % 10 == 0:
+                    self.assert_matches_full_rebuild(engine, policies, resources)
+            self.assert_matches_full_rebuild(engine, policies, resources)
+
+    def test_label_only_change_is_reported(self):
+        engine = IncrementalGraph('deployment')
+        resource = {'metadata': {'name': 'web', 'namespace': 'ns-a', 'labels': {'app': 'web'}}}
+        self.assertTrue(engine.apply('deployments', 'ADDED', resource))
+        self.assertFalse(engine.apply('deployments', 'MODIFIED', resource))
+        self.assertTrue(engine.apply('deployments', 'MODIFIED', {'metadata': {'name': 'web', 'namespace': 'ns-a', 'labels': {'app': 'db'}}}))
+
+    def test_load_matches_full_rebuild(self):
+        rng = random.Random(42)
+        policies = {(ns, f"p{i}"): random_policy(rng, f"p{i}", ns) for ns in NAMESPACES for i in range(5)}
+        resources = {(ns, f"d{i}"): random_resource(rng, f"d{i}", ns) for ns in NAMESPACES for i in range(20)}
+        engine = IncrementalGraph('deployment')
+        engine.load({'items': list(policies.values())}, {'items': list(resources.values())})
+        self.assert_matches_full_rebuild(engine, policies, resources)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+
+import app as app_module
+from graph_cache import CacheEntry
+from graph_filter import SelectorParseError, filter_by_labels, merge_subgraphs, paginate, parse_label_selector, partition_by_namespace
+from graph_engine import IncrementalGraph
+from tests.test_app import use_cluster
+
+
+def node(node_id, group='pod'):
+    return {'data': {'id': node_id, 'label': node_id, 'group': group}}
+
+
+def edge(source, target):
+    return {'data': {'id': f"{source}->{target}", 'source': source, 'target': target, 'type': 'ingress', 'label': 'Ingress (All Ports)'}}
+
+
+GRAPH = {
+    'version': 3,
+    'nodes': [node('ns-a/allow', 'policy'), node('ns-a/web'), node('ns-a/db'), node('ns-b/api'),
+              node('ns-c/deny', 'policy'), node('ns-c/cache'), node('ns-a/allow/ipBlock', 'ipblock')],
+    'edges': [edge('ns-a/allow', 'ns-a/web'), edge('ns-a/allow', 'ns-b/api'), edge('ns-c/deny', 'ns-c/cache'),
+              edge('ns-a/allow', 'ns-a/allow/ipBlock')],
+}
+LABELS = {'ns-a/web': {'app': 'web'}, 'ns-a/db': {'app': 'db'}, 'ns-b/api': {'app': 'api', 'tier': 'back'}, 'ns-c/cache': {}}
+
+
+def ids(elements):
+    return sorted(element['data']['id'] for element in elements)
+
+
+class TestGraphFilter(unittest.TestCase):
+
+    def test_parse_label_selector(self):
+        self.assertEqual(parse_label_selector('app=web,tier!=db, env in (prod, dev),!legacy,team,x==y'), {
+            'matchLabels': {'app': 'web', 'x': 'y'},
+            'matchExpressions': [
+                {'key': 'tier', 'operator': 'NotIn', 'values': ['db']},
+                {'key': 'env', 'operator': 'In', 'values': ['prod', 'dev']},
+                {'key': 'legacy', 'operator': 'DoesNotExist'},
+                {'key': 'team', 'operator': 'Exists'},
+            ],
+        })
+        with self.assertRaises(SelectorParseError):
+            parse_label_selector('app in prod')
+
+    def test_namespace_merge_includes_cross_namespace_peers(self):
+        subgraphs = partition_by_namespace(GRAPH)
+        merged = merge_subgraphs(subgraphs, ['ns-b'])
+        self.assertEqual(ids(merged['nodes']), ['ns-a/allow', 'ns-b/api'])
+        self.assertEqual(ids(merged['edges']), ['ns-a/allow->ns-b/api'])
+
+        merged = merge_subgraphs(subgraphs, ['ns-a', 'ns-b', 'missing'])
+        self.assertEqual(ids(merged['nodes']), ['ns-a/allow', 'ns-a/allow/ipBlock', 'ns-a/db', 'ns-a/web', 'ns-b/api'])
+        self.assertEqual(len(merged['edges']), 3)
+
+    def test_filter_by_labels(self):
+        filtered = filter_by_labels(GRAPH, parse_label_selector('app in (web,api)'), LABELS.get)
+        self.assertEqual(ids(filtered['nodes']), ['ns-a/allow', 'ns-a/web', 'ns-b/api'])
+        self.assertEqual(ids(filtered['edges']), ['ns-a/allow->ns-a/web', 'ns-a/allow->ns-b/api'])
+
+    def test_pages_add_up_to_whole_graph(self):
+        for limit in (1, 2, 3, 100):
+            nodes, edges, offset = [], [], 0
+            while offset is not None:
+                page, offset = paginate(GRAPH, offset, limit)
+                self.assertLessEqual(len(page['nodes']), limit)
+                page_ids = set(ids(nodes + page['nodes']))
+                for e in page['edges']:
+                    self.assertIn(e['data']['source'], page_ids)
+                    self.assertIn(e['data']['target'], page_ids)
+                nodes += page['nodes']
+                edges += page['edges']
+            self.assertEqual(ids(nodes), ids(GRAPH['nodes']))
+            self.assertEqual(ids(edges), ids(GRAPH['edges']))
+
+
+class TestFilteredDataEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        cluster = use_cluster(self)
+        cluster.graph_cache.put('pod', CacheEntry(dict(GRAPH, resource_type='pod')))
+        engine = IncrementalGraph('pod')
+        engine.load({'items': []}, {'items': [{'metadata': {'name': key.split('/')[1], 'namespace': key.split('/')[0], 'labels': labels}}
+                                              for key, labels in LABELS.items()]})
+        cluster.graph_engines['pod'] = engine
+
+    def test_namespaces_and_label_selector(self):
+        data = self.client.get('/data?resource_type=pod&namespaces=ns-a&labelSelector=app%3Dweb').get_json()
+        self.assertEqual(data['version'], 3)
+        self.assertEqual(ids(data['nodes']), ['ns-a/allow', 'ns-a/web'])
+        self.assertEqual(self.client.get('/data?resource_type=pod&labelSelector=app+in+x').status_code, 400)
+
+    def test_paging_with_cursor(self):
+        first = self.client.get('/data?resource_type=pod&namespaces=ns-a,ns-c&limit=4').get_json()
+        self.assertEqual(first['total_nodes'], 7)
+        self.assertEqual(first['next_cursor'], '3:4')
+        second = self.client.get(f"/data?resource_type=pod&namespaces=ns-a,ns-c&limit=4&cursor={first['next_cursor']}").get_json()
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(len(first['nodes']) + len(second['nodes']), 7)
+        self.assertEqual(len(first['edges']) + len(second['edges']), 4)
+
+        stale = self.client.get('/data?resource_type=pod&limit=4&cursor=2:4')
+        self.assertEqual(stale.status_code, 409)
+
+
+if __name__ == '__main__':
+    unittest.main()
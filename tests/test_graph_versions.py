@@ -0,0 +1,89 @@
+import unittest
+
+import app as app_module
+from graph_versions import VersionedGraph
+from tests.test_app import use_cluster
+
+
+def node(node_id, label=None, group='pod'):
+    return {'data': {'id': node_id, 'label': label or node_id, 'group': group}}
+
+
+def edge(source, target, edge_type='ingress', label='Ingress (All Ports)'):
+    return {'data': {'source': source, 'target': target, 'type': edge_type, 'label': label}}
+
+
+def apply_patch(snapshot, patch):
+    """클라이언트(scripts.js applyPatch)와 같은 방식으로 patch 를 적용합니다."""
+    nodes = {n['data']['id']: n for n in snapshot['nodes']}
+    edges = {e['data']['id']: e for e in snapshot['edges']}
+    for group, elements in (('nodes', nodes), ('edges', edges)):
+        for element_id in patch['removed'][group]:
+            del elements[element_id]
+        for element in patch['changed'][group] + patch['added'][group]:
+            elements[element['data']['id']] = element
+    return {'version': patch['version'], 'nodes': list(nodes.values()), 'edges': list(edges.values())}
+
+
+def as_sets(snapshot):
+    return ({n['data']['id']: repr(n) for n in snapshot['nodes']}, {e['data']['id']: repr(e) for e in snapshot['edges']})
+
+
+class TestVersionedGraph(unittest.TestCase):
+
+    def test_patches_reconstruct_snapshots(self):
+        graphs = [
+            {'nodes': [node('ns/p', group='policy'), node('ns/a')], 'edges': [edge('ns/p', 'ns/a')]},
+            {'nodes': [node('ns/p', group='policy'), node('ns/a', 'renamed'), node('ns/b')],
+             'edges': [edge('ns/p', 'ns/a'), edge('ns/p', 'ns/b'), edge('ns/p', 'ns/b')]},
+            {'nodes': [node('ns/p', group='policy'), node('ns/b')], 'edges': [edge('ns/p', 'ns/b')]},
+        ]
+        versioned = VersionedGraph('pod')
+        client = versioned.snapshot()
+        for graph in graphs:
+            patch = versioned.update(graph)
+            self.assertEqual(patch['base_version'], client['version'])
+            client = apply_patch(client, patch)
+            self.assertEqual(as_sets(client), as_sets(versioned.snapshot()))
+        self.assertEqual(versioned.version, 3)
+
+    def test_unchanged_graph_keeps_version(self):
+        versioned = VersionedGraph('pod')
+        graph = {'nodes': [node('ns/a')], 'edges': []}
+        self.assertIsNotNone(versioned.update(graph))
+        self.assertIsNone(versioned.update({'nodes': [node('ns/a')], 'edges': []}))
+        self.assertEqual(versioned.version, 1)
+
+    def test_duplicate_edges_get_distinct_ids(self):
+        versioned = VersionedGraph('pod')
+        versioned.update({'nodes': [node('ns/p'), node('ns/a')], 'edges': [edge('ns/p', 'ns/a'), edge('ns/p', 'ns/a')]})
+        ids = [e['data']['id'] for e in versioned.snapshot()['edges']]
+        self.assertEqual(len(set(ids)), 2)
+
+    def test_patches_since(self):
+        versioned = VersionedGraph('pod', history_size=2)
+        for i in range(4):
+            versioned.update({'nodes': [node(f"ns/{i}")], 'edges': []})
+        self.assertEqual([p['version'] for p in versioned.patches_since(2)], [3, 4])
+        self.assertEqual(versioned.patches_since(4), [])
+        self.assertIsNone(versioned.patches_since(1))
+
+    def test_data_endpoint_resync(self):
+        client = app_module.app.test_client()
+        cluster = use_cluster(self)
+        cluster.publish_graph('pod', {'nodes': [node('ns/a')], 'edges': []})
+        cluster.publish_graph('pod', {'nodes': [node('ns/a'), node('ns/b')], 'edges': []})
+
+        response = client.get('/data?resource_type=pod&since=1').get_json()
+        self.assertEqual(response['version'], 2)
+        self.assertEqual([p['version'] for p in response['patches']], [2])
+
+        response = client.get('/data?resource_type=pod&since=99').get_json()
+        self.assertEqual(response['version'], 2)
+        self.assertEqual(sorted(n['data']['id'] for n in response['nodes']), ['ns/a', 'ns/b'])
+
+        self.assertEqual(client.get('/data?resource_type=service').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
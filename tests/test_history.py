@@ -0,0 +1,182 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+import app as app_module
+from history import HistoryLog, apply_delta, diff_objects, parse_timestamp
+from snapshot_source import SnapshotSource
+from tests.test_app import SAMPLES, use_cluster
+
+
+class FakeClock:
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def pod(name, app, namespace='shop', **extra):
+    return {'metadata': {'name': name, 'namespace': namespace, 'labels': {'app': app}}, **extra}
+
+
+class TestHistoryLog(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.clock = FakeClock()
+
+    def open(self, **options):
+        return HistoryLog(self.directory, clock=self.clock, **options)
+
+    def test_delta_round_trip(self):
+        old = {'metadata': {'name': 'a', 'labels': {'app': 'a', 'tier': 'web'}}, 'spec': {'ports': [1, 2]}}
+        new = {'metadata': {'name': 'a', 'labels': {'app': 'b'}}, 'spec': {'ports': [1]}, 'status': {}}
+        delta = diff_objects(old, new)
+        self.assertEqual(delta, {'set': [[['metadata', 'labels', 'app'], 'b'], [['spec', 'ports'], [1]], [['status'], {}]],
+                                 'unset': [['metadata', 'labels', 'tier']]})
+        self.assertEqual(apply_delta(old, delta), new)
+        self.assertEqual(old['metadata']['labels']['tier'], 'web')
+
+    def test_state_at_and_changes_across_checkpoints(self):
+        history = self.open(checkpoint_every=3, flush_every=2)
+        for step in range(10):
+            self.clock.now = 1001.0 + step
+            history.record('pods', 'ADDED' if step == 0 else 'MODIFIED', pod('web', f"v{step}"))
+            history.record('pods', 'MODIFIED', pod('web', f"v{step}"))  # 같은 객체는 기록하지 않음
+        self.clock.now = 1011.0
+        history.record('pods', 'DELETED', pod('web', 'v9'))
+        history.record('pods', 'DELETED', pod('web', 'v9'))
+        self.assertEqual(len(history.checkpoints()), 4)
+
+        self.assertIsNone(history.state_at(999))
+        self.assertEqual(history.state_at(1000.5), {})
+        for step in range(10):
+            state = history.state_at(1001.5 + step)
+            self.assertEqual(state['pods']['shop/web']['metadata']['labels'], {'app': f"v{step}"})
+        self.assertEqual(history.state_at(1012)['pods'], {})
+
+        changes = history.changes(1002.5, 1011)
+        self.assertEqual([(c['time'], c['event']) for c in changes],
+                         [(1003.0 + i, 'MODIFIED') for i in range(7)] + [(1010.0, 'MODIFIED'), (1011.0, 'DELETED')])
+        self.assertEqual(len(history.changes(0, 2000, limit=4)), 4)
+
+    def test_checkpoints_within_one_millisecond(self):
+        history = self.open(checkpoint_every=2)
+        self.clock.now = 1001.0
+        for step in range(9):
+            history.record('pods', 'ADDED' if step < 2 else 'MODIFIED', pod(f"p{step % 2}", f"v{step}"))
+        self.assertEqual(history.checkpoints(), [1000000, 1001000, 1001001, 1001002, 1001003])
+        # 같은 밀리초를 피해 늘린 체크포인트 뒤의 기록도 기록된 시각의 상태에 들어감
+        changes = history.changes(1000, 1002)
+        self.assertEqual(len(changes), 9)
+        latest = {}
+        for step, change in enumerate(changes):
+            latest[change['key']] = f"v{step}"
+            if step + 1 < len(changes) and changes[step + 1]['time'] == change['time']:
+                continue  # 같은 시각의 기록은 모두 반영된 상태
+            state = history.state_at(change['time'])
+            self.assertEqual({key: obj['metadata']['labels']['app'] for key, obj in state['pods'].items()}, latest)
+
+    def test_reopen_recovers_state_and_skips_truncated_tail(self):
+        history = self.open(checkpoint_every=100)
+        self.clock.now = 1001
+        history.record('pods', 'ADDED', pod('web', 'web'))
+        history.record('pods', 'ADDED', pod('db', 'db'))
+        history.flush()
+        # 기록 도중 종료되어 마지막 gzip 멤버가 잘린 경우
+        log = os.path.join(self.directory, [name for name in os.listdir(self.directory) if name.endswith('.log.gz')][0])
+        with open(log, 'ab') as f:
+            f.write(gzip.compress(b'{"t":1002,"k":"pods","e":"D","key":"shop/web"}\n')[:-6])
+
+        reopened = self.open(checkpoint_every=100)
+        self.assertEqual(sorted(reopened.state_at(1003)['pods']), ['shop/db', 'shop/web'])
+        # 다시 받은 목록과 같은 객체는 기록하지 않고, 목록에서 빠진 객체는 삭제로 기록함
+        self.clock.now = 1004
+        reopened.record('pods', 'ADDED', pod('web', 'web'))
+        reopened.reconcile('pods', ['shop/web'])
+        self.assertEqual([c['event'] for c in reopened.changes(1003, 1005)], ['DELETED'])
+        self.assertEqual(list(reopened.state_at(1005)['pods']), ['shop/web'])
+
+    def test_retention_and_size_limit(self):
+        history = self.open(checkpoint_every=2, retention_seconds=100)
+        for step in range(8):
+            self.clock.now = 1000.0 + step * 60
+            history.record('pods', 'ADDED' if step < 2 else 'MODIFIED', pod(f"p{step % 2}", f"v{step}"))
+        # 마지막 체크포인트(1420) 기준으로 100초보다 전에 끝난 세그먼트는 지워짐
+        self.assertEqual(history.checkpoints(), [1300000, 1420000])
+        self.assertIsNone(history.state_at(1200))
+        self.assertEqual(history.oldest(), 1300.0)
+        self.assertEqual(history.state_at(1500)['pods']['shop/p1']['metadata']['labels'], {'app': 'v7'})
+
+        for name, max_bytes, checkpoints in (('limited', 1, 1), ('unlimited', None, 2)):
+            log = HistoryLog(os.path.join(self.directory, name), checkpoint_every=5, max_bytes=max_bytes, clock=self.clock)
+            for step in range(30):
+                log.record('pods', 'ADDED', pod(f"p{step}", 'web'))
+            # 체크포인트 간격은 객체 수 이상: 처음 것과 5번째 기록 뒤에만 쓰고, 그 뒤로는 추가만으로 간격을 채우지 못함
+            self.assertEqual(len(log.checkpoints()), checkpoints)
+
+    def test_parse_timestamp(self):
+        self.assertEqual(parse_timestamp('1700000000.5'), 1700000000.5)
+        self.assertEqual(parse_timestamp('2023-11-14T22:13:20Z'), 1700000000)
+        self.assertEqual(parse_timestamp('2023-11-15T07:13:20+09:00'), 1700000000)
+        with self.assertRaises(ValueError):
+            parse_timestamp('yesterday')
+        for value in ('inf', '-inf', 'nan', '1e400'):
+            with self.assertRaises(ValueError):
+                parse_timestamp(value)
+
+
+class TestHistoryEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cluster = use_cluster(self, SnapshotSource(SAMPLES, cache_dir=None))
+        self.client = app_module.app.test_client()
+
+    def test_history_disabled(self):
+        self.assertEqual(self.client.get('/history').status_code, 404)
+
+    def test_graph_at_time_and_diff(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cluster.history = HistoryLog(directory.name, checkpoint_every=2, clock=self.clock)
+        self.clock.now = 1001
+        self.assertEqual(self.client.get('/data?resource_type=deployment').status_code, 200)
+        before = self.client.get('/history?resource_type=deployment&at=1001.5').get_json()
+
+        self.clock.now = 1002
+        deployment = {'metadata': {'name': 'extra', 'namespace': 'test-namespace-1', 'labels': {'app': 'extra'},
+                                   'resourceVersion': '9'}}
+        if self.cluster.object_stores['deployments'].apply('ADDED', deployment):
+            self.cluster.on_object_change('deployments', 'ADDED', deployment)
+        after = self.client.get('/history?resource_type=deployment&at=1970-01-01T00:16:43Z').get_json()
+
+        ids = lambda graph: sorted(n['data']['id'] for n in graph['nodes'])
+        self.assertEqual(ids(after), sorted(ids(before) + ['test-namespace-1/extra']))
+        self.assertEqual(ids(after), ids(self.client.get('/data?resource_type=deployment').get_json()))
+        self.assertEqual(after['time'], 1003)
+
+        diff = self.client.get('/history/diff?resource_type=deployment&from=1001.5&to=1003').get_json()
+        self.assertEqual([n['data']['id'] for n in diff['added']['nodes']], ['test-namespace-1/extra'])
+        self.assertEqual(diff['changes'], [{'time': 1002, 'kind': 'deployments', 'event': 'ADDED',
+                                            'key': 'test-namespace-1/extra'}])
+        self.assertFalse(diff['truncated'])
+
+        self.assertEqual(self.client.get('/history?at=10').status_code, 404)
+        self.assertEqual(self.client.get('/history?at=soon').status_code, 400)
+        # 0 은 '지금' 이 아니라 1970 년 시점 (기록 이전이므로 404)
+        self.assertEqual(self.client.get('/history?at=0').status_code, 404)
+        self.assertEqual(self.client.get('/history/diff?from=1001.5&to=0').status_code, 400)
+        self.assertEqual(self.client.get('/history?at=inf').status_code, 400)
+        self.assertEqual(self.client.get('/history/diff?from=nan').status_code, 400)
+        self.assertEqual(self.client.get('/history/diff?to=1003').status_code, 400)
+        self.assertEqual(self.client.get('/history/diff?from=1003&to=1001').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
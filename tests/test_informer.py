@@ -0,0 +1,107 @@
+import unittest
+from threading import Event
+
+from informer import Informer, ObjectStore
+
+
+def make_pod(name, resource_version, labels=None, namespace='default'):
+    return {
+        'metadata': {
+            'name': name,
+            'namespace': namespace,
+            'resourceVersion': str(resource_version),
+            'labels': labels or {},
+        }
+    }
+
+
+class FakeSource:
+    """list 결과와 watch 이벤트 스트림을 순서대로 돌려주는 가짜 이벤트 소스."""
+
+    def __init__(self, lists, streams):
+        self.lists = list(lists)
+        self.streams = list(streams)
+        self.watch_calls = []
+
+    def list(self, kind):
+        return self.lists.pop(0)
+
+    def watch(self, kind, resource_version):
+        self.watch_calls.append(resource_version)
+        return iter(self.streams.pop(0) if self.streams else [])
+
+
+class TestInformer(unittest.TestCase):
+
+    def test_applies_watch_events(self):
+        source = FakeSource(
+            lists=[{'metadata': {'resourceVersion': '10'}, 'items': [make_pod('a', 5), make_pod('b', 6)]}],
+            streams=[[
+                {'type': 'ADDED', 'object': make_pod('c', 11)},
+                {'type': 'MODIFIED', 'object': make_pod('a', 12, {'app': 'web'})},
+                {'type': 'DELETED', 'object': make_pod('b', 13)},
+                {'type': 'BOOKMARK', 'object': {'metadata': {'resourceVersion': '20'}}},
+            ]],
+        )
+        changes = []
+        informer = Informer('pods', source, on_change=lambda kind, event_type, obj: changes.append((event_type, obj['metadata']['name'])))
+
+        informer.sync_once()
+
+        self.assertEqual(source.watch_calls, ['10'])
+        self.assertEqual(sorted(item['metadata']['name'] for item in informer.store.list()['items']), ['a', 'c'])
+        self.assertEqual(informer.store.get('default/a')['metadata']['labels'], {'app': 'web'})
+        self.assertEqual(informer.store.resource_version, '20')
+        self.assertEqual(changes, [('ADDED', 'a'), ('ADDED', 'b'), ('ADDED', 'c'), ('MODIFIED', 'a'), ('DELETED', 'b')])
+
+    def test_relists_after_gone(self):
+        source = FakeSource(
+            lists=[
+                {'metadata': {'resourceVersion': '10'}, 'items': [make_pod('a', 5), make_pod('b', 6)]},
+                {'metadata': {'resourceVersion': '50'}, 'items': [make_pod('a', 5), make_pod('d', 40)]},
+            ],
+            streams=[
+                [{'type': 'ERROR', 'object': {'kind': 'Status', 'code': 410, 'message': 'too old resource version'}}],
+                [],
+            ],
+        )
+        changes = []
+        informer = Informer('pods', source, on_change=lambda kind, event_type, obj: changes.append((event_type, obj['metadata']['name'])))
+
+        informer.sync_once()
+        self.assertTrue(informer.needs_relist)
+        changes.clear()
+        informer.sync_once()
+
+        self.assertEqual(source.watch_calls, ['10', '50'])
+        self.assertEqual(sorted(item['metadata']['name'] for item in informer.store.list()['items']), ['a', 'd'])
+        self.assertEqual(sorted(changes), [('ADDED', 'd'), ('DELETED', 'b')])
+
+    def test_run_stops_and_retries_on_error(self):
+        stop_event = Event()
+
+        class FailingSource:
+            calls = 0
+
+            def list(self, kind):
+                FailingSource.calls += 1
+                if FailingSource.calls >= 2:
+                    stop_event.set()
+                raise RuntimeError('kubectl unavailable')
+
+        informer = Informer('pods', FailingSource(), retry_seconds=0)
+        informer.run(stop_event)
+
+        self.assertEqual(FailingSource.calls, 2)
+        self.assertFalse(informer.has_synced)
+
+    def test_store_ignores_stale_resource_version(self):
+        store = ObjectStore()
+        self.assertTrue(store.apply('ADDED', make_pod('a', 1)))
+        self.assertFalse(store.apply('MODIFIED', make_pod('a', 1)))
+        self.assertTrue(store.apply('DELETED', make_pod('a', 2)))
+        self.assertFalse(store.apply('DELETED', make_pod('a', 3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
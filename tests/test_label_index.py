@@ -0,0 +1,94 @@
+import random
+import unittest
+
+from app import map_policies_to_resources
+from label_index import LabelIndex, matches_selector
+
+NAMESPACES = ['ns-a', 'ns-b']
+LABEL_VALUES = {'app': ['web', 'db', 'cache'], 'tier': ['front', 'back'], 'env': ['prod', 'dev']}
+OPERATORS = ['In', 'NotIn', 'Exists', 'DoesNotExist']
+
+
+def random_labels(rng):
+    return {key: rng.choice(values) for key, values in LABEL_VALUES.items() if rng.random() < 0.7}
+
+
+def random_selector(rng):
+    if rng.random() < 0.1:
+        return {}
+    selector = {}
+    match_labels = {key: rng.choice(values) for key, values in LABEL_VALUES.items() if rng.random() < 0.3}
+    if match_labels or rng.random() < 0.5:
+        selector['matchLabels'] = match_labels
+    expressions = []
+    for _ in range(rng.randint(0, 2)):
+        key = rng.choice(list(LABEL_VALUES))
+        expression = {'key': key, 'operator': rng.choice(OPERATORS)}
+        if expression['operator'] in ('In', 'NotIn'):
+            expression['values'] = rng.sample(LABEL_VALUES[key], rng.randint(1, len(LABEL_VALUES[key])))
+        expressions.append(expression)
+    if expressions:
+        selector['matchExpressions'] = expressions
+    return selector
+
+
+class TestLabelIndex(unittest.TestCase):
+
+    def test_matches_selector_expressions(self):
+        labels = {'app': 'web', 'tier': 'front'}
+        self.assertTrue(matches_selector(labels, {'matchExpressions': [{'key': 'app', 'operator': 'In', 'values': ['web', 'db']}]}))
+        self.assertFalse(matches_selector(labels, {'matchExpressions': [{'key': 'app', 'operator': 'NotIn', 'values': ['web']}]}))
+        self.assertTrue(matches_selector(labels, {'matchExpressions': [{'key': 'env', 'operator': 'DoesNotExist'}]}))
+        self.assertFalse(matches_selector(labels, {'matchExpressions': [{'key': 'env', 'operator': 'Exists'}]}))
+        self.assertFalse(matches_selector(labels, {}))
+
+    def test_select_matches_brute_force(self):
+        rng = random.Random(7)
+        index = LabelIndex()
+        resources = {}
+        for i in range(300):
+            key = f"{rng.choice(NAMESPACES)}/pod-{i}"
+            resources[key] = random_labels(rng)
+            index.add(key, key.split('/')[0], resources[key])
+        for i in range(0, 300, 3):
+            key = next(k for k in resources if k.endswith(f"/pod-{i}"))
+            index.remove(key)
+            del resources[key]
+
+        for _ in range(200):
+            selector = random_selector(rng)
+            namespace = rng.choice(NAMESPACES)
+            expected = [key for key, labels in resources.items()
+                        if key.startswith(namespace + '/') and matches_selector(labels, selector)]
+            self.assertEqual(index.select(namespace, selector), expected, selector)
+
+    def test_map_policies_to_resources_uses_selectors(self):
+        resources = {'items': [
+            {'metadata': {'name': 'web', 'namespace': 'ns-a', 'labels': {'app': 'web'}}, 'status': {'phase': 'Running'}},
+            {'metadata': {'name': 'db', 'namespace': 'ns-a', 'labels': {'app': 'db'}}, 'status': {'phase': 'Running'}},
+            {'metadata': {'name': 'web', 'namespace': 'ns-b', 'labels': {'app': 'web'}}, 'status': {'phase': 'Running'}},
+        ]}
+        policies = {'items': [{
+            'metadata': {'name': 'allow-web', 'namespace': 'ns-a'},
+            'spec': {
+                'podSelector': {'matchLabels': {'app': 'db'}},
+                'ingress': [{
+                    'from': [{
+                        'podSelector': {'matchExpressions': [{'key': 'app', 'operator': 'In', 'values': ['web']}]},
+                        'namespaceSelector': {'matchLabels': {'name': 'ns-a'}},
+                    }],
+                    'ports': [{'protocol': 'TCP', 'port': 5432}],
+                }],
+            },
+        }]}
+
+        policy_map, edges, resource_map = map_policies_to_resources(policies, resources, 'pod')
+
+        self.assertEqual([(e['source'], e['target'], e['type']) for e in edges],
+                         [('ns-a/allow-web', 'ns-a/web', 'ingress')])
+        self.assertEqual(resource_map['ns-a/web']['policies'], ['ns-a/allow-web'])
+        self.assertEqual(resource_map['ns-b/web']['policies'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
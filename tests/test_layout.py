@@ -0,0 +1,76 @@
+import math
+import unittest
+
+from layout import GraphLayout, with_positions
+from tests.test_app import use_cluster
+
+
+def make_graph(pods, policies=3, version=1):
+    nodes = [{'data': {'id': f"ns-{j % 2}/policy-{j}", 'group': 'policy'}} for j in range(policies)]
+    nodes += [{'data': {'id': f"ns-{i % 2}/pod-{i}", 'group': 'pod'}} for i in range(pods)]
+    edges = [{'data': {'source': f"ns-{(i % policies) % 2}/policy-{i % policies}", 'target': f"ns-{i % 2}/pod-{i}",
+                       'type': 'ingress', 'label': 'Ingress (All Ports)'}} for i in range(pods)]
+    return {'version': version, 'nodes': nodes, 'edges': edges}
+
+
+def distance(a, b):
+    return math.hypot(a['x'] - b['x'], a['y'] - b['y'])
+
+
+class TestGraphLayout(unittest.TestCase):
+
+    def test_positions_are_deterministic_and_finite(self):
+        first = GraphLayout()
+        moved = first.update(make_graph(30))
+        self.assertEqual(len(moved), 33)
+        self.assertTrue(all(math.isfinite(p['x']) and math.isfinite(p['y']) for p in moved.values()))
+        second = GraphLayout()
+        second.update(make_graph(30))
+        self.assertEqual(first.positions(), second.positions())
+
+    def test_connected_nodes_are_closer(self):
+        layout = GraphLayout()
+        layout.update(make_graph(30))
+        positions = layout.positions()
+        own = [distance(positions['ns-0/policy-0'], positions[f"ns-{i % 2}/pod-{i}"]) for i in range(0, 30, 3)]
+        other = [distance(positions['ns-0/policy-0'], positions[f"ns-{i % 2}/pod-{i}"]) for i in range(1, 30, 3)]
+        self.assertLess(sum(own) / len(own), sum(other) / len(other))
+
+    def test_incremental_update_only_moves_changed_neighbourhood(self):
+        layout = GraphLayout()
+        layout.update(make_graph(30))
+        before = layout.positions()
+
+        self.assertEqual(layout.update(make_graph(30)), {})  # 같은 버전
+        moved = layout.update(make_graph(31, version=2))
+
+        self.assertIn('ns-0/pod-30', moved)
+        self.assertLessEqual(set(moved), {'ns-0/pod-30', 'ns-0/policy-0'})
+        after = layout.positions()
+        self.assertEqual(after['ns-1/pod-1'], before['ns-1/pod-1'])
+
+        layout.update(make_graph(29, version=3))
+        self.assertNotIn('ns-0/pod-30', layout.positions())
+        self.assertEqual(layout.positions()['ns-0/pod-0'], after['ns-0/pod-0'])
+
+    def test_with_positions_does_not_modify_graph(self):
+        graph = make_graph(2)
+        placed = with_positions(graph, {'ns-0/pod-0': {'x': 1.0, 'y': 2.0}})
+        self.assertEqual(placed['nodes'][3]['position'], {'x': 1.0, 'y': 2.0})
+        self.assertNotIn('position', graph['nodes'][3])
+        self.assertNotIn('position', placed['nodes'][0])
+
+    def test_published_graph_and_patch_carry_positions(self):
+        cluster = use_cluster(self)
+        graph = make_graph(5)
+        cluster.publish_graph('pod', graph)
+        entry = cluster.graph_cache.peek('pod')
+        self.assertTrue(all('position' in node for node in entry.graph['nodes']))
+
+        patch = cluster.publish_graph('pod', make_graph(6))
+        self.assertIn('ns-1/pod-5', patch['positions'])
+        self.assertNotIn('position', patch['added']['nodes'][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
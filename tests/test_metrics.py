@@ -0,0 +1,87 @@
+import unittest
+from unittest import mock
+
+import app as app_module
+from metrics import Registry, format_stats, profile_call
+from snapshot_source import SnapshotSource
+from tests.test_app import SAMPLES, use_cluster
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_render_text_format(self):
+        registry = Registry('test_')
+        requests = registry.counter('requests_total', "Requests", ['path'])
+        clients = registry.gauge('clients', "Clients")
+        latency = registry.histogram('latency_seconds', "Latency", ['path'], buckets=(0.1, 1))
+        requests.inc(path='/data')
+        requests.inc(2, path='/a"b')
+        clients.inc()
+        clients.inc()
+        clients.dec()
+        latency.observe(0.05, path='/data')
+        latency.observe(0.5, path='/data')
+        latency.observe(5, path='/data')
+
+        lines = registry.render().splitlines()
+        self.assertIn('# TYPE test_requests_total counter', lines)
+        self.assertIn('test_requests_total{path="/data"} 1', lines)
+        self.assertIn('test_requests_total{path="/a\\"b"} 2', lines)
+        self.assertIn('test_clients 1', lines)
+        self.assertIn('test_latency_seconds_bucket{path="/data",le="0.1"} 1', lines)
+        self.assertIn('test_latency_seconds_bucket{path="/data",le="1"} 2', lines)
+        self.assertIn('test_latency_seconds_bucket{path="/data",le="+Inf"} 3', lines)
+        self.assertIn('test_latency_seconds_sum{path="/data"} 5.55', lines)
+        self.assertIn('test_latency_seconds_count{path="/data"} 3', lines)
+
+    def test_label_and_value_checks(self):
+        registry = Registry()
+        counter = registry.counter('events_total', "Events", ['kind'])
+        with self.assertRaises(ValueError):
+            counter.inc(other='x')
+        with self.assertRaises(ValueError):
+            counter.inc(-1, kind='pods')
+
+    def test_profile_call(self):
+        result, stats = profile_call(sorted, [3, 1, 2])
+        self.assertEqual(result, [1, 2, 3])
+        self.assertIn('function calls', format_stats(stats))
+
+
+class TestMetricsEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        use_cluster(self, SnapshotSource(SAMPLES, cache_dir=None))
+
+    def test_metrics_after_data_request(self):
+        hits = app_module.graph_cache_lookups.value(resource_type='deployment', result='hit')
+        self.client.get('/data?resource_type=deployment')
+        self.client.get('/data?resource_type=deployment')
+
+        self.assertEqual(app_module.graph_cache_lookups.value(resource_type='deployment', result='hit'), hits + 1)
+        self.assertGreater(app_module.graph_build_duration.count(resource_type='deployment', stage='graph'), 0)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        body = response.get_data(as_text=True)
+        self.assertIn('netpol_visualizer_graph_cache_lookups_total{resource_type="deployment",result="hit"}', body)
+        self.assertIn('netpol_visualizer_http_request_duration_seconds_count{endpoint="data",status="200"}', body)
+        self.assertRegex(body, r'netpol_visualizer_graph_nodes\{context="",resource_type="deployment"\} [1-9]')
+
+    def test_profile_endpoint(self):
+        self.assertEqual(self.client.get('/debug/profile').status_code, 404)
+        with mock.patch.object(app_module, 'PROFILING_ENABLED', True):
+            response = self.client.get('/debug/profile?resource_type=deployment&sort=tottime')
+            self.assertEqual(self.client.get('/debug/profile?resource_type=unknown').status_code, 400)
+            # 잘못된 sort 는 빌드를 프로파일링하기 전에 거절
+            with mock.patch.object(app_module, 'profile_call', side_effect=AssertionError('profiled')):
+                self.assertEqual(self.client.get('/debug/profile?sort=name').status_code, 400)
+        self.assertEqual(response.status_code, 200)
+        body = response.get_data(as_text=True)
+        self.assertTrue(body.startswith('deployment: '))
+        self.assertIn('function calls', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,244 @@
+import random
+import unittest
+
+import app as app_module
+from label_index import matches_selector
+from reachability import ReachabilityIndex
+from tests.test_app import use_cluster
+
+
+def pod(name, namespace, ports=None, **labels):
+    obj = {'metadata': {'name': name, 'namespace': namespace, 'resourceVersion': '1', 'labels': labels}}
+    if ports:
+        obj['spec'] = {'containers': [{'ports': [{'name': port_name, 'containerPort': number} for port_name, number in ports.items()]}]}
+    return obj
+
+
+def namespace(name, **labels):
+    return {'metadata': {'name': name, 'resourceVersion': '1', 'labels': labels}}
+
+
+def policy(name, namespace, pod_selector, ingress=None, egress=None, types=None):
+    spec = {'podSelector': pod_selector}
+    if ingress is not None:
+        spec['ingress'] = ingress
+    if egress is not None:
+        spec['egress'] = egress
+    if types:
+        spec['policyTypes'] = types
+    return {'metadata': {'name': name, 'namespace': namespace, 'resourceVersion': '1'}, 'spec': spec}
+
+
+PODS = [pod('web', 'shop', app='web'), pod('db', 'shop', app='db'), pod('api', 'shop', app='api'),
+        pod('scraper', 'monitoring', app='prometheus'), pod('batch', 'jobs', app='batch')]
+NAMESPACES = [namespace('shop', team='shop'), namespace('monitoring', team='infra'), namespace('jobs')]
+POLICIES = [
+    # shop/db: shop/api 의 5432 와 team=infra 네임스페이스의 모든 포트만 허용
+    policy('db-ingress', 'shop', {'matchLabels': {'app': 'db'}}, ingress=[
+        {'from': [{'podSelector': {'matchLabels': {'app': 'api'}}}], 'ports': [{'protocol': 'TCP', 'port': 5432}]},
+        {'from': [{'namespaceSelector': {'matchLabels': {'team': 'infra'}}}]},
+    ]),
+    # shop/web: 기본 거부 (규칙 없음)
+    policy('web-deny', 'shop', {'matchLabels': {'app': 'web'}}, types=['Ingress']),
+    # jobs 네임스페이스 전체: 8000-9000 포트의 egress 만 허용
+    policy('jobs-egress', 'jobs', {}, egress=[{'ports': [{'port': 8000, 'endPort': 9000}]}], types=['Egress']),
+]
+
+
+def brute_force(policies, pods, namespaces, source, target, port, protocol=None):
+    """NetworkPolicy 의미를 그대로 옮긴 느린 판정 (비교용)."""
+    namespace_labels = {ns['metadata']['name']: dict(ns['metadata'].get('labels') or {}, **{'kubernetes.io/metadata.name': ns['metadata']['name']})
+                        for ns in namespaces}
+    by_key = {f"{p['metadata']['namespace']}/{p['metadata']['name']}": p for p in pods}
+
+    def selects(selector, obj, labels_of):
+        if not selector.get('matchLabels') and not selector.get('matchExpressions'):
+            return True
+        return matches_selector(labels_of(obj), selector)
+
+    def pod_labels(p):
+        return p['metadata'].get('labels') or {}
+
+    def peer_matches(policy_namespace, peers, p):
+        if not peers:
+            return True
+        for peer in peers:
+            if 'podSelector' not in peer and 'namespaceSelector' not in peer:
+                continue
+            if 'namespaceSelector' in peer:
+                ns_ok = selects(peer['namespaceSelector'], p['metadata']['namespace'], lambda name: namespace_labels.get(name, {}))
+            else:
+                ns_ok = p['metadata']['namespace'] == policy_namespace
+            if ns_ok and selects(peer.get('podSelector') or {}, p, pod_labels):
+                return True
+        return False
+
+    def resolve(name, destination):
+        # 이름 있는 포트는 목적지 파드의 컨테이너 포트 번호
+        for container in (destination.get('spec') or {}).get('containers') or []:
+            for entry in container.get('ports') or []:
+                if entry.get('name') == name and entry.get('protocol', 'TCP') == (protocol or 'TCP'):
+                    return entry['containerPort']
+        return None
+
+    def port_matches(ports, destination):
+        if not ports or (port is None and protocol is None):
+            return True
+        for entry in ports:
+            if entry.get('protocol', 'TCP') != (protocol or 'TCP'):
+                continue
+            allowed = entry.get('port')
+            if port is None or allowed is None or allowed == port:
+                return True
+            if isinstance(allowed, str):
+                if isinstance(port, int) and resolve(allowed, destination) == port:
+                    return True
+                continue
+            number = port if isinstance(port, int) else resolve(port, destination)
+            if number is not None and allowed <= number <= entry.get('endPort', allowed):
+                return True
+        return False
+
+    def direction_allowed(direction, selected_pod, other_pod, rule_field, peer_field, destination):
+        applicable = [p for p in policies if p['metadata']['namespace'] == selected_pod['metadata']['namespace']
+                      and direction in (p['spec'].get('policyTypes') or (['Ingress', 'Egress'] if p['spec'].get('egress') else ['Ingress']))
+                      and selects(p['spec'].get('podSelector') or {}, selected_pod, pod_labels)]
+        if not applicable:
+            return True
+        return any(peer_matches(p['metadata']['namespace'], rule.get(peer_field), other_pod) and port_matches(rule.get('ports'), destination)
+                   for p in applicable for rule in p['spec'].get(rule_field) or [])
+
+    return (direction_allowed('Egress', by_key[source], by_key[target], 'egress', 'to', by_key[target])
+            and direction_allowed('Ingress', by_key[target], by_key[source], 'ingress', 'from', by_key[target]))
+
+
+class TestReachabilityIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ReachabilityIndex(POLICIES, PODS, NAMESPACES)
+
+    def test_pair_queries(self):
+        self.assertEqual(self.index.check('shop/api', 'shop/db', 5432),
+                         {'allowed': True, 'egress': None, 'ingress': ['shop/db-ingress']})
+        self.assertFalse(self.index.check('shop/api', 'shop/db', 80)['allowed'])
+        self.assertTrue(self.index.check('monitoring/scraper', 'shop/db', 9090)['allowed'])
+        self.assertEqual(self.index.check('shop/api', 'shop/web', 80), {'allowed': False, 'egress': None, 'ingress': []})
+        self.assertTrue(self.index.check('shop/web', 'shop/api', 80)['allowed'])
+        self.assertTrue(self.index.check('jobs/batch', 'shop/api', 8080)['allowed'])
+        self.assertEqual(self.index.check('jobs/batch', 'shop/api', 443)['egress'], [])
+
+    def test_sources_and_destinations(self):
+        self.assertEqual(self.index.sources('shop/db', 5432), ['shop/api', 'monitoring/scraper'])
+        self.assertEqual(self.index.sources('shop/db', 22), ['monitoring/scraper'])
+        self.assertEqual(self.index.sources('shop/web'), [])
+        # 포트 없이 protocol 만 주면 그 프로토콜을 허용하는 규칙만 봄
+        self.assertEqual(self.index.sources('shop/db'), ['shop/api', 'monitoring/scraper'])
+        self.assertEqual(self.index.sources('shop/db', protocol='UDP'), ['monitoring/scraper'])
+        self.assertEqual(self.index.destinations('jobs/batch', 443), [])
+        self.assertEqual(self.index.destinations('jobs/batch', 8080), ['shop/api', 'monitoring/scraper', 'jobs/batch'])
+
+    def test_empty_egress_list_does_not_isolate(self):
+        # policyTypes 가 없으면 egress 규칙이 있을 때만 Egress 격리 (egress: [] 는 규칙 없음)
+        index = ReachabilityIndex([policy('empty', 'jobs', {}, ingress=[{}], egress=[])], PODS, NAMESPACES)
+        self.assertEqual(index.check('jobs/batch', 'shop/web'), {'allowed': True, 'egress': None, 'ingress': None})
+
+    def test_named_ports_resolve_against_destination_pod(self):
+        pods = [pod('web', 'shop', ports={'http': 80}, app='web'), pod('alt', 'shop', ports={'http': 8080}, app='web'),
+                pod('api', 'shop', app='api'), pod('db', 'shop', ports={'sql': 5432}, app='db')]
+        policies = [
+            policy('web-http', 'shop', {'matchLabels': {'app': 'web'}}, ingress=[{'ports': [{'port': 'http'}]}]),
+            policy('api-egress', 'shop', {'matchLabels': {'app': 'api'}}, egress=[{'ports': [{'port': 'http'}]},
+                                                                               {'ports': [{'port': 5432}]}]),
+        ]
+        index = ReachabilityIndex(policies, pods, NAMESPACES)
+        # 번호로 질의해도 목적지 파드의 http 포트 번호와 같으면 이름 있는 포트 규칙이 허용
+        self.assertEqual(index.check('shop/api', 'shop/web', 80), {'allowed': True, 'egress': ['shop/api-egress'],
+                                                                   'ingress': ['shop/web-http']})
+        self.assertFalse(index.check('shop/api', 'shop/alt', 80)['allowed'])
+        self.assertEqual(index.sources('shop/alt', 8080), ['shop/web', 'shop/alt', 'shop/api', 'shop/db'])
+        self.assertEqual(index.destinations('shop/api', 80), ['shop/web'])
+        self.assertEqual(index.destinations('shop/api', 8080), ['shop/alt'])
+        # 이름으로 질의하면 번호 규칙은 목적지 파드에서 그 이름의 번호로 비교
+        self.assertEqual(index.destinations('shop/api', 'sql'), ['shop/db'])
+        # api-egress 는 policyTypes 가 없어 api 의 ingress 도 격리함
+        self.assertEqual(index.destinations('shop/db', 80), ['shop/web', 'shop/db'])
+
+    def test_matches_brute_force_on_random_policies(self):
+        rng = random.Random(7)
+        apps = ['a', 'b', 'c']
+        namespaces = [namespace(f"ns-{i}", env=rng.choice(['prod', 'dev'])) for i in range(3)]
+        pods = [pod(f"p{i}", f"ns-{rng.randrange(3)}", ports={'http': rng.choice([80, 8080]), 'https': 443}, app=rng.choice(apps))
+                if i % 3 else pod(f"p{i}", f"ns-{rng.randrange(3)}", app=rng.choice(apps)) for i in range(30)]
+
+        def selector():
+            return rng.choice([{}, {'matchLabels': {'app': rng.choice(apps)}},
+                               {'matchExpressions': [{'key': 'app', 'operator': 'NotIn', 'values': [rng.choice(apps)]}]}])
+
+        def peers():
+            return rng.choice([None, [{'podSelector': selector()}], [{'namespaceSelector': {'matchLabels': {'env': 'prod'}}}],
+                               [{'namespaceSelector': {}, 'podSelector': selector()}], [{'ipBlock': {'cidr': '10.0.0.0/8'}}]])
+
+        def rules(field):
+            result = []
+            for _ in range(rng.randrange(3)):
+                rule = {}
+                entry = peers()
+                if entry is not None:
+                    rule[field] = entry
+                if rng.random() < 0.5:
+                    rule['ports'] = [{'protocol': rng.choice(['TCP', 'UDP']), 'port': rng.choice([80, 443, 'http', 'https'])}]
+                result.append(rule)
+            return result
+
+        policies = []
+        for i in range(12):
+            kwargs = {'ingress': rules('from')}
+            if rng.random() < 0.5:
+                kwargs['egress'] = rules('to')
+            policies.append(policy(f"pol-{i}", f"ns-{rng.randrange(3)}", selector(), **kwargs))
+
+        index = ReachabilityIndex(policies, pods, namespaces)
+        keys = [f"{p['metadata']['namespace']}/{p['metadata']['name']}" for p in pods]
+        for port, protocol in ((80, None), (8080, None), (443, 'UDP'), (None, None), (None, 'UDP'), ('http', None)):
+            for target in keys:
+                expected = [source for source in keys if brute_force(policies, pods, namespaces, source, target, port, protocol)]
+                self.assertEqual(index.sources(target, port, protocol), expected)
+                for source in keys:
+                    self.assertEqual(index.check(source, target, port, protocol)['allowed'], source in expected)
+            for source in keys:
+                expected = [target for target in keys if brute_force(policies, pods, namespaces, source, target, port, protocol)]
+                self.assertEqual(index.destinations(source, port, protocol), expected)
+
+
+class TestReachabilityEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.cluster = use_cluster(self)
+        self.cluster.object_stores['networkpolicies'].replace(POLICIES, None)
+        self.cluster.object_stores['pods'].replace(PODS, None)
+        self.cluster.object_stores['namespaces'].replace(NAMESPACES, None)
+
+    def test_queries(self):
+        response = self.client.get('/reachability?from=shop/api&to=shop/db&port=5432').get_json()
+        self.assertTrue(response['allowed'])
+        self.assertEqual(response['ingress'], ['shop/db-ingress'])
+        self.assertEqual(self.client.get('/reachability?to=shop/db&port=5432').get_json()['sources'],
+                         ['shop/api', 'monitoring/scraper'])
+        self.assertEqual(self.client.get('/reachability?from=jobs/batch&port=443').get_json()['destinations'], [])
+        self.assertEqual(self.client.get('/reachability?to=shop/missing').status_code, 404)
+        self.assertEqual(self.client.get('/reachability').status_code, 400)
+        self.assertEqual(self.client.get('/reachability?to=shop/db&port=70000').status_code, 400)
+        response = self.client.get('/reachability?to=shop/db&protocol=udp').get_json()
+        self.assertEqual((response['protocol'], response['sources']), ('UDP', ['monitoring/scraper']))
+        self.assertIsNone(self.client.get('/reachability?to=shop/db').get_json()['protocol'])
+
+    def test_index_rebuilt_after_change(self):
+        self.assertEqual(self.client.get('/reachability?to=shop/web').get_json()['sources'], [])
+        self.cluster.object_stores['networkpolicies'].apply('DELETED', POLICIES[1])
+        self.cluster.on_object_change('networkpolicies', 'DELETED', POLICIES[1])
+        self.assertEqual(len(self.client.get('/reachability?to=shop/web').get_json()['sources']), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import copy
+import json
+import unittest
+
+import app as app_module
+from benchmarks.synthetic import SyntheticCluster
+from graph_engine import IncrementalGraph, policy_types
+from graph_versions import VersionedGraph
+from label_index import matches_selector
+from simulation import SimulationError, parse_request
+from snapshot_source import SnapshotSource
+from tests.test_app import SAMPLES, use_cluster
+
+DENY_ALL = """
+apiVersion: networking.k8s.io/v1
+kind: NetworkPolicy
+metadata:
+  name: deny-all
+  namespace: test-namespace-1
+spec:
+  podSelector: {}
+  policyTypes: [Ingress]
+"""
+
+
+def isolated(policies, resources):
+    """정책 전체로 방향별 격리된 리소스를 직접 계산합니다 (빈 podSelector 는 네임스페이스 전체)."""
+    result = {'ingress': set(), 'egress': set()}
+    for policy in policies:
+        namespace = policy['metadata']['namespace']
+        spec = policy.get('spec', {})
+        for resource in resources:
+            metadata = resource['metadata']
+            selector = spec.get('podSelector') or {}
+            if metadata['namespace'] != namespace or (selector and not matches_selector(metadata.get('labels') or {}, selector)):
+                continue
+            for direction, policy_type in (('ingress', 'Ingress'), ('egress', 'Egress')):
+                if policy_type in policy_types(spec):
+                    result[direction].add(f"{namespace}/{metadata['name']}")
+    return result
+
+
+class TestEngineSimulation(unittest.TestCase):
+
+    def test_matches_applying_the_change(self):
+        cluster = SyntheticCluster(pods=400, policies=40, namespaces=4, label_cardinality=4, seed=2)
+        objects = cluster.objects()
+        policies, pods = objects['networkpolicies'], objects['pods']
+        engine = IncrementalGraph('pod')
+        engine.load({'items': policies}, {'items': pods})
+        before = engine.graph()
+
+        replaced = copy.deepcopy(policies[0])
+        replaced['spec'] = {'podSelector': {}, 'policyTypes': ['Ingress', 'Egress'],
+                            'ingress': [{'from': [{'podSelector': {'matchExpressions': [
+                                {'key': 'tier', 'operator': 'In', 'values': ['frontend', 'db']}]}}]}]}
+        added = copy.deepcopy(policies[1])
+        added['metadata']['name'] = 'candidate'
+        # 한 네임스페이스의 나머지 정책을 모두 지워 격리가 풀리는 리소스가 생기게 함
+        namespace = policies[2]['metadata']['namespace']
+        deleted = [policy for policy in policies[2:] if policy['metadata']['namespace'] == namespace]
+        kept = [policy for policy in policies[2:] if policy['metadata']['namespace'] != namespace]
+        result = engine.simulate([replaced, added], [f"{namespace}/{policy['metadata']['name']}" for policy in deleted])
+        self.assertEqual(engine.graph(), before)
+
+        # 정책을 실제로 반영한 그래프와의 차이와 같아야 함
+        expected = IncrementalGraph('pod')
+        expected.load({'items': [replaced] + policies[1:2] + [added] + kept}, {'items': pods})
+        versioned = VersionedGraph('pod')
+        versioned.update(before)
+        patch = versioned.update(expected.graph())
+        for part in ('added', 'removed'):
+            for group in ('nodes', 'edges'):
+                ids = lambda elements: sorted(e if isinstance(e, str) else e['data']['id'] for e in elements)
+                self.assertEqual(ids(result[part][group]), ids(patch[part][group]), (part, group))
+        self.assertTrue(result['added']['edges'])
+        self.assertEqual(result['policies'], {'added': [added['metadata']['namespace'] + '/candidate'],
+                                              'replaced': [f"{replaced['metadata']['namespace']}/{replaced['metadata']['name']}"],
+                                              'deleted': [f"{namespace}/{policy['metadata']['name']}" for policy in deleted]})
+
+        old = isolated(policies, pods)
+        new = isolated([replaced] + policies[1:2] + [added] + kept, pods)
+        for direction in ('ingress', 'egress'):
+            self.assertEqual(result['isolated'][direction], sorted(new[direction] - old[direction]))
+            self.assertEqual(result['unisolated'][direction], sorted(old[direction] - new[direction]))
+        self.assertTrue(result['unisolated']['ingress'])
+
+        with self.assertRaises(KeyError):
+            engine.simulate([], ['missing/policy'])
+
+
+class TestParseRequest(unittest.TestCase):
+
+    def test_yaml_json_and_errors(self):
+        policies, deleted = parse_request(DENY_ALL + "---\n" + DENY_ALL.replace('namespace: test-namespace-1', ''), False,
+                                          ['test-namespace-2/deny-all'])
+        self.assertEqual([(p['metadata']['namespace'], p['metadata']['name']) for p in policies],
+                         [('test-namespace-1', 'deny-all'), ('default', 'deny-all')])
+        self.assertEqual(deleted, ['test-namespace-2/deny-all'])
+
+        body = json.dumps({'policies': [{'kind': 'List', 'items': [{'kind': 'NetworkPolicy', 'metadata': {'name': 'a'}}]}],
+                           'delete': ['ns/b']})
+        policies, deleted = parse_request(body, True)
+        self.assertEqual(policies, [{'metadata': {'name': 'a', 'namespace': 'default'}, 'spec': {}}])
+        self.assertEqual(deleted, ['ns/b'])
+
+        for body, is_json in (('{', True), ('kind: Pod\nmetadata: {name: a}', False), ('', False),
+                              ('{"delete": "ns/b"}', True), ('{"delete": ["b"]}', True),
+                              ('kind: NetworkPolicy\nmetadata: {}', False)):
+            with self.assertRaises(SimulationError, msg=body):
+                parse_request(body, is_json)
+
+
+class TestSimulateEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.cluster = use_cluster(self, SnapshotSource(SAMPLES, cache_dir=None))
+        self.client = app_module.app.test_client()
+
+    def test_simulate(self):
+        before = self.client.get('/data?resource_type=deployment').get_json()
+        response = self.client.post('/simulate?resource_type=deployment&delete=test-namespace-1/allow-app-a-to-app-b',
+                                    data=DENY_ALL, content_type='application/yaml')
+        self.assertEqual(response.status_code, 200)
+        result = response.get_json()
+        self.assertEqual(result['policies'], {'added': ['test-namespace-1/deny-all'], 'replaced': [],
+                                              'deleted': ['test-namespace-1/allow-app-a-to-app-b']})
+        self.assertEqual([n['data']['id'] for n in result['added']['nodes']], ['test-namespace-1/deny-all'])
+        self.assertIn('test-namespace-1/allow-app-a-to-app-b', result['removed']['nodes'])
+        # 샘플 Deployment 는 metadata 라벨이 없어 지우는 정책이 아무것도 격리하지 않았음
+        self.assertEqual(result['isolated'], {'ingress': ['test-namespace-1/app-a', 'test-namespace-1/app-b'], 'egress': []})
+        self.assertEqual(result['unisolated'], {'ingress': [], 'egress': []})
+        # 시뮬레이션은 그래프를 바꾸지 않음
+        self.assertEqual(self.client.get('/data?resource_type=deployment').get_json(), before)
+
+        response = self.client.post('/simulate?resource_type=pod', json={'delete': ['test-namespace-2/deny-all']})
+        self.assertEqual(response.get_json()['policies']['deleted'], ['test-namespace-2/deny-all'])
+
+        self.assertEqual(self.client.post('/simulate', data='kind: Pod', content_type='application/yaml').status_code, 400)
+        self.assertEqual(self.client.post('/simulate?resource_type=service', data=DENY_ALL).status_code, 400)
+        self.assertEqual(self.client.post('/simulate', json={'delete': ['test-namespace-1/missing']}).status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from unittest import mock
+
+import cli
+import snapshot_source
+from snapshot_source import SnapshotSource, load_objects
+from tests.test_app import SAMPLES
+
+
+def pod(name, namespace, **labels):
+    return {'apiVersion': 'v1', 'kind': 'Pod', 'metadata': {'name': name, 'namespace': namespace, 'labels': labels,
+                                                            'managedFields': [{'manager': 'kubectl'}]},
+            'status': {'phase': 'Running'}}
+
+
+class TestSnapshotSource(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.directory.name, 'cache')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as f:
+            f.write(content if isinstance(content, str) else json.dumps(content, indent=2))
+        return path
+
+    def test_load_sample_manifests(self):
+        objects = load_objects(SAMPLES)
+        self.assertEqual(len(objects['networkpolicies']), 3)
+        self.assertEqual(len(objects['deployments']), 3)
+        self.assertEqual(objects['pods'], [])
+        self.assertEqual(sorted(ns['metadata']['name'] for ns in objects['namespaces']),
+                         ['test-namespace-1', 'test-namespace-2', 'test-namespace-3'])
+        self.assertNotIn('template', objects['deployments'][0]['spec'])
+
+    def test_kubectl_json_dumps(self):
+        # kubectl get -o json 형식 (여러 kind 가 섞인 List)
+        self.write('all.json', {'apiVersion': 'v1', 'kind': 'List', 'items': [
+            pod('web', 'shop', app='web'),
+            {'apiVersion': 'v1', 'kind': 'Service', 'metadata': {'name': 'web', 'namespace': 'shop'}},
+        ]})
+        # 원시 API 목록: 항목에 kind 가 없고 목록의 kind 가 items 뒤에 나옴
+        raw = {'items': [{'metadata': {'name': 'db', 'namespace': 'data'}}], 'kind': 'PodList', 'metadata': {'resourceVersion': '9'}}
+        self.write('raw.json', raw)
+        self.write('single.json', pod('cache', 'shop'))
+
+        objects = load_objects(self.directory.name)
+        self.assertEqual(sorted(p['metadata']['name'] for p in objects['pods']), ['cache', 'db', 'web'])
+        self.assertNotIn('managedFields', objects['pods'][0]['metadata'])
+        self.assertEqual(sorted(ns['metadata']['name'] for ns in objects['namespaces']), ['data', 'shop'])
+
+    def test_yaml_list_and_default_namespace(self):
+        self.write('dump.yaml', "apiVersion: v1\nkind: List\nitems:\n- kind: Pod\n  metadata:\n    name: a\n    labels: {app: a}\n")
+        objects = load_objects(self.directory.name)
+        self.assertEqual(objects['pods'][0]['metadata'], {'name': 'a', 'namespace': 'default', 'labels': {'app': 'a'}})
+        self.write('broken.yaml', "kind: Pod\nmetadata: [unclosed\n")
+        with self.assertRaises(ValueError):
+            load_objects(self.directory.name)
+
+    def test_cache(self):
+        self.write('pods.json', {'kind': 'List', 'items': [pod('web', 'shop')]})
+        with redirect_stderr(io.StringIO()):
+            first = SnapshotSource(self.directory.name, cache_dir=self.cache_dir).fetch('pods')
+        self.assertEqual([os.path.splitext(name)[1] for name in os.listdir(self.cache_dir)], ['.cache'])
+        self.assertEqual(os.stat(self.cache_dir).st_mode & 0o777, 0o700)
+
+        with mock.patch.object(snapshot_source, 'load_objects', side_effect=AssertionError('cache not used')):
+            self.assertEqual(SnapshotSource(self.directory.name, cache_dir=self.cache_dir).fetch('pods'), first)
+
+        # 입력 파일이 바뀌면 다시 파싱
+        self.write('pods.json', {'kind': 'List', 'items': [pod('web', 'shop'), pod('db', 'shop')]})
+        self.assertEqual(len(SnapshotSource(self.directory.name, cache_dir=self.cache_dir).fetch('pods')['items']), 2)
+
+    def test_cache_write_failure_removes_temp_file(self):
+        self.write('pods.json', {'kind': 'List', 'items': [pod('web', 'shop')]})
+        with mock.patch.object(snapshot_source.json, 'dump', side_effect=OSError('No space left on device')):
+            with self.assertRaises(OSError):
+                SnapshotSource(self.directory.name, cache_dir=self.cache_dir).fetch('pods')
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_cache_refused_in_shared_directory(self):
+        self.write('pods.json', {'kind': 'List', 'items': [pod('web', 'shop')]})
+        os.makedirs(self.cache_dir)
+        os.chmod(self.cache_dir, 0o777)
+        # 다른 사용자가 넣어 둘 수 있는 디렉터리의 캐시 파일은 읽지 않음
+        cached = os.path.join(self.cache_dir, f"{snapshot_source.fingerprint(self.directory.name)}.cache")
+        with open(cached, 'w') as f:
+            json.dump({'pods': []}, f)
+        self.assertEqual(len(SnapshotSource(self.directory.name, cache_dir=self.cache_dir).fetch('pods')['items']), 1)
+
+        os.chmod(self.cache_dir, 0o700)
+        with mock.patch.object(os, 'getuid', return_value=os.getuid() + 1):
+            self.assertEqual(len(SnapshotSource(self.directory.name, cache_dir=self.cache_dir).fetch('pods')['items']), 1)
+        self.assertEqual(SnapshotSource(self.directory.name, cache_dir=self.cache_dir).fetch('pods')['items'], [])
+
+    def test_fetch_all_failure(self):
+        self.write('broken.json', '{"kind": "List", "items": [')
+        results = SnapshotSource(self.directory.name, cache_dir=None).fetch_all(['pods', 'deployments'])
+        self.assertIsInstance(results['pods'], ValueError)
+        self.assertIsInstance(results['deployments'], ValueError)
+
+    def test_cli_writes_graph(self):
+        output = os.path.join(self.directory.name, 'graph.json')
+        with redirect_stderr(io.StringIO()):
+            self.assertEqual(cli.main([SAMPLES, '--resource-type', 'deployment', '--output', output, '--no-cache', '--layout']), 0)
+        with open(output) as f:
+            graph = json.load(f)
+        self.assertEqual(graph['version'], 1)
+        self.assertIn('test-namespace-1/app-a', [node['data']['id'] for node in graph['nodes']])
+        self.assertTrue(all('position' in node for node in graph['nodes']))
+
+        with redirect_stderr(io.StringIO()):
+            self.assertEqual(cli.main([os.path.join(self.directory.name, 'missing')]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
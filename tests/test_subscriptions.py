@@ -0,0 +1,125 @@
+import json
+import unittest
+
+import app as app_module
+from graph_filter import filter_patch
+from snapshot_source import SnapshotSource
+from subscriptions import ViewSubscriptions, room_name
+from tests.test_app import SAMPLES, use_cluster
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def node(node_id, group='pod'):
+    return {'data': {'id': node_id, 'label': node_id, 'group': group}}
+
+
+def edge(source, target):
+    return {'data': {'id': f"{source}->{target}", 'source': source, 'target': target, 'type': 'ingress', 'label': ''}}
+
+
+class TestViewSubscriptions(unittest.TestCase):
+
+    def test_rooms_and_idle_views(self):
+        clock = FakeClock()
+        subscriptions = ViewSubscriptions(idle_seconds=60, clock=clock)
+        self.assertEqual(subscriptions.subscribe('a', 'pod'), ('view:pod', None))
+        self.assertEqual(subscriptions.subscribe('b', 'pod', ['ns-b', 'ns-a', 'ns-a']), ('view:pod:ns-a,ns-b', None))
+        self.assertEqual(subscriptions.rooms('pod'), {'view:pod': None, 'view:pod:ns-a,ns-b': ('ns-a', 'ns-b')})
+
+        self.assertEqual(subscriptions.subscribe('a', 'deployment'), ('view:deployment', 'view:pod'))
+        self.assertEqual(subscriptions.active_views(), {'pod', 'deployment'})
+        self.assertEqual(subscriptions.unsubscribe('b'), 'view:pod:ns-a,ns-b')
+        self.assertEqual(subscriptions.active_views(), {'deployment'})
+
+        clock.now = 30
+        subscriptions.touch('podgroup')
+        clock.now = 61
+        self.assertEqual(subscriptions.take_idle_views(), ['pod'])
+        self.assertEqual(subscriptions.take_idle_views(), [])
+        clock.now = 100
+        self.assertEqual(subscriptions.take_idle_views(), ['podgroup'])
+        self.assertIsNone(subscriptions.unsubscribe('missing'))
+        self.assertEqual(room_name('pod', ()), 'view:pod')
+        self.assertEqual(ViewSubscriptions(context='prod').subscribe('a', 'pod', ['ns'])[0], 'prod/view:pod:ns')
+
+    def test_filter_patch(self):
+        patch = {
+            'version': 2, 'base_version': 1,
+            'added': {'nodes': [node('ns-a/web'), node('ns-b/db'), node('ns-c/cache')],
+                      'edges': [edge('ns-a/allow', 'ns-b/db'), edge('ns-c/allow', 'ns-c/cache')]},
+            'changed': {'nodes': [], 'edges': []},
+            'removed': {'nodes': ['ns-c/old'], 'edges': []},
+            'positions': {'ns-a/web': {'x': 1, 'y': 2}, 'ns-c/cache': {'x': 3, 'y': 4}},
+        }
+        filtered = filter_patch(patch, ['ns-a'])
+        self.assertEqual([n['data']['id'] for n in filtered['added']['nodes']], ['ns-a/web', 'ns-b/db'])
+        self.assertEqual([e['data']['id'] for e in filtered['added']['edges']], ['ns-a/allow->ns-b/db'])
+        self.assertEqual(filtered['removed'], patch['removed'])
+        self.assertEqual(filtered['positions'], {'ns-a/web': {'x': 1, 'y': 2}})
+        self.assertEqual(filtered['version'], 2)
+        self.assertEqual(len(patch['added']['nodes']), 3)
+
+
+class TestSocketSubscriptions(unittest.TestCase):
+
+    def setUp(self):
+        self.cluster = use_cluster(self, SnapshotSource(SAMPLES, cache_dir=None))
+        self.cluster.view_subscriptions = ViewSubscriptions(idle_seconds=0)
+
+    def connect(self, message):
+        client = app_module.socketio.test_client(app_module.app)
+        self.assertIn('room', client.emit('subscribe', message, callback=True))
+        return client
+
+    def test_only_subscribed_views_are_built_and_emitted(self):
+        cluster = self.cluster
+        everything = self.connect({'resource_type': 'deployment'})
+        one_namespace = self.connect({'resource_type': 'deployment', 'namespaces': ['test-namespace-1']})
+        self.assertEqual(everything.emit('subscribe', {'resource_type': 'service'}, callback=True), {'error': "Invalid resource type."})
+        cluster.graph_cache.refresh('deployment').result(5)
+        self.assertIsNotNone(cluster.graph_engines['deployment'])
+
+        for namespace in ('test-namespace-1', 'test-namespace-2'):
+            deployment = {'metadata': {'name': 'extra', 'namespace': namespace, 'labels': {'app': 'extra'}, 'resourceVersion': '9'}}
+            if cluster.object_stores['deployments'].apply('ADDED', deployment):
+                cluster.on_object_change('deployments', 'ADDED', deployment)
+        emitted = app_module.emitted_bytes.value(event='update_deployment')
+        app_module.publish_changes()
+
+        updates = {}
+
+        def added(client):
+            [update] = [message for message in client.get_received() if message['name'] == 'update_deployment']
+            updates[client] = update['args'][0]
+            return sorted(n['data']['id'] for n in update['args'][0]['added']['nodes'])
+        self.assertEqual(added(everything), ['test-namespace-1/extra', 'test-namespace-2/extra'])
+        self.assertEqual(added(one_namespace), ['test-namespace-1/extra'])
+        # 전송 바이트는 방마다 Socket.IO 가 인코딩한 패킷 JSON ([event, payload]) 크기
+        packets = [len(json.dumps(['update_deployment', payload], separators=(',', ':'))) for payload in updates.values()]
+        self.assertEqual(app_module.emitted_bytes.value(event='update_deployment'), emitted + sum(packets))
+        self.assertIsNone(cluster.graph_engines['pod'])
+        self.assertIsNone(cluster.graph_engines['podgroup'])
+
+        version = cluster.graph_versions['deployment'].version
+        everything.disconnect()
+        one_namespace.disconnect()
+        cluster.evict_idle_views()
+        self.assertIsNone(cluster.graph_engines['deployment'])
+        self.assertIsNone(cluster.graph_cache.peek('deployment'))
+        self.assertGreater(cluster.graph_versions['deployment'].version, version)
+
+        # 내려놓은 뷰도 요청하면 다시 만듦
+        data = app_module.app.test_client().get('/data?resource_type=deployment').get_json()
+        self.assertIn('test-namespace-2/extra', [n['data']['id'] for n in data['nodes']])
+
+
+if __name__ == '__main__':
+    unittest.main()